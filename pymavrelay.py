@@ -12,6 +12,12 @@ import flask
 import flask_cors
 import requests
 
+# fetch MessagePack from the API if it is installed
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 # create a flask application
 application = flask.Flask(import_name="pymavrelay")
 
@@ -174,12 +180,22 @@ def page_not_found(error):
     return flask.jsonify({})
 
 
-# receive from remote API
+# receive from remote API, skip the download when remote data has not changed since the last poll
 def receive():
     global all_data, input_host, input_port, frequency, timeout
+    etag = None
     while True:
         try:
-            all_data = requests.get(url=f"http://{input_host}:{input_port}/get/all", timeout=timeout).json()
+            headers = {"If-None-Match": etag} if etag is not None else {}
+            if msgpack is not None:
+                headers["Accept"] = "application/msgpack, application/json;q=0.5"
+            response = requests.get(url=f"http://{input_host}:{input_port}/get/all", headers=headers, timeout=timeout)
+            if response.status_code != 304:
+                if response.headers.get("Content-Type", "").startswith("application/msgpack"):
+                    all_data = msgpack.unpackb(response.content, strict_map_key=False)
+                else:
+                    all_data = response.json()
+                etag = response.headers.get("ETag")
         except Exception as e:
             pass
         gevent.sleep(1.0 / frequency)
@@ -9,15 +9,62 @@ gevent.monkey.patch_all()
 import os
 import time
 import enum
+import heapq
+import functools
+import operator
+import collections
+import collections.abc
+import fcntl
+import struct
+import termios
+import gzip
+import zlib
+import numpy
 import click
 import pymavlink.mavutil as utility
 import pymavlink.dialects.v20.all as dialect
 import gevent.pywsgi
+import gevent.select
+import gevent.event
+import gevent.lock
+import geventwebsocket.handler
+import socket
+import mmap
 import flask
 import json
 import jsonschema
 import flask_cors
 
+# use faster JSON encoder if it is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# serve MessagePack if it is installed
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# serve CBOR if it is installed
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+# compress responses with brotli if it is installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# compress responses with zstandard if it is installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # always use MAVLink 2.0
 os.environ["MAVLINK20"] = "1"
 
@@ -46,6 +93,20 @@ class MessageName(enum.Enum):
     HEARTBEAT = "HEARTBEAT"
 
 
+# Message id enumeration
+class MessageId(enum.Enum):
+    HEARTBEAT = 0
+    PARAM_VALUE = 22
+    MISSION_REQUEST = 40
+    MISSION_COUNT = 44
+    MISSION_ACK = 47
+    MISSION_ITEM_INT = 73
+    FENCE_POINT = 160
+    FILE_TRANSFER_PROTOCOL = 110
+    RALLY_POINT = 175
+    HOME_POSITION = 242
+
+
 # Parameter name enumeration
 class ParameterName(enum.Enum):
     RALLY_TOTAL = "RALLY_TOTAL"
@@ -58,6 +119,102 @@ class ParameterName(enum.Enum):
     SYSID_THISMAV = "SYSID_THISMAV"
 
 
+# MAVLink FTP enumeration
+class FtpEnum(enum.Enum):
+    TERMINATE_SESSION = 1
+    OPEN_FILE_RO = 4
+    BURST_READ_FILE = 15
+    ACK = 128
+    NAK = 129
+    ERROR_EOF = 6
+    HEADER_FORMAT = "<HBBBBBBI"
+    HEADER_LENGTH = 12
+    DATA_LENGTH = 239
+    PARAMETER_FILE = "@PARAM/param.pck"
+    PARAMETER_MAGIC = 0x671b
+    PARAMETER_MAGIC_DEFAULTS = 0x671c
+    RETRIES = 3
+
+
+# Vehicle cache enumeration
+class CacheEnum(enum.Enum):
+    HASH_CHECK = "_HASH_CHECK"
+    HASH_INDEX = -1
+    HASH_TIMEOUT = 3
+    FILE_NAME = "vehicle_{0}_{1}.json"
+
+
+# Response format enumeration
+class FormatEnum(enum.Enum):
+    JSON = "application/json"
+    MSGPACK = "application/msgpack"
+    CBOR = "application/cbor"
+
+
+# Message history column type enumeration
+class HistoryEnum(enum.Enum):
+    float = "float32"
+    double = "float64"
+    int8_t = "int8"
+    uint8_t = "uint8"
+    int16_t = "int16"
+    uint16_t = "uint16"
+    int32_t = "int32"
+    uint32_t = "uint32"
+    int64_t = "int64"
+    uint64_t = "uint64"
+
+
+# Message history aggregation enumeration
+class AggregateEnum(enum.Enum):
+    BUCKET = 1.0
+    POINTS = 500
+    POINTS_MIN = 3
+    CACHE = 256
+
+
+# Telemetry log recorder enumeration
+class RecorderEnum(enum.Enum):
+    PERIOD = 0.5
+    EXTENSION = ".tlog"
+    TIME_FORMAT = "%Y%m%d_%H%M%S"
+
+
+# Telemetry log replay enumeration
+class ReplayEnum(enum.Enum):
+    BATCH = 1000
+    SLICE = 0.1
+    TIMESTAMP_LENGTH = 8
+    MARKER_V1 = 0xfe
+    MARKER_V2 = 0xfd
+    SIGNED = 0x01
+    SIGNATURE_LENGTH = 13
+
+
+# Response compression enumeration
+class CompressEnum(enum.Enum):
+    GZIP = "gzip"
+    BROTLI = "br"
+    ZSTANDARD = "zstd"
+    CACHE = 256
+
+
+# Batch query enumeration
+class QueryEnum(enum.Enum):
+    PARAMETER = "parameter"
+    CUSTOM = "custom"
+    WILDCARD = "*"
+    CACHE = 256
+
+
+# Subscriber enumeration
+class StreamEnum(enum.Enum):
+    KEEPALIVE = 15.0
+    RETRY = 1000
+    WAIT_TIMEOUT = 30.0
+    WAIT_TIMEOUT_MAX = 300.0
+
+
 # Message enumeration
 class MessageEnum(enum.Enum):
     HOME_POSITION = 242
@@ -84,9 +241,163 @@ heartbeat_message = dialect.MAVLink_heartbeat_message(type=MessageEnum.MAV_TYPE_
                                                       system_status=MessageEnum.MAV_STATE_UNINIT.value,
                                                       mavlink_version=MessageEnum.MAVLINK_VERSION.value)
 
+
+# get the response format client accepts, JSON is the default
+def response_format():
+    # there is no request to negotiate with
+    if not flask.has_request_context():
+        return FormatEnum.JSON
+
+    # create available response formats, JSON is preferred when client accepts any format
+    available = [FormatEnum.JSON.value]
+    if msgpack is not None:
+        available += [FormatEnum.MSGPACK.value, "application/x-msgpack", "application/vnd.msgpack"]
+    if cbor2 is not None:
+        available += [FormatEnum.CBOR.value]
+
+    # get the best format client accepts
+    accepted = flask.request.accept_mimetypes.best_match(matches=available, default=FormatEnum.JSON.value)
+
+    # expose the response format, aliases of MessagePack are served as MessagePack
+    return FormatEnum.MSGPACK if accepted.endswith("msgpack") else FormatEnum(accepted)
+
+
+# encode data to a binary response format
+def encode_binary(data, data_format):
+    # encode data to MessagePack
+    if data_format is FormatEnum.MSGPACK:
+        return msgpack.packb(data, default=serialize_record)
+
+    # encode data to CBOR
+    return cbor2.dumps(data, default=lambda encoder, value: encoder.encode(serialize_record(value=value)))
+
+
+# get the content encoding client accepts for compressed responses, none means do not compress
+def response_encoding():
+    # get global variables
+    global compression_level
+
+    # compression is disabled or there is no request to negotiate with
+    if compression_level == 0 or not flask.has_request_context():
+        return None
+
+    # create available content encodings, the denser ones are preferred when client accepts them equally
+    available = [CompressEnum.GZIP.value]
+    if zstandard is not None:
+        available.insert(0, CompressEnum.ZSTANDARD.value)
+    if brotli is not None:
+        available.insert(0, CompressEnum.BROTLI.value)
+
+    # expose the best content encoding client accepts
+    return flask.request.accept_encodings.best_match(matches=available, default=None)
+
+
+# compress a response body, the same body is compressed once for each content encoding
+def compress_response(response, content_encoding, etag):
+    # get global variables
+    global compress_cache, compression_level, compression_size
+
+    # do not compress partial, empty or small responses
+    if response.status_code != 200 or response.direct_passthrough or len(response.get_data()) < compression_size:
+        return
+
+    # get the cached compression of this route in this format and content encoding
+    key = (flask.request.full_path, response.mimetype, content_encoding)
+    cached_etag, content = compress_cache.get(key, (None, None))
+
+    # body has changed since it was compressed
+    if cached_etag != etag:
+
+        # compress the body with brotli
+        if content_encoding == CompressEnum.BROTLI.value:
+            content = brotli.compress(response.get_data(), quality=compression_level)
+
+        # compress the body with zstandard
+        elif content_encoding == CompressEnum.ZSTANDARD.value:
+            content = zstandard.ZstdCompressor(level=compression_level).compress(response.get_data())
+
+        # compress the body with gzip
+        else:
+            content = gzip.compress(response.get_data(), compresslevel=compression_level, mtime=0)
+
+        # limit the cache size
+        if len(compress_cache) >= CompressEnum.CACHE.value:
+            compress_cache.clear()
+
+        # cache the compression
+        compress_cache[key] = (etag, content)
+
+    # replace the body with the compressed body
+    response.set_data(content)
+    response.headers["Content-Encoding"] = content_encoding
+
+
+# flask JSON provider that uses faster JSON encoder if it is installed and serves negotiated binary formats
+class JSONProvider(flask.json.provider.DefaultJSONProvider):
+    # serialize data to JSON
+    def dumps(self, obj, **kwargs):
+        # use faster encoder unless output is indented
+        if orjson is not None and "indent" not in kwargs:
+            return orjson.dumps(obj, default=self.default,
+                                option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+        # use standard library encoder
+        return super().dumps(obj, **kwargs)
+
+    # convert stored message records to dictionaries, other types are converted by flask
+    @staticmethod
+    def default(o):
+        # convert message records and statistics
+        if isinstance(o, (MessageRecord, MessageStatistics)):
+            return o.to_dict()
+
+        # convert other types
+        return flask.json.provider.DefaultJSONProvider.default(o)
+
+    # deserialize JSON data
+    def loads(self, s, **kwargs):
+        # use faster decoder
+        if orjson is not None:
+
+            # try to decode with the faster decoder
+            try:
+                return orjson.loads(s)
+
+            # faster decoder rejects NaN and Infinity that clients use for parameters to leave unchanged
+            except orjson.JSONDecodeError as e:
+                pass
+
+        # use standard library decoder
+        return super().loads(s, **kwargs)
+
+    # create a response in the format client accepts
+    def response(self, *args, **kwargs):
+        # get the response format
+        data_format = response_format()
+
+        # create JSON response
+        if data_format is FormatEnum.JSON:
+            response = super().response(*args, **kwargs)
+
+        # create binary response
+        else:
+            response = self._app.response_class(response=encode_binary(data=self._prepare_response_obj(args, kwargs),
+                                                                        data_format=data_format),
+                                                mimetype=data_format.value)
+
+        # response depends on accepted formats
+        response.vary.add("Accept")
+
+        # expose the response
+        return response
+
+
 # create a flask application
 application = flask.Flask(import_name="pymavrest")
 
+# use JSON provider with faster encoder and binary formats
+application.json = JSONProvider(app=application)
+
 # enable CORS
 flask_cors.CORS(app=application)
 
@@ -97,29 +408,66 @@ parameter_white_list = set()
 parameter_black_list = set()
 vehicle = None
 vehicle_connected = False
+vehicle_component = 0
 message_data = {}
 message_enumeration = {}
+message_index = {}
+message_layouts = {}
+metadata_data = {}
+metadata_index = {}
 parameter_data = {}
-parameter_count_total = 0
-parameter_count = set()
 plan_data = []
-plan_count_total = 0
-plan_count = set()
 fence_data = []
-fence_count_total = 0
-fence_count = set()
 rally_data = []
-rally_count_total = 0
-rally_count = set()
 custom_data = {}
 send_plan_data = []
 send_fence_data = []
 send_rally_data = []
-statistics_data = {"api": {}, "vehicle": {}}
+statistics_data = {"api": {}, "vehicle": {}, "scheduler": {}}
 hold_statistics = False
 default_message_list_length = len([message for message in MessageName])
 default_parameter_list_length = len([parameter for parameter in ParameterName])
 custom_cache = False
+message_handlers = {}
+fetch_param = True
+fetch_plan = True
+fetch_fence = True
+fetch_rally = True
+drop_heap = []
+drop_scheduled = set()
+drop_timeout = None
+download_data = {}
+download_window = 10
+download_retry = 1.0
+fetch_ftp = False
+ftp_data = {}
+cache_vehicle = False
+cache_data = {}
+section_version = {"message": 0, "parameter": 0, "plan": 0, "fence": 0, "rally": 0,
+                   "custom": 0, "statistics": 0, "version": 0, "metadata": 0}
+section_cache = {}
+message_version = {}
+subscriber_data = {}
+subscriber_counter = 0
+subscriber_queue = 256
+event_cache = {}
+parameter_version = {}
+waiter_events = {}
+waiter_counts = {}
+selector_cache = {}
+compress_cache = {}
+history_data = {}
+history_messages = set()
+history_capacity = 10000
+aggregate_cache = {}
+recorder_queue = None
+recorder_limit = 10000
+recorder_event = gevent.event.Event()
+replay_speed = 1.0
+downsample_cache = {}
+compression_level = 6
+compression_size = 1024
+entity_prefix = format(time.time_ns(), "x")
 
 # COMMAND_LONG schema for validation
 schema_command_long = {
@@ -269,41 +617,216 @@ schema_message = {
 }
 
 
+# get serialized data of a section, serialize it again only if the section has changed since last time
+def serialize_section(name, data):
+    # get global variables
+    global section_version, section_cache
+
+    # get the response format
+    data_format = response_format()
+
+    # get the cached serialization of the section in this format
+    version, content = section_cache.get((name, data_format), (None, None))
+
+    # section has changed since it was serialized
+    if version != section_version[name]:
+        # serialize the section
+        version, content = section_version[name], flask.jsonify(data).get_data()
+
+        # cache the serialization
+        section_cache[(name, data_format)] = (version, content)
+
+    # expose the serialized section
+    return content
+
+
+# create a response from serialized data
+def respond_serialized(content):
+    # create the response in the format client accepts
+    response = application.response_class(response=content, mimetype=response_format().value)
+
+    # response depends on accepted formats
+    response.vary.add("Accept")
+
+    # expose the response
+    return response
+
+
+# get entity tag of a section
+def section_tag(name):
+    # get global variables
+    global section_version
+
+    # expose the version of the section
+    return section_version[name]
+
+
+# get entity tag of a message with message name
+def message_tag(message_name):
+    # get global variables
+    global message_version
+
+    # expose the version of the message, zero means message is not received yet
+    return message_version.get(message_name, 0)
+
+
+# get the version of a message history response for conditional requests
+def history_tag(message_name, field_name=""):
+    # get global variables
+    global history_data
+
+    # get the stored sample count which keeps growing when the message itself is dropped, zero means no history
+    history = history_data.get(message_name)
+    count = history["count"] if history is not None else 0
+
+    # expose the sample count with the field and the query that select the samples
+    return f"{count}-{field_name}-{zlib.crc32(flask.request.query_string):08x}"
+
+
+# get message name with message id
+def message_name_with_id(message_id):
+    # get global variables
+    global message_index
+
+    # expose the message name, none means there is no received message with requested id
+    return message_index.get(message_id)
+
+
+# create message metadata table from the messages of the dialect
+def create_metadata():
+    # get global variables
+    global metadata_data, metadata_index
+
+    # for each message in the dialect
+    for message_id, message_class in dialect.mavlink_map.items():
+
+        # get array lengths of fields which are listed in wire order
+        field_lengths = dict(zip(message_class.ordered_fieldnames, message_class.array_lengths))
+
+        # create message fields in order of the dialect definition
+        fields = [{"name": field_name,
+                   "type": field_type,
+                   "length": field_lengths[field_name],
+                   "units": message_class.fieldunits_by_name.get(field_name, ""),
+                   "enum": message_class.fieldenums_by_name.get(field_name, "")}
+                  for field_name, field_type in zip(message_class.fieldnames, message_class.fieldtypes)]
+
+        # add message to metadata table
+        metadata_data[message_class.msgname] = {"id": message_id, "name": message_class.msgname, "fields": fields}
+
+        # add message name to message id index of metadata table
+        metadata_index[message_id] = message_class.msgname
+
+
+# answer conditional requests with not modified if the client has the latest version of the response
+def conditional_response(tag):
+    # create the decorator
+    def decorator(function):
+        # wrap the route
+        @functools.wraps(function)
+        def wrapper(**kwargs):
+            # get global variables
+            global entity_prefix
+
+            # route is called directly outside of a request
+            if not flask.has_request_context():
+                return function(**kwargs)
+
+            # get the response format
+            data_format = response_format()
+
+            # create a strong entity tag that is unique across restarts and response formats
+            etag = f"{entity_prefix}-{tag(**kwargs)}"
+            if data_format is not FormatEnum.JSON:
+                etag = f"{etag}-{data_format.name.lower()}"
+
+            # get the content encoding and tag compressed responses separately
+            content_encoding = response_encoding()
+            if content_encoding is not None:
+                etag = f"{etag}-{content_encoding}"
+
+            # client has the latest version of the response
+            if flask.request.if_none_match.contains(etag):
+                response = application.response_class(status=304)
+                response.vary.add("Accept")
+
+            # client does not have the latest version of the response
+            else:
+                response = flask.make_response(function(**kwargs))
+
+                # compress the response if client accepts compressed responses
+                if content_encoding is not None:
+                    compress_response(response=response, content_encoding=content_encoding, etag=etag)
+
+            # response depends on accepted content encodings
+            response.vary.add("Accept-Encoding")
+
+            # tag the response
+            response.set_etag(etag)
+
+            # expose the response
+            return response
+
+        # expose the wrapped route
+        return wrapper
+
+    # expose the decorator
+    return decorator
+
+
 # get all data
 @application.route(rule="/get/all", methods=["GET"])
+@conditional_response(tag=lambda: "-".join(str(version) for version in section_version.values()))
 def get_all():
     # get all data
     global message_data, parameter_data, plan_data, fence_data, rally_data, custom_data, statistics_data, version_data
 
     # create all data
-    all_data = {"message": message_data,
+    all_data = {"custom": custom_data,
+                "fence": fence_data,
+                "message": message_data,
                 "parameter": parameter_data,
                 "plan": plan_data,
-                "fence": fence_data,
                 "rally": rally_data,
-                "custom": custom_data,
                 "statistics": statistics_data,
                 "version": version_data}
 
+    # get the response format
+    data_format = response_format()
+
+    # assemble all data from serialized JSON sections in sorted key order like flask.jsonify
+    if data_format is FormatEnum.JSON:
+        content = b",".join(b"\"" + name.encode() + b"\":" + serialize_section(name=name, data=data).rstrip()
+                            for name, data in all_data.items())
+        content = b"{" + content + b"}\n"
+
+    # assemble all data from serialized binary sections after a map header with the count of sections
+    else:
+        header = bytes([(0x80 if data_format is FormatEnum.MSGPACK else 0xa0) | len(all_data)])
+        content = header + b"".join(encode_binary(data=name, data_format=data_format) +
+                                    serialize_section(name=name, data=data) for name, data in all_data.items())
+
     # expose the response
-    return flask.jsonify(all_data)
+    return respond_serialized(content=content)
 
 
 # get version data
 @application.route(rule="/get/version", methods=["GET"])
+@conditional_response(tag=lambda: section_tag(name="version"))
 def get_version():
     # get version data
     global version_data
 
     # expose the response
-    return flask.jsonify(version_data)
+    return respond_serialized(content=serialize_section(name="version", data=version_data))
 
 
 # get time data
 @application.route(rule="/get/statistics", methods=["GET"])
+@conditional_response(tag=lambda: section_tag(name="statistics"))
 def get_statistics():
     # get time data
-    global statistics_data, hold_statistics
+    global statistics_data, hold_statistics, section_version
 
     # user requested to hold statistics
     if hold_statistics:
@@ -345,22 +868,27 @@ def get_statistics():
             statistics_data["api"]["statistics"]["instant_frequency"] = instant_frequency
             statistics_data["api"]["statistics"]["average_frequency"] = average_frequency
 
+        # statistics are changed
+        section_version["statistics"] += 1
+
     # expose the response
-    return flask.jsonify(statistics_data)
+    return respond_serialized(content=serialize_section(name="statistics", data=statistics_data))
 
 
 # get all messages
 @application.route(rule="/get/message/all", methods=["GET"])
+@conditional_response(tag=lambda: section_tag(name="message"))
 def get_message_all():
     # get all messages
     global message_data
 
     # expose the response
-    return flask.jsonify(message_data)
+    return respond_serialized(content=serialize_section(name="message", data=message_data))
 
 
 # get a message by name
 @application.route(rule="/get/message/<string:message_name>", methods=["GET"])
+@conditional_response(tag=lambda message_name: message_tag(message_name=message_name))
 def get_message_with_name(message_name):
     # get all messages
     global message_data
@@ -383,15 +911,16 @@ def get_message_with_name(message_name):
 
 # get a message by id
 @application.route(rule="/get/message/<int:message_id>", methods=["GET"])
+@conditional_response(tag=lambda message_id: message_tag(message_name=message_name_with_id(message_id=message_id)))
 def get_message_with_id(message_id):
-    # get all messages and message id numbers
-    global message_data, message_enumeration
+    # get all messages and message id index
+    global message_data, message_index
 
     # check if the there is a message with requested id
-    if message_id in message_enumeration.values():
+    if message_id in message_index.keys():
 
         # get message name with message id
-        message_name = list(message_enumeration.keys())[list(message_enumeration.values()).index(message_id)]
+        message_name = message_index[message_id]
 
         # check if the message is received
         if message_name in message_data.keys():
@@ -417,6 +946,7 @@ def get_message_with_id(message_id):
 
 # get a field of a message with message name
 @application.route(rule="/get/message/<string:message_name>/<string:field_name>", methods=["GET"])
+@conditional_response(tag=lambda message_name, field_name: message_tag(message_name=message_name))
 def get_message_field_with_name(message_name, field_name):
     # get all messages
     global message_data
@@ -448,15 +978,17 @@ def get_message_field_with_name(message_name, field_name):
 
 # get a field of a message with message id
 @application.route(rule="/get/message/<int:message_id>/<string:field_name>", methods=["GET"])
+@conditional_response(tag=lambda message_id, field_name:
+                      message_tag(message_name=message_name_with_id(message_id=message_id)))
 def get_message_field_with_id(message_id, field_name):
-    # get all messages and message id numbers
-    global message_data, message_enumeration
+    # get all messages and message id index
+    global message_data, message_index
 
     # check if the there is a message with requested id
-    if message_id in message_enumeration.values():
+    if message_id in message_index.keys():
 
         # get message name with message id
-        message_name = list(message_enumeration.keys())[list(message_enumeration.values()).index(message_id)]
+        message_name = message_index[message_id]
 
         # check if the message is received
         if message_name in message_data.keys():
@@ -489,18 +1021,53 @@ def get_message_field_with_id(message_id, field_name):
     return flask.jsonify(result)
 
 
+# get metadata of all messages in the dialect
+@application.route(rule="/get/metadata/all", methods=["GET"])
+@conditional_response(tag=lambda: section_tag(name="metadata"))
+def get_metadata_all():
+    # get message metadata table
+    global metadata_data
+
+    # expose the response
+    return respond_serialized(content=serialize_section(name="metadata", data=metadata_data))
+
+
+# get metadata of a message by name
+@application.route(rule="/get/metadata/<string:message_name>", methods=["GET"])
+@conditional_response(tag=lambda message_name: section_tag(name="metadata"))
+def get_metadata_with_name(message_name):
+    # get message metadata table
+    global metadata_data
+
+    # expose the metadata of the message if the message is in the dialect
+    return flask.jsonify(metadata_data.get(message_name, {}))
+
+
+# get metadata of a message by id
+@application.route(rule="/get/metadata/<int:message_id>", methods=["GET"])
+@conditional_response(tag=lambda message_id: section_tag(name="metadata"))
+def get_metadata_with_id(message_id):
+    # get message metadata table and its message id index
+    global metadata_data, metadata_index
+
+    # expose the metadata of the message if the message is in the dialect
+    return flask.jsonify(metadata_data.get(metadata_index.get(message_id), {}))
+
+
 # get all parameters
 @application.route(rule="/get/parameter/all", methods=["GET"])
+@conditional_response(tag=lambda: section_tag(name="parameter"))
 def get_parameter_all():
     # get all parameters
     global parameter_data
 
     # expose the response
-    return flask.jsonify(parameter_data)
+    return respond_serialized(content=serialize_section(name="parameter", data=parameter_data))
 
 
 # get a parameter by name
 @application.route(rule="/get/parameter/<string:parameter_name>", methods=["GET"])
+@conditional_response(tag=lambda parameter_name: section_tag(name="parameter"))
 def get_parameter_with_name(parameter_name):
     # get all parameters
     global parameter_data
@@ -523,16 +1090,18 @@ def get_parameter_with_name(parameter_name):
 
 # get all flight plan
 @application.route(rule="/get/plan/all", methods=["GET"])
+@conditional_response(tag=lambda: section_tag(name="plan"))
 def get_plan_all():
     # get entire plan
     global plan_data
 
     # expose the response
-    return flask.jsonify(plan_data)
+    return respond_serialized(content=serialize_section(name="plan", data=plan_data))
 
 
 # get a flight plan command by index
 @application.route(rule="/get/plan/<int:plan_index>", methods=["GET"])
+@conditional_response(tag=lambda plan_index: section_tag(name="plan"))
 def get_plan_with_index(plan_index):
     # get entire plan
     global plan_data
@@ -552,16 +1121,18 @@ def get_plan_with_index(plan_index):
 
 # get all fence
 @application.route(rule="/get/fence/all", methods=["GET"])
+@conditional_response(tag=lambda: section_tag(name="fence"))
 def get_fence_all():
     # get entire fence
     global fence_data
 
     # expose the response
-    return flask.jsonify(fence_data)
+    return respond_serialized(content=serialize_section(name="fence", data=fence_data))
 
 
 # get a fence item by index
 @application.route(rule="/get/fence/<int:fence_index>", methods=["GET"])
+@conditional_response(tag=lambda fence_index: section_tag(name="fence"))
 def get_fence_with_index(fence_index):
     # get entire fence
     global fence_data
@@ -581,16 +1152,18 @@ def get_fence_with_index(fence_index):
 
 # get all rally
 @application.route(rule="/get/rally/all", methods=["GET"])
+@conditional_response(tag=lambda: section_tag(name="rally"))
 def get_rally_all():
     # get entire rally
     global rally_data
 
     # expose the response
-    return flask.jsonify(rally_data)
+    return respond_serialized(content=serialize_section(name="rally", data=rally_data))
 
 
 # get a rally item by index
 @application.route(rule="/get/rally/<int:rally_index>", methods=["GET"])
+@conditional_response(tag=lambda rally_index: section_tag(name="rally"))
 def get_rally_with_index(rally_index):
     # get entire rally
     global rally_data
@@ -610,16 +1183,18 @@ def get_rally_with_index(rally_index):
 
 # get all custom data
 @application.route(rule="/get/custom/all", methods=["GET"])
+@conditional_response(tag=lambda: section_tag(name="custom"))
 def get_custom_all():
     # get all custom data
     global custom_data
 
     # expose the response
-    return flask.jsonify(custom_data)
+    return respond_serialized(content=serialize_section(name="custom", data=custom_data))
 
 
 # get a key value pair with key
 @application.route(rule="/get/custom/<string:key>", methods=["GET"])
+@conditional_response(tag=lambda key: section_tag(name="custom"))
 def get_key_value_pair_with_key(key):
     # get all custom data
     global custom_data
@@ -640,281 +1215,494 @@ def get_key_value_pair_with_key(key):
     return flask.jsonify(result)
 
 
-# post command long message to vehicle
-@application.route(rule="/post/command_long", methods=["POST"])
-def post_command_long():
+# get many messages, message fields, parameters and custom values in one response
+@application.route(rule="/get/batch", methods=["GET"])
+@conditional_response(tag=lambda: f"{section_tag(name='message')}-{section_tag(name='parameter')}-"
+                                  f"{section_tag(name='custom')}")
+def get_batch():
     # get global variables
-    global message_white_list, message_black_list
-    global vehicle, vehicle_connected
-    global schema_command_long
+    global message_data, parameter_data, custom_data
 
-    # get the request
-    request = flask.request.json
+    # compile the comma separated selectors
+    messages, parameters, customs = compile_selectors(text=",".join(flask.request.args.getlist("select")))
 
-    # adjust message white and black lists
-    messages = {MessageName.COMMAND_ACK.value}
-    for message in messages:
-        message_white_list.add(message)
-        message_black_list.discard(message)
+    # create empty response
+    result = {"message": {}, "parameter": {}, "custom": {}}
 
-    # create response and add vehicle presence to response
-    response = {"command": "POST_LONG", "connected": vehicle_connected, "valid": False, "sent": False}
+    # for each selected message
+    for message, fields in messages.items():
 
-    # try to validate the request
-    try:
+        # get message name with message id
+        message_name = message_name_with_id(message_id=message) if isinstance(message, int) else message
 
-        # validate the request
-        jsonschema.validate(instance=request, schema=schema_command_long)
+        # message is not received yet
+        if message_name not in message_data.keys():
+            continue
 
-        # validation is successful
-        response["valid"] = True
+        # select the whole message or its selected fields
+        if fields is None:
+            selected = message_data[message_name]
+        else:
+            selected = {field: message_data[message_name][field]
+                        for field in fields if field in message_data[message_name].keys()}
 
-    # instance is invalid
-    except jsonschema.exceptions.ValidationError:
-        pass
+        # merge the selection with the fields selected by other selectors of the same message
+        result["message"][message_name] = {**result["message"].get(message_name, {}), **selected}
 
-    # check vehicle connection and message validation
-    if response["connected"] and response["valid"]:
-        # send command message to the vehicle
-        vehicle.mav.command_long_send(target_system=vehicle.target_system,
-                                      target_component=vehicle.target_component,
-                                      command=request["command"],
-                                      confirmation=request["confirmation"],
-                                      param1=request["param1"],
-                                      param2=request["param2"],
-                                      param3=request["param3"],
-                                      param4=request["param4"],
-                                      param5=request["param5"],
-                                      param6=request["param6"],
-                                      param7=request["param7"])
+    # select all parameters or the selected parameters
+    if parameters is None:
+        result["parameter"] = dict(parameter_data)
+    else:
+        result["parameter"] = {x: parameter_data[x] for x in parameters if x in parameter_data.keys()}
 
-        # message sent to vehicle
-        response["sent"] = True
+    # select all custom values or the selected custom values
+    if customs is None:
+        result["custom"] = dict(custom_data)
+    else:
+        result["custom"] = {x: custom_data[x] for x in customs if x in custom_data.keys()}
 
     # expose the response
-    return flask.jsonify(response)
+    return flask.jsonify(result)
 
 
-# post command int message to vehicle
-@application.route(rule="/post/command_int", methods=["POST"])
-def post_command_int():
+# wait until a message is updated past a version
+@application.route(rule="/wait/message/<string:message_name>", methods=["GET"])
+def wait_message_with_name(message_name):
     # get global variables
-    global message_white_list, message_black_list
-    global vehicle, vehicle_connected
-    global schema_command_int
+    global message_data
 
-    # get the request
-    request = flask.request.json
+    # get the version to wait for and the timeout
+    since, timeout = wait_arguments(version=message_tag(message_name=message_name))
 
-    # adjust message white and black lists
-    messages = {MessageName.COMMAND_ACK.value}
-    for message in messages:
-        message_white_list.add(message)
-        message_black_list.discard(message)
+    # wait until the message is updated
+    changed = wait_change(kind="message", name=message_name, timeout=timeout,
+                          condition=lambda: message_tag(message_name=message_name) > since)
 
-    # create response and add vehicle presence to response
-    response = {"command": "POST_INT", "connected": vehicle_connected, "valid": False, "sent": False}
+    # create the response
+    result = {"changed": changed,
+              "version": message_tag(message_name=message_name),
+              "data": {message_name: message_data[message_name]} if message_name in message_data.keys() else {}}
 
-    # try to validate the request
-    try:
+    # expose the response
+    return flask.jsonify(result)
 
-        # validate the request
-        jsonschema.validate(instance=request, schema=schema_command_int)
 
-        # validation is successful
-        response["valid"] = True
+# wait until a parameter is updated past a version
+@application.route(rule="/wait/parameter/<string:parameter_name>", methods=["GET"])
+def wait_parameter_with_name(parameter_name):
+    # get global variables
+    global parameter_data, parameter_version
 
-    # instance is invalid
-    except jsonschema.exceptions.ValidationError:
-        pass
+    # get the version to wait for and the timeout
+    since, timeout = wait_arguments(version=parameter_version.get(parameter_name, 0))
 
-    # check vehicle connection and message validation
-    if response["connected"] and response["valid"]:
-        # send command message to the vehicle
-        vehicle.mav.command_int_send(target_system=vehicle.target_system,
-                                     target_component=vehicle.target_component,
-                                     frame=request["frame"],
-                                     command=request["command"],
-                                     current=request["current"],
-                                     autocontinue=request["autocontinue"],
-                                     param1=request["param1"],
-                                     param2=request["param2"],
-                                     param3=request["param3"],
-                                     param4=request["param4"],
-                                     x=request["x"],
-                                     y=request["y"],
-                                     z=request["z"])
+    # wait until the parameter is updated
+    changed = wait_change(kind="parameter", name=parameter_name, timeout=timeout,
+                          condition=lambda: parameter_version.get(parameter_name, 0) > since)
 
-        # message sent to vehicle
-        response["sent"] = True
+    # create the response
+    result = {"changed": changed,
+              "version": parameter_version.get(parameter_name, 0),
+              "data": {parameter_name: parameter_data[parameter_name]}
+              if parameter_name in parameter_data.keys() else {}}
 
     # expose the response
-    return flask.jsonify(response)
+    return flask.jsonify(result)
 
 
-# post parameter set message to vehicle
-@application.route(rule="/post/param_set", methods=["POST"])
-def post_param_set():
+# wait until flight plan is changed past a version and completely downloaded from vehicle
+@application.route(rule="/wait/plan/all", methods=["GET"])
+def wait_plan_all():
     # get global variables
-    global message_white_list, message_black_list
-    global vehicle, vehicle_connected
-    global schema_param_set
+    global plan_data, section_version, download_data
 
-    # get the request
-    request = flask.request.json
+    # get the version to wait for and the timeout
+    since, timeout = wait_arguments(version=section_version["plan"])
 
-    # adjust message white and black lists
-    messages = {MessageName.PARAM_VALUE.value}
-    for message in messages:
-        message_white_list.add(message)
-        message_black_list.discard(message)
+    # wait until the flight plan is changed and downloaded
+    changed = wait_change(kind="plan", name=None, timeout=timeout,
+                          condition=lambda: section_version["plan"] > since and
+                          "plan" in download_data and not download_data["plan"]["missing"])
 
-    # create response and add vehicle presence to response
-    response = {"command": "POST_PARAM", "connected": vehicle_connected, "valid": False, "sent": False}
+    # create the response
+    result = {"changed": changed, "version": section_version["plan"], "data": plan_data}
 
-    # try to validate the request
-    try:
+    # expose the response
+    return flask.jsonify(result)
 
-        # validate the request
-        jsonschema.validate(instance=request, schema=schema_param_set)
 
-        # validation is successful
-        response["valid"] = True
+# get stored samples of a message history
+@application.route(rule="/get/history/<string:message_name>", methods=["GET"])
+@conditional_response(tag=lambda message_name: history_tag(message_name=message_name))
+def get_history(message_name):
+    # get global variables
+    global history_data
 
-    # instance is invalid
-    except jsonschema.exceptions.ValidationError:
-        pass
+    # history of this message is not recorded
+    if message_name not in history_data.keys():
+        return flask.jsonify({})
 
-    # check vehicle connection and message validation
-    if response["connected"] and response["valid"]:
-        # send parameter set message to the vehicle
-        vehicle.mav.param_set_send(target_system=vehicle.target_system,
-                                   target_component=vehicle.target_component,
-                                   param_id=bytes(request["param_id"].encode("utf8")),
-                                   param_value=request["param_value"],
-                                   param_type=request["param_type"])
+    # get the requested time range and fields, all fields are exposed by default
+    time_from = flask.request.args.get("from", default=None, type=float)
+    time_to = flask.request.args.get("to", default=None, type=float)
+    fields = flask.request.args.get("fields", default="", type=str).replace(" ", "")
+    fields = fields.split(",") if fields != "" else list(history_data[message_name]["columns"].keys())
 
-        # message sent to vehicle
-        response["sent"] = True
+    # get the columns of the samples in the time range
+    columns = history_columns(message_name=message_name, fields=fields, time_from=time_from, time_to=time_to)
+
+    # expose the columns
+    return flask.jsonify({message_name: {name: column.tolist() for name, column in columns.items()}})
+
+
+# get minimum, maximum, mean, last value and sample count of a message history field in time buckets
+@application.route(rule="/get/aggregate/<string:message_name>/<string:field_name>", methods=["GET"])
+@conditional_response(tag=lambda message_name, field_name: history_tag(message_name=message_name,
+                                                                      field_name=field_name))
+def get_aggregate(message_name, field_name):
+    # get global variables
+    global history_data
+
+    # history of this message field is not recorded
+    if message_name not in history_data.keys() or field_name not in history_data[message_name]["columns"].keys():
+        return flask.jsonify({})
+
+    # get the bucket width and the requested time range
+    width = flask.request.args.get("bucket", default=AggregateEnum.BUCKET.value, type=float)
+    time_from = flask.request.args.get("from", default=None, type=float)
+    time_to = flask.request.args.get("to", default=None, type=float)
+
+    # bucket width must be positive
+    if width is None or not width > 0:
+        return flask.jsonify({})
+
+    # get the buckets of the message field
+    buckets = aggregate_history(message_name=message_name, field_name=field_name, width=width)
+
+    # select the buckets overlapping the time range
+    selected = numpy.ones(shape=len(buckets["index"]), dtype=bool)
+    if time_from is not None:
+        selected &= (buckets["index"] + 1) * width > time_from
+    if time_to is not None:
+        selected &= buckets["index"] * width <= time_to
+
+    # create response with start time and statistics of each bucket
+    result = {"time": (buckets["index"][selected] * width).tolist(),
+              "min": buckets["min"][selected].tolist(),
+              "max": buckets["max"][selected].tolist(),
+              "mean": (buckets["sum"][selected] / buckets["count"][selected]).tolist(),
+              "last": buckets["last"][selected].tolist(),
+              "count": buckets["count"][selected].tolist()}
 
     # expose the response
-    return flask.jsonify(response)
+    return flask.jsonify({message_name: {field_name: result}})
 
 
-# post plan to vehicle
-@application.route(rule="/post/plan", methods=["POST"])
-def post_plan():
+# get a message history field downsampled to a number of points that keeps the visual shape
+@application.route(rule="/get/downsample/<string:message_name>/<string:field_name>", methods=["GET"])
+@conditional_response(tag=lambda message_name, field_name: history_tag(message_name=message_name,
+                                                                      field_name=field_name))
+def get_downsample(message_name, field_name):
     # get global variables
-    global message_white_list, message_black_list
-    global vehicle, vehicle_connected
-    global send_plan_data, schema_plan
+    global history_data, downsample_cache
 
-    # get the request
-    request = flask.request.json
+    # history of this message field is not recorded
+    if message_name not in history_data.keys() or field_name not in history_data[message_name]["columns"].keys():
+        return flask.jsonify({})
 
-    # adjust message white and black lists
-    messages = {MessageName.MISSION_COUNT.value, MessageName.MISSION_ITEM_INT.value, MessageName.MISSION_ACK.value,
-                MessageName.MISSION_REQUEST.value}
-    for message in messages:
-        message_white_list.add(message)
-        message_black_list.discard(message)
+    # get the number of points and the requested time range
+    points = flask.request.args.get("points", default=AggregateEnum.POINTS.value, type=int)
 
-    # create response and add vehicle presence to response
-    response = {"command": "POST_PLAN", "connected": vehicle_connected, "valid": False, "sent": False}
+    # downsampling keeps the first and the last sample and at least a sample between them
+    points = max(points if points is not None else AggregateEnum.POINTS.value, AggregateEnum.POINTS_MIN.value)
+    time_from = flask.request.args.get("from", default=None, type=float)
+    time_to = flask.request.args.get("to", default=None, type=float)
 
-    # try to validate the request
+    # get the cached downsampling of this request
+    key = (message_name, field_name, points, time_from, time_to)
+    count, result = downsample_cache.get(key, (None, None))
+
+    # history has new samples since it was downsampled
+    if count != history_data[message_name]["count"]:
+
+        # get the samples in the time range
+        columns = history_columns(message_name=message_name, fields=[field_name],
+                                  time_from=time_from, time_to=time_to)
+
+        # downsample the samples
+        times, values = downsample_history(times=columns["time"],
+                                           values=columns[field_name].astype(numpy.float64),
+                                           points=points)
+
+        # create response
+        result = {"time": times.tolist(), field_name: values.tolist()}
+
+        # limit the cache size
+        if len(downsample_cache) >= AggregateEnum.CACHE.value:
+            downsample_cache.clear()
+
+        # cache the downsampling
+        downsample_cache[key] = (history_data[message_name]["count"], result)
+
+    # expose the response
+    return flask.jsonify({message_name: result})
+
+
+# get memory usage of message histories
+@application.route(rule="/get/history", methods=["GET"])
+def get_history_memory():
+    # get global variables
+    global history_data, history_messages, history_capacity
+
+    # create response
+    result = {"capacity": history_capacity, "messages": sorted(history_messages), "bytes": 0, "history": {}}
+
+    # for each recorded message history
+    for message_name, history in history_data.items():
+
+        # get memory used by time and field columns
+        size = history["time"].nbytes + sum(column.nbytes for column in history["columns"].values())
+
+        # expose the state of the message history
+        result["history"][message_name] = {"count": min(history["count"], history_capacity),
+                                           "total": history["count"],
+                                           "fields": list(history["columns"].keys()),
+                                           "bytes": size}
+        result["bytes"] += size
+
+    # expose the response
+    return flask.jsonify(result)
+
+
+# get subscribers of message updates
+@application.route(rule="/get/subscriber", methods=["GET"])
+def get_subscriber():
+    # get global variables
+    global subscriber_data
+
+    # create empty response
+    result = {}
+
+    # for each subscriber
+    for subscriber_id, subscriber in subscriber_data.items():
+        # expose the state of the subscriber
+        result[subscriber_id] = {"kind": subscriber["kind"],
+                                 "all": subscriber["all"],
+                                 "names": sorted(subscriber["names"]),
+                                 "ids": sorted(subscriber["ids"]),
+                                 "fields": {str(message): sorted(fields)
+                                            for message, fields in subscriber["fields"].items()},
+                                 "rate": subscriber["rate"],
+                                 "limit": subscriber["limit"],
+                                 "queue": len(subscriber["queue"]),
+                                 "queue_max": subscriber["queue_max"],
+                                 "pending": len(subscriber["pending"]),
+                                 "sent": subscriber["sent"],
+                                 "coalesced": subscriber["coalesced"],
+                                 "dropped": subscriber["dropped"],
+                                 "closed": subscriber["closed"]}
+
+    # expose the response
+    return flask.jsonify(result)
+
+
+# stream message updates as server-sent events
+@application.route(rule="/stream/message", methods=["GET"])
+def stream_message():
+    # get global variables
+    global subscriber_queue
+
+    # get comma separated message and field selectors to subscribe, empty means all messages
+    selectors = [x for x in flask.request.args.get("name", "").replace(" ", "").split(",") if x != ""]
+
+    # get maximum update rate per message, zero means every update
+    rate = flask.request.args.get("rate", default=0.0, type=float)
+
+    # get queue limit of the client that can not be larger than the server limit
+    limit = min(flask.request.args.get("queue", default=subscriber_queue, type=int), subscriber_queue)
+
+    # create the subscriber
+    subscriber = add_subscriber(kind="sse", limit=max(limit, 1))
+
+    # try to subscribe to the selected messages
     try:
 
-        # validate the request
-        jsonschema.validate(instance=request, schema=schema_plan)
+        # subscribe to the selected messages
+        subscribe_messages(subscriber=subscriber, selectors=selectors if selectors else None, rate=rate)
 
-        # validation is successful
-        response["valid"] = True
+    # selectors are invalid
+    except ValueError as e:
 
-    # instance is invalid
-    except jsonschema.exceptions.ValidationError:
-        pass
+        # remove the subscriber
+        remove_subscriber(subscriber=subscriber)
 
-    # check message validation
-    if response["valid"]:
+        # expose the error
+        return flask.jsonify({"valid": False, "error": str(e)}), 400
 
-        # calculate plan length and valid indexes
-        plan_length = len(request)
-        valid_indexes = [i for i in range(plan_length)]
+    # expose the response
+    return application.response_class(response=stream_subscriber(subscriber=subscriber),
+                                      mimetype="text/event-stream",
+                                      headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
-        # get indexes inside the request
-        requested_indexes = [mission_item["seq"] for mission_item in request]
 
-        # check indexes and set validation
-        for valid_index in valid_indexes:
-            if valid_index not in requested_indexes:
-                response["valid"] = False
-                break
+# receive commands and stream message updates over a websocket
+@application.route(rule="/stream/websocket", methods=["GET"], websocket=True)
+def stream_websocket():
+    # get global variables
+    global subscriber_queue
 
-    # check message validation
-    if response["valid"]:
+    # get the websocket of the request
+    websocket = flask.request.environ["wsgi.websocket"]
 
-        # check below field values are consistent between plan items
-        for field in ["target_system", "target_component"]:
-            field_values = [item[field] for item in request]
-            if len(set(field_values)) != 1:
-                response["valid"] = False
+    # create the subscriber and its writer
+    subscriber = add_subscriber(kind="websocket", limit=subscriber_queue)
+    lock = gevent.lock.Semaphore()
+    writer = gevent.spawn(write_websocket, subscriber, websocket, lock)
+
+    # try to receive frames from client
+    try:
+
+        # receive until client is disconnected
+        while not subscriber["closed"]:
+
+            # receive a frame
+            frame = websocket.receive()
+
+            # client is disconnected
+            if frame is None:
                 break
 
-    # check vehicle connection and message validation
-    if response["connected"] and response["valid"]:
-        # set outgoing plan data
-        send_plan_data = request
+            # answer the frame
+            response = answer_websocket(subscriber=subscriber, frame=frame)
 
-        # send mission clear all message
-        vehicle.mav.mission_clear_all_send(target_system=vehicle.target_system,
-                                           target_component=vehicle.target_component,
-                                           mission_type=MessageEnum.MAV_MISSION_TYPE_MISSION.value)
+            # send the response to client
+            send_websocket(websocket=websocket, lock=lock, frame=application.json.dumps(response, separators=(",", ":")))
 
-        # send mission write partial list message
-        vehicle.mav.mission_count_send(target_system=vehicle.target_system,
-                                       target_component=vehicle.target_component,
-                                       count=len(request),
-                                       mission_type=MessageEnum.MAV_MISSION_TYPE_MISSION.value)
+    # client is disconnected
+    except Exception as e:
+        pass
 
-        # message sent to vehicle
-        response["sent"] = True
+    # stop sending to client
+    finally:
+
+        # remove the subscriber and stop its writer
+        remove_subscriber(subscriber=subscriber)
+        writer.kill()
+
+    # expose an empty response since the connection is already upgraded
+    return flask.Response()
+
+
+# answer a frame received from a websocket client
+def answer_websocket(subscriber, frame):
+    # create response
+    response = {"type": "error", "id": None}
+
+    # try to parse the frame
+    try:
+
+        # parse the frame
+        request = json.loads(frame)
+
+        # get request id to be sent back with the response
+        response["id"] = request.get("id")
+
+        # client wants to change its subscription
+        if request.get("type") == "subscribe":
+            subscribe_messages(subscriber=subscriber,
+                               selectors=request.get("selectors"),
+                               rate=float(request.get("rate", 0.0)))
+            response["type"] = "subscribed"
+
+        # client wants to stop message updates
+        elif request.get("type") == "unsubscribe":
+            subscribe_messages(subscriber=subscriber, selectors=[], rate=0.0)
+            response["type"] = "unsubscribed"
+
+        # client wants to send a command through a post endpoint
+        elif request.get("type") == "post" and str(request.get("endpoint")).startswith(("/post/", "/set/")):
+
+            # handle the command with the same route and validation as the http request
+            with application.test_request_context(path=request["endpoint"], method="POST",
+                                                  json=request.get("request", {})):
+                result = application.full_dispatch_request()
+
+            # expose the response of the route
+            response["type"] = "response"
+            response["endpoint"] = request["endpoint"]
+            response["response"] = result.get_json(silent=True)
+
+    # frame is invalid
+    except Exception as e:
+        response["error"] = str(e)
 
     # expose the response
-    return flask.jsonify(response)
+    return response
 
 
-# post rally point list to vehicle
-@application.route(rule="/post/rally", methods=["POST"])
-def post_rally():
+# get download progress of parameter, flight plan, fence and rally lists
+@application.route(rule="/get/download", methods=["GET"])
+def get_download():
+    # get download data
+    global download_data
+
+    # get timestamp
+    time_monotonic = time.monotonic()
+
+    # create empty response
+    result = {}
+
+    # for each list being downloaded
+    for name, download in download_data.items():
+
+        # calculate progress of the list
+        total = download["total"]
+        received = total - len(download["missing"])
+        duration = (download["last_monotonic"] if received == total else time_monotonic) - download["first_monotonic"]
+        rate = received / duration if duration != 0.0 else 0.0
+        eta = (total - received) / rate if rate != 0.0 else None
+
+        # expose progress of the list
+        result[name] = {"total": total,
+                        "received": received,
+                        "inflight": len(download["inflight"]),
+                        "requests": download["requests"],
+                        "retries": download["retries"],
+                        "progress": received / total if total != 0 else 1.0,
+                        "complete": received == total,
+                        "duration": duration,
+                        "rate": rate,
+                        "eta": 0.0 if received == total else eta}
+
+    # expose the response
+    return flask.jsonify(result)
+
+
+# post command long message to vehicle
+@application.route(rule="/post/command_long", methods=["POST"])
+def post_command_long():
     # get global variables
     global message_white_list, message_black_list
     global vehicle, vehicle_connected
-    global send_rally_data, schema_rally
+    global schema_command_long
 
     # get the request
     request = flask.request.json
 
     # adjust message white and black lists
-    messages = {MessageName.RALLY_POINT.value, MessageName.PARAM_VALUE.value}
+    messages = {MessageName.COMMAND_ACK.value}
     for message in messages:
         message_white_list.add(message)
         message_black_list.discard(message)
 
-    # adjust parameter white and black lists
-    parameters = {ParameterName.RALLY_TOTAL.value}
-    for parameter in parameters:
-        parameter_white_list.add(parameter)
-        parameter_black_list.discard(parameter)
-
     # create response and add vehicle presence to response
-    response = {"command": "POST_RALLY", "connected": vehicle_connected, "valid": False, "sent": False}
+    response = {"command": "POST_LONG", "connected": vehicle_connected, "valid": False, "sent": False}
 
     # try to validate the request
     try:
 
         # validate the request
-        jsonschema.validate(instance=request, schema=schema_rally)
+        jsonschema.validate(instance=request, schema=schema_command_long)
 
         # validation is successful
         response["valid"] = True
@@ -923,74 +1711,20 @@ def post_rally():
     except jsonschema.exceptions.ValidationError:
         pass
 
-    # check message validation
-    if response["valid"]:
-
-        # calculate rally length and valid indexes
-        rally_length = len(request)
-        valid_indexes = [i for i in range(rally_length)]
-
-        # get indexes inside the request
-        requested_indexes = [rally_item["idx"] for rally_item in request]
-
-        # check indexes and set validation
-        for valid_index in valid_indexes:
-            if valid_index not in requested_indexes:
-                response["valid"] = False
-                break
-
-    # check message validation
-    if response["valid"]:
-
-        # check below field values are consistent between rally items
-        for field in ["target_system", "target_component", "count"]:
-            field_values = [item[field] for item in request]
-            if len(set(field_values)) != 1:
-                response["valid"] = False
-                break
-
-    # check message validation
-    if response["valid"]:
-
-        # check count is valid
-        rally_length = len(request)
-        for rally_item in request:
-            if rally_item["count"] != rally_length:
-                response["valid"] = False
-                break
-
     # check vehicle connection and message validation
     if response["connected"] and response["valid"]:
-        # set outgoing rally data
-        send_rally_data = request
-
-        # send clear rally item count to the vehicle
-        vehicle.mav.param_set_send(target_system=vehicle.target_system,
-                                   target_component=vehicle.target_component,
-                                   param_id=bytes(ParameterName.RALLY_TOTAL.value.encode("utf8")),
-                                   param_value=0,
-                                   param_type=MessageEnum.MAV_PARAM_TYPE_REAL32.value)
-
-        # send rally item count to the vehicle
-        vehicle.mav.param_set_send(target_system=vehicle.target_system,
-                                   target_component=vehicle.target_component,
-                                   param_id=bytes(ParameterName.RALLY_TOTAL.encode("utf8")),
-                                   param_value=len(send_rally_data),
-                                   param_type=MessageEnum.MAV_PARAM_TYPE_REAL32.value)
-
-        # for each rally point item
-        for rally_item in send_rally_data:
-            # send RALLY_POINT message to the vehicle
-            vehicle.mav.rally_point_send(target_system=vehicle.target_system,
-                                         target_component=vehicle.target_component,
-                                         idx=rally_item["idx"],
-                                         count=rally_item["count"],
-                                         lat=rally_item["lat"],
-                                         lng=rally_item["lng"],
-                                         alt=rally_item["alt"],
-                                         break_alt=rally_item["break_alt"],
-                                         land_dir=rally_item["land_dir"],
-                                         flags=rally_item["flags"])
+        # send command message to the vehicle
+        vehicle.mav.command_long_send(target_system=vehicle.target_system,
+                                      target_component=vehicle.target_component,
+                                      command=request["command"],
+                                      confirmation=request["confirmation"],
+                                      param1=request["param1"],
+                                      param2=request["param2"],
+                                      param3=request["param3"],
+                                      param4=request["param4"],
+                                      param5=request["param5"],
+                                      param6=request["param6"],
+                                      param7=request["param7"])
 
         # message sent to vehicle
         response["sent"] = True
@@ -999,47 +1733,31 @@ def post_rally():
     return flask.jsonify(response)
 
 
-# post fence point list to vehicle
-@application.route(rule="/post/fence", methods=["POST"])
-def post_fence():
+# post command int message to vehicle
+@application.route(rule="/post/command_int", methods=["POST"])
+def post_command_int():
     # get global variables
     global message_white_list, message_black_list
-    global parameter_white_list, parameter_black_list
     global vehicle, vehicle_connected
-    global send_fence_data, schema_fence
-    global parameter_data
+    global schema_command_int
 
     # get the request
     request = flask.request.json
 
     # adjust message white and black lists
-    messages = {MessageName.FENCE_POINT.value, MessageName.PARAM_VALUE.value}
+    messages = {MessageName.COMMAND_ACK.value}
     for message in messages:
         message_white_list.add(message)
         message_black_list.discard(message)
 
-    # adjust parameter white and black lists
-    parameters = {ParameterName.FENCE_ACTION.value,
-                  ParameterName.FENCE_TOTAL.value}
-    for parameter in parameters:
-        parameter_white_list.add(parameter)
-        parameter_black_list.discard(parameter)
-
-    # request fence action parameter if not exits
-    if ParameterName.FENCE_ACTION.value not in parameter_data.keys():
-        vehicle.mav.param_request_read_send(target_system=vehicle.target_system,
-                                            target_component=vehicle.target_component,
-                                            param_id=bytes(ParameterName.FENCE_ACTION.value.encode("utf8")),
-                                            param_index=0)
-
     # create response and add vehicle presence to response
-    response = {"command": "POST_FENCE", "connected": vehicle_connected, "valid": False, "sent": False}
+    response = {"command": "POST_INT", "connected": vehicle_connected, "valid": False, "sent": False}
 
     # try to validate the request
     try:
 
         # validate the request
-        jsonschema.validate(instance=request, schema=schema_fence)
+        jsonschema.validate(instance=request, schema=schema_command_int)
 
         # validation is successful
         response["valid"] = True
@@ -1048,97 +1766,71 @@ def post_fence():
     except jsonschema.exceptions.ValidationError:
         pass
 
-    # check message validation
-    if response["valid"]:
-
-        # calculate fence length and valid indexes
-        fence_length = len(request)
-        valid_indexes = [i for i in range(fence_length)]
-
-        # get indexes inside the request
-        requested_indexes = [fence_item["idx"] for fence_item in request]
-
-        # check indexes and set validation
-        for valid_index in valid_indexes:
-            if valid_index not in requested_indexes:
-                response["valid"] = False
-                break
-
-    # check message validation
-    if response["valid"]:
-
-        # check below field values are consistent between fence items
-        for field in ["target_system", "target_component", "count"]:
-            field_values = [item[field] for item in request]
-            if len(set(field_values)) != 1:
-                response["valid"] = False
-                break
+    # check vehicle connection and message validation
+    if response["connected"] and response["valid"]:
+        # send command message to the vehicle
+        vehicle.mav.command_int_send(target_system=vehicle.target_system,
+                                     target_component=vehicle.target_component,
+                                     frame=request["frame"],
+                                     command=request["command"],
+                                     current=request["current"],
+                                     autocontinue=request["autocontinue"],
+                                     param1=request["param1"],
+                                     param2=request["param2"],
+                                     param3=request["param3"],
+                                     param4=request["param4"],
+                                     x=request["x"],
+                                     y=request["y"],
+                                     z=request["z"])
 
-    # check message validation
-    if response["valid"]:
+        # message sent to vehicle
+        response["sent"] = True
 
-        # check count is valid
-        fence_length = len(request)
-        for fence_item in request:
-            if fence_item["count"] != fence_length:
-                response["valid"] = False
-                break
+    # expose the response
+    return flask.jsonify(response)
 
-    # check message validation
-    if response["valid"]:
 
-        # check fence is a polygon
-        if (request[1]["lat"], request[1]["lng"]) != (request[-1]["lat"], request[-1]["lng"]):
-            response["valid"] = False
+# post parameter set message to vehicle
+@application.route(rule="/post/param_set", methods=["POST"])
+def post_param_set():
+    # get global variables
+    global message_white_list, message_black_list
+    global vehicle, vehicle_connected
+    global schema_param_set
 
-    # check fence action parameter exits
-    response["connected"] = ParameterName.FENCE_ACTION.value in parameter_data.keys()
+    # get the request
+    request = flask.request.json
 
-    # check vehicle connection and message validation
-    if response["connected"] and response["valid"]:
-        # set outgoing fence data
-        send_fence_data = request
+    # adjust message white and black lists
+    messages = {MessageName.PARAM_VALUE.value}
+    for message in messages:
+        message_white_list.add(message)
+        message_black_list.discard(message)
 
-        # get fence action
-        fence_action = parameter_data[ParameterName.FENCE_ACTION.value]
+    # create response and add vehicle presence to response
+    response = {"command": "POST_PARAM", "connected": vehicle_connected, "valid": False, "sent": False}
 
-        # disable fence action
-        vehicle.mav.param_set_send(target_system=vehicle.target_system,
-                                   target_component=vehicle.target_component,
-                                   param_id=bytes(ParameterName.FENCE_ACTION.value.encode("utf8")),
-                                   param_value=MessageEnum.FENCE_ACTION_NONE.value,
-                                   param_type=MessageEnum.MAV_PARAM_TYPE_REAL32.value)
+    # try to validate the request
+    try:
 
-        # send clear fence item count to the vehicle
-        vehicle.mav.param_set_send(target_system=vehicle.target_system,
-                                   target_component=vehicle.target_component,
-                                   param_id=bytes(ParameterName.FENCE_TOTAL.value.encode("utf8")),
-                                   param_value=0,
-                                   param_type=MessageEnum.MAV_PARAM_TYPE_REAL32.value)
+        # validate the request
+        jsonschema.validate(instance=request, schema=schema_param_set)
 
-        # send fence item count to the vehicle
-        vehicle.mav.param_set_send(target_system=vehicle.target_system,
-                                   target_component=vehicle.target_component,
-                                   param_id=bytes(ParameterName.FENCE_TOTAL.value.encode("utf8")),
-                                   param_value=len(send_fence_data),
-                                   param_type=MessageEnum.MAV_PARAM_TYPE_REAL32.value)
+        # validation is successful
+        response["valid"] = True
 
-        # for each fence point item
-        for fence_item in send_fence_data:
-            # send FENCE_POINT message to the vehicle
-            vehicle.mav.fence_point_send(target_system=vehicle.target_system,
-                                         target_component=vehicle.target_component,
-                                         idx=fence_item["idx"],
-                                         count=fence_item["count"],
-                                         lat=fence_item["lat"],
-                                         lng=fence_item["lng"])
+    # instance is invalid
+    except jsonschema.exceptions.ValidationError:
+        pass
 
-        # enable fence action
+    # check vehicle connection and message validation
+    if response["connected"] and response["valid"]:
+        # send parameter set message to the vehicle
         vehicle.mav.param_set_send(target_system=vehicle.target_system,
                                    target_component=vehicle.target_component,
-                                   param_id=bytes(ParameterName.FENCE_ACTION.value.encode("utf8")),
-                                   param_value=fence_action,
-                                   param_type=MessageEnum.MAV_PARAM_TYPE_REAL32.value)
+                                   param_id=bytes(request["param_id"].encode("utf8")),
+                                   param_value=request["param_value"],
+                                   param_type=request["param_type"])
 
         # message sent to vehicle
         response["sent"] = True
@@ -1147,24 +1839,32 @@ def post_fence():
     return flask.jsonify(response)
 
 
-# post key value pair to api
-@application.route(rule="/post/custom", methods=["POST"])
-def post_key_value_pair():
+# post plan to vehicle
+@application.route(rule="/post/plan", methods=["POST"])
+def post_plan():
     # get global variables
-    global custom_data, custom_cache
-    global schema_key_value
+    global message_white_list, message_black_list
+    global vehicle, vehicle_connected
+    global send_plan_data, schema_plan
 
     # get the request
     request = flask.request.json
 
-    # create response
-    response = {"command": "POST_CUSTOM", "valid": False, "sent": False}
+    # adjust message white and black lists
+    messages = {MessageName.MISSION_COUNT.value, MessageName.MISSION_ITEM_INT.value, MessageName.MISSION_ACK.value,
+                MessageName.MISSION_REQUEST.value}
+    for message in messages:
+        message_white_list.add(message)
+        message_black_list.discard(message)
+
+    # create response and add vehicle presence to response
+    response = {"command": "POST_PLAN", "connected": vehicle_connected, "valid": False, "sent": False}
 
     # try to validate the request
     try:
 
         # validate the request
-        jsonschema.validate(instance=request, schema=schema_key_value)
+        jsonschema.validate(instance=request, schema=schema_plan)
 
         # validation is successful
         response["valid"] = True
@@ -1173,74 +1873,86 @@ def post_key_value_pair():
     except jsonschema.exceptions.ValidationError:
         pass
 
-    # check key is not equal to string all
-    if response["valid"]:
-        if request["key"] == "all":
-            response["valid"] = False
-
     # check message validation
     if response["valid"]:
-        # create or update key value pair
-        custom_data[request["key"]] = request["value"]
 
-        # message sent to api
-        response["sent"] = True
-
-    # expose the response
-    return flask.jsonify(response)
+        # calculate plan length and valid indexes
+        plan_length = len(request)
+        valid_indexes = [i for i in range(plan_length)]
 
+        # get indexes inside the request
+        requested_indexes = [mission_item["seq"] for mission_item in request]
 
-# post dictionary to api
-@application.route(rule="/post/custom/all", methods=["POST"])
-def post_custom_all():
-    # get global variables
-    global custom_data, custom_cache
+        # check indexes and set validation
+        for valid_index in valid_indexes:
+            if valid_index not in requested_indexes:
+                response["valid"] = False
+                break
 
-    # get the request
-    request = flask.request.json
+    # check message validation
+    if response["valid"]:
 
-    # create response
-    response = {"command": "POST_CUSTOM_ALL", "valid": False, "sent": False}
+        # check below field values are consistent between plan items
+        for field in ["target_system", "target_component"]:
+            field_values = [item[field] for item in request]
+            if len(set(field_values)) != 1:
+                response["valid"] = False
+                break
 
-    # try to validate the request
-    if isinstance(request, dict):
-        # validation is successful
-        response["valid"] = True
+    # check vehicle connection and message validation
+    if response["connected"] and response["valid"]:
+        # set outgoing plan data
+        send_plan_data = request
 
-    # check key is not equal to string all
-    if response["valid"]:
-        if "all" in request.keys():
-            response["valid"] = False
+        # send mission clear all message
+        vehicle.mav.mission_clear_all_send(target_system=vehicle.target_system,
+                                           target_component=vehicle.target_component,
+                                           mission_type=MessageEnum.MAV_MISSION_TYPE_MISSION.value)
 
-    # check message validation
-    if response["valid"]:
-        # update custom data
-        custom_data = {**custom_data, **request}
+        # send mission write partial list message
+        vehicle.mav.mission_count_send(target_system=vehicle.target_system,
+                                       target_component=vehicle.target_component,
+                                       count=len(request),
+                                       mission_type=MessageEnum.MAV_MISSION_TYPE_MISSION.value)
 
-        # message sent to api
+        # message sent to vehicle
         response["sent"] = True
 
     # expose the response
     return flask.jsonify(response)
 
 
-# send a message to vehicle
-@application.route(rule="/post/message", methods=["POST"])
-def post_message():
+# post rally point list to vehicle
+@application.route(rule="/post/rally", methods=["POST"])
+def post_rally():
     # get global variables
-    global schema_message, vehicle
+    global message_white_list, message_black_list
+    global vehicle, vehicle_connected
+    global send_rally_data, schema_rally
 
     # get the request
     request = flask.request.json
 
-    # create response
-    response = {"command": "POST_MESSAGE", "valid": False, "sent": False}
+    # adjust message white and black lists
+    messages = {MessageName.RALLY_POINT.value, MessageName.PARAM_VALUE.value}
+    for message in messages:
+        message_white_list.add(message)
+        message_black_list.discard(message)
+
+    # adjust parameter white and black lists
+    parameters = {ParameterName.RALLY_TOTAL.value}
+    for parameter in parameters:
+        parameter_white_list.add(parameter)
+        parameter_black_list.discard(parameter)
+
+    # create response and add vehicle presence to response
+    response = {"command": "POST_RALLY", "connected": vehicle_connected, "valid": False, "sent": False}
 
     # try to validate the request
     try:
 
         # validate the request
-        jsonschema.validate(instance=request, schema=schema_message)
+        jsonschema.validate(instance=request, schema=schema_rally)
 
         # validation is successful
         response["valid"] = True
@@ -1252,212 +1964,2768 @@ def post_message():
     # check message validation
     if response["valid"]:
 
-        # try to get the message method from the vehicle
-        try:
+        # calculate rally length and valid indexes
+        rally_length = len(request)
+        valid_indexes = [i for i in range(rally_length)]
 
-            # get the message method from the vehicle
-            method = getattr(vehicle.mav, f'{request["message_name"].lower()}_send')
+        # get indexes inside the request
+        requested_indexes = [rally_item["idx"] for rally_item in request]
 
-            # use the message method to send the message to the vehicle
-            method(*request["message_content"])
+        # check indexes and set validation
+        for valid_index in valid_indexes:
+            if valid_index not in requested_indexes:
+                response["valid"] = False
+                break
 
-            # message sent to vehicle
-            response["sent"] = True
+    # check message validation
+    if response["valid"]:
 
-        # message method does not exist
-        except Exception as e:
+        # check below field values are consistent between rally items
+        for field in ["target_system", "target_component", "count"]:
+            field_values = [item[field] for item in request]
+            if len(set(field_values)) != 1:
+                response["valid"] = False
+                break
 
-            # unset message validation
+    # check message validation
+    if response["valid"]:
+
+        # check count is valid
+        rally_length = len(request)
+        for rally_item in request:
+            if rally_item["count"] != rally_length:
+                response["valid"] = False
+                break
+
+    # check vehicle connection and message validation
+    if response["connected"] and response["valid"]:
+        # set outgoing rally data
+        send_rally_data = request
+
+        # send clear rally item count to the vehicle
+        vehicle.mav.param_set_send(target_system=vehicle.target_system,
+                                   target_component=vehicle.target_component,
+                                   param_id=bytes(ParameterName.RALLY_TOTAL.value.encode("utf8")),
+                                   param_value=0,
+                                   param_type=MessageEnum.MAV_PARAM_TYPE_REAL32.value)
+
+        # send rally item count to the vehicle
+        vehicle.mav.param_set_send(target_system=vehicle.target_system,
+                                   target_component=vehicle.target_component,
+                                   param_id=bytes(ParameterName.RALLY_TOTAL.value.encode("utf8")),
+                                   param_value=len(send_rally_data),
+                                   param_type=MessageEnum.MAV_PARAM_TYPE_REAL32.value)
+
+        # for each rally point item
+        for rally_item in send_rally_data:
+            # send RALLY_POINT message to the vehicle
+            vehicle.mav.rally_point_send(target_system=vehicle.target_system,
+                                         target_component=vehicle.target_component,
+                                         idx=rally_item["idx"],
+                                         count=rally_item["count"],
+                                         lat=rally_item["lat"],
+                                         lng=rally_item["lng"],
+                                         alt=rally_item["alt"],
+                                         break_alt=rally_item["break_alt"],
+                                         land_dir=rally_item["land_dir"],
+                                         flags=rally_item["flags"])
+
+        # message sent to vehicle
+        response["sent"] = True
+
+    # expose the response
+    return flask.jsonify(response)
+
+
+# post fence point list to vehicle
+@application.route(rule="/post/fence", methods=["POST"])
+def post_fence():
+    # get global variables
+    global message_white_list, message_black_list
+    global parameter_white_list, parameter_black_list
+    global vehicle, vehicle_connected
+    global send_fence_data, schema_fence
+    global parameter_data
+
+    # get the request
+    request = flask.request.json
+
+    # adjust message white and black lists
+    messages = {MessageName.FENCE_POINT.value, MessageName.PARAM_VALUE.value}
+    for message in messages:
+        message_white_list.add(message)
+        message_black_list.discard(message)
+
+    # adjust parameter white and black lists
+    parameters = {ParameterName.FENCE_ACTION.value,
+                  ParameterName.FENCE_TOTAL.value}
+    for parameter in parameters:
+        parameter_white_list.add(parameter)
+        parameter_black_list.discard(parameter)
+
+    # request fence action parameter if not exits
+    if ParameterName.FENCE_ACTION.value not in parameter_data.keys():
+        vehicle.mav.param_request_read_send(target_system=vehicle.target_system,
+                                            target_component=vehicle.target_component,
+                                            param_id=bytes(ParameterName.FENCE_ACTION.value.encode("utf8")),
+                                            param_index=0)
+
+    # create response and add vehicle presence to response
+    response = {"command": "POST_FENCE", "connected": vehicle_connected, "valid": False, "sent": False}
+
+    # try to validate the request
+    try:
+
+        # validate the request
+        jsonschema.validate(instance=request, schema=schema_fence)
+
+        # validation is successful
+        response["valid"] = True
+
+    # instance is invalid
+    except jsonschema.exceptions.ValidationError:
+        pass
+
+    # check message validation
+    if response["valid"]:
+
+        # calculate fence length and valid indexes
+        fence_length = len(request)
+        valid_indexes = [i for i in range(fence_length)]
+
+        # get indexes inside the request
+        requested_indexes = [fence_item["idx"] for fence_item in request]
+
+        # check indexes and set validation
+        for valid_index in valid_indexes:
+            if valid_index not in requested_indexes:
+                response["valid"] = False
+                break
+
+    # check message validation
+    if response["valid"]:
+
+        # check below field values are consistent between fence items
+        for field in ["target_system", "target_component", "count"]:
+            field_values = [item[field] for item in request]
+            if len(set(field_values)) != 1:
+                response["valid"] = False
+                break
+
+    # check message validation
+    if response["valid"]:
+
+        # check count is valid
+        fence_length = len(request)
+        for fence_item in request:
+            if fence_item["count"] != fence_length:
+                response["valid"] = False
+                break
+
+    # check message validation
+    if response["valid"]:
+
+        # check fence is a polygon
+        if (request[1]["lat"], request[1]["lng"]) != (request[-1]["lat"], request[-1]["lng"]):
+            response["valid"] = False
+
+    # check fence action parameter exits
+    response["connected"] = ParameterName.FENCE_ACTION.value in parameter_data.keys()
+
+    # check vehicle connection and message validation
+    if response["connected"] and response["valid"]:
+        # set outgoing fence data
+        send_fence_data = request
+
+        # get fence action
+        fence_action = parameter_data[ParameterName.FENCE_ACTION.value]
+
+        # disable fence action
+        vehicle.mav.param_set_send(target_system=vehicle.target_system,
+                                   target_component=vehicle.target_component,
+                                   param_id=bytes(ParameterName.FENCE_ACTION.value.encode("utf8")),
+                                   param_value=MessageEnum.FENCE_ACTION_NONE.value,
+                                   param_type=MessageEnum.MAV_PARAM_TYPE_REAL32.value)
+
+        # send clear fence item count to the vehicle
+        vehicle.mav.param_set_send(target_system=vehicle.target_system,
+                                   target_component=vehicle.target_component,
+                                   param_id=bytes(ParameterName.FENCE_TOTAL.value.encode("utf8")),
+                                   param_value=0,
+                                   param_type=MessageEnum.MAV_PARAM_TYPE_REAL32.value)
+
+        # send fence item count to the vehicle
+        vehicle.mav.param_set_send(target_system=vehicle.target_system,
+                                   target_component=vehicle.target_component,
+                                   param_id=bytes(ParameterName.FENCE_TOTAL.value.encode("utf8")),
+                                   param_value=len(send_fence_data),
+                                   param_type=MessageEnum.MAV_PARAM_TYPE_REAL32.value)
+
+        # for each fence point item
+        for fence_item in send_fence_data:
+            # send FENCE_POINT message to the vehicle
+            vehicle.mav.fence_point_send(target_system=vehicle.target_system,
+                                         target_component=vehicle.target_component,
+                                         idx=fence_item["idx"],
+                                         count=fence_item["count"],
+                                         lat=fence_item["lat"],
+                                         lng=fence_item["lng"])
+
+        # enable fence action
+        vehicle.mav.param_set_send(target_system=vehicle.target_system,
+                                   target_component=vehicle.target_component,
+                                   param_id=bytes(ParameterName.FENCE_ACTION.value.encode("utf8")),
+                                   param_value=fence_action,
+                                   param_type=MessageEnum.MAV_PARAM_TYPE_REAL32.value)
+
+        # message sent to vehicle
+        response["sent"] = True
+
+    # expose the response
+    return flask.jsonify(response)
+
+
+# post key value pair to api
+@application.route(rule="/post/custom", methods=["POST"])
+def post_key_value_pair():
+    # get global variables
+    global custom_data, custom_cache, section_version
+    global schema_key_value
+
+    # get the request
+    request = flask.request.json
+
+    # create response
+    response = {"command": "POST_CUSTOM", "valid": False, "sent": False}
+
+    # try to validate the request
+    try:
+
+        # validate the request
+        jsonschema.validate(instance=request, schema=schema_key_value)
+
+        # validation is successful
+        response["valid"] = True
+
+    # instance is invalid
+    except jsonschema.exceptions.ValidationError:
+        pass
+
+    # check key is not equal to string all
+    if response["valid"]:
+        if request["key"] == "all":
             response["valid"] = False
 
+    # check message validation
+    if response["valid"]:
+        # create or update key value pair
+        custom_data[request["key"]] = request["value"]
+
+        # custom data is changed
+        section_version["custom"] += 1
+
+        # message sent to api
+        response["sent"] = True
+
     # expose the response
     return flask.jsonify(response)
 
 
-# post dictionary to api
-@application.route(rule="/set/<argument>", methods=["POST"])
-def set_argument(argument):
-    # get global variables
-    global vehicle, vehicle_connected
-    global message_white_list, message_black_list, message_data
-    global parameter_white_list, parameter_black_list, parameter_data
+# post dictionary to api
+@application.route(rule="/post/custom/all", methods=["POST"])
+def post_custom_all():
+    # get global variables
+    global custom_data, custom_cache, section_version
+
+    # get the request
+    request = flask.request.json
+
+    # create response
+    response = {"command": "POST_CUSTOM_ALL", "valid": False, "sent": False}
+
+    # try to validate the request
+    if isinstance(request, dict):
+        # validation is successful
+        response["valid"] = True
+
+    # check key is not equal to string all
+    if response["valid"]:
+        if "all" in request.keys():
+            response["valid"] = False
+
+    # check message validation
+    if response["valid"]:
+        # update custom data
+        custom_data = {**custom_data, **request}
+
+        # custom data is changed
+        section_version["custom"] += 1
+
+        # message sent to api
+        response["sent"] = True
+
+    # expose the response
+    return flask.jsonify(response)
+
+
+# send a message to vehicle
+@application.route(rule="/post/message", methods=["POST"])
+def post_message():
+    # get global variables
+    global schema_message, vehicle
+
+    # get the request
+    request = flask.request.json
+
+    # create response
+    response = {"command": "POST_MESSAGE", "valid": False, "sent": False}
+
+    # try to validate the request
+    try:
+
+        # validate the request
+        jsonschema.validate(instance=request, schema=schema_message)
+
+        # validation is successful
+        response["valid"] = True
+
+    # instance is invalid
+    except jsonschema.exceptions.ValidationError:
+        pass
+
+    # check message validation
+    if response["valid"]:
+
+        # try to get the message method from the vehicle
+        try:
+
+            # get the message method from the vehicle
+            method = getattr(vehicle.mav, f'{request["message_name"].lower()}_send')
+
+            # use the message method to send the message to the vehicle
+            method(*request["message_content"])
+
+            # message sent to vehicle
+            response["sent"] = True
+
+        # message method does not exist
+        except Exception as e:
+
+            # unset message validation
+            response["valid"] = False
+
+    # expose the response
+    return flask.jsonify(response)
+
+
+# remove messages that are not allowed by message white and black lists
+def apply_message_filter():
+    # get global variables
+    global message_white_list, message_black_list, message_data
+    global default_message_list_length, section_version, message_version
+
+    # check user defined a message white list
+    filter_white = len(message_white_list) > default_message_list_length
+
+    # remove filtered messages from message data
+    for message in list(message_data.keys()):
+        if message in message_black_list or (filter_white and message not in message_white_list):
+            del message_data[message]
+            message_version.pop(message, None)
+            section_version["message"] += 1
+
+
+# remove parameters that are not allowed by parameter white and black lists
+def apply_parameter_filter():
+    # get global variables
+    global parameter_white_list, parameter_black_list, parameter_data
+    global default_parameter_list_length, section_version, parameter_version
+
+    # check user defined a parameter white list
+    filter_white = len(parameter_white_list) > default_parameter_list_length
+
+    # remove filtered parameters from parameter data
+    for parameter in list(parameter_data.keys()):
+        if parameter in parameter_black_list or (filter_white and parameter not in parameter_white_list):
+            del parameter_data[parameter]
+            parameter_version.pop(parameter, None)
+            section_version["parameter"] += 1
+
+
+# post dictionary to api
+@application.route(rule="/set/<argument>", methods=["POST"])
+def set_argument(argument):
+    # get global variables
+    global vehicle, vehicle_connected
+    global message_white_list, message_black_list, message_data
+    global parameter_white_list, parameter_black_list, parameter_data
+
+    # get the request
+    request = flask.request.json
+
+    # create response
+    response = {"command": f"set_{argument}".upper(), "valid": False, "sent": False}
+
+    # check argument is white message list
+    if argument == "white_message":
+
+        # try to validate the request
+        if isinstance(request, list):
+            request = set(request)
+
+            # validation is successful
+            response["valid"] = True
+
+        # message should not be in helper message class
+        if response["valid"]:
+            default_messages = [message.value for message in MessageName]
+            for message in request:
+                if message in default_messages:
+                    response["valid"] = False
+                    break
+
+        # check validity
+        if response["valid"]:
+            # set white and black message lists
+            message_white_list = set().union(set([message.value for message in MessageName]), request)
+            message_black_list = set()
+
+            # remove messages that are not allowed anymore
+            apply_message_filter()
+
+            # message sent to api
+            response["sent"] = True
+
+    # check argument is black message list
+    elif argument == "black_message":
+
+        # try to validate the request
+        if isinstance(request, list):
+            request = set(request)
+
+            # validation is successful
+            response["valid"] = True
+
+        # message should not be in helper message class
+        if response["valid"]:
+            default_messages = [message.value for message in MessageName]
+            for message in request:
+                if message in default_messages:
+                    response["valid"] = False
+                    break
+
+        # check validity
+        if response["valid"]:
+            # set white and black message lists
+            message_white_list = set([message.value for message in MessageName])
+            message_black_list = request.difference(message_white_list)
+
+            # remove messages that are not allowed anymore
+            apply_message_filter()
+
+            # message sent to api
+            response["sent"] = True
+
+    # check argument is white parameter list
+    elif argument == "white_parameter":
+
+        # try to validate the request
+        if isinstance(request, list):
+            request = set(request)
+
+            # validation is successful
+            response["valid"] = True
+
+        # parameter should not be in helper parameter class
+        if response["valid"]:
+            default_parameters = [parameter.value for parameter in ParameterName]
+            for parameter in request:
+                if parameter in default_parameters:
+                    response["valid"] = False
+                    break
+
+        # check validity
+        if response["valid"]:
+
+            # set white and black parameter lists
+            parameter_white_list = set().union(set([parameter.value for parameter in ParameterName]), request)
+            parameter_black_list = set()
+
+            # remove parameters that are not allowed anymore
+            apply_parameter_filter()
+
+            # check if vehicle is alive
+            if vehicle_connected:
+                # request parameter list from vehicle
+                vehicle.mav.param_request_list_send(vehicle.target_system, vehicle.target_component)
+
+            # message sent to api
+            response["sent"] = True
+
+    # check argument is black parameter list
+    elif argument == "black_parameter":
+
+        # try to validate the request
+        if isinstance(request, list):
+            request = set(request)
+
+            # validation is successful
+            response["valid"] = True
+
+        # parameter should not be in helper parameter class
+        if response["valid"]:
+            default_parameters = [parameter.value for parameter in ParameterName]
+            for parameter in request:
+                if parameter in default_parameters:
+                    response["valid"] = False
+                    break
+
+        # check validity
+        if response["valid"]:
+            # set white and black parameter lists
+            parameter_white_list = set([parameter.value for parameter in ParameterName])
+            parameter_black_list = request.difference(parameter_white_list)
+
+            # remove parameters that are not allowed anymore
+            apply_parameter_filter()
+
+            # message sent to api
+            response["sent"] = True
+
+    # expose the response
+    return flask.jsonify(response)
+
+
+# deal with the malicious requests
+@application.errorhandler(code_or_exception=404)
+def page_not_found(error):
+    # expose an empty response
+    return flask.jsonify({})
+
+
+# replay a memory mapped telemetry log file as a vehicle connection at a speed factor of its recorded timing
+class ReplayConnection(utility.mavfile):
+    # open the telemetry log file, messages are not delayed longer than half of the connection timeout
+    def __init__(self, path, speed, timeout):
+        # map the file to memory
+        self.log_file = open(path, "rb")
+        self.log_data = mmap.mmap(self.log_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # create replay state, zero speed means as fast as possible
+        self.log_position = 0
+        self.log_batch = collections.deque()
+        self.replay_speed = speed
+        self.replay_start = None
+        self.replay_idle = timeout / 2 if timeout is not None else None
+        self.replay_last = None
+
+        # create the connection without a file descriptor
+        super().__init__(fd=None, address=path)
+
+    # parse the next batch of messages from the mapped file
+    def parse_batch(self):
+        # get the mapped file
+        data = self.log_data
+
+        # until the batch is full or end of file is reached
+        while len(self.log_batch) < ReplayEnum.BATCH.value and \
+                self.log_position + ReplayEnum.TIMESTAMP_LENGTH.value + 2 < len(data):
+
+            # get position of the frame after the timestamp and the frame marker
+            start = self.log_position + ReplayEnum.TIMESTAMP_LENGTH.value
+            marker = data[start]
+
+            # get length of the frame from its header
+            if marker == ReplayEnum.MARKER_V2.value and start + 2 < len(data):
+                signed = data[start + 2] & ReplayEnum.SIGNED.value
+                stop = start + data[start + 1] + 12 + (ReplayEnum.SIGNATURE_LENGTH.value if signed else 0)
+            elif marker == ReplayEnum.MARKER_V1.value:
+                stop = start + data[start + 1] + 8
+
+            # frame marker is not found so search the next record one byte later
+            else:
+                self.log_position += 1
+                continue
+
+            # frame is truncated at end of file
+            if stop > len(data):
+                self.log_position = len(data)
+                break
+
+            # try to decode the frame without the byte by byte parser
+            try:
+                message = self.mav.decode(bytearray(data[start:stop]))
+                timestamp = struct.unpack(">Q", data[self.log_position:start])[0] * 1e-6
+                self.log_batch.append((timestamp, message))
+
+            # frame is corrupted so search the next record one byte later
+            except Exception as e:
+                self.log_position += 1
+                continue
+
+            # continue with the next record
+            self.log_position = stop
+
+    # get the next message when its recorded time has come
+    def recv_msg(self):
+        # get the time the message is asked for, the receive loop counts its deadline from it
+        time_called = time.monotonic()
+
+        # parse the next batch if the current batch is consumed
+        if not self.log_batch:
+            self.parse_batch()
+
+        # end of file is reached
+        if not self.log_batch:
+            return None
+
+        # get the next message and its recorded timestamp
+        timestamp, message = self.log_batch[0]
+
+        # user requested to replay with recorded timing
+        if self.replay_speed > 0:
+
+            # replay starts with the first message
+            if self.replay_start is None:
+                self.replay_start = (timestamp, time_called)
+
+            # get the time the message is due
+            due = self.replay_start[1] + (timestamp - self.replay_start[0]) / self.replay_speed
+
+            # recorded gap is longer than the connection timeout allows so skip the idle time of the gap
+            if self.replay_idle is not None and self.replay_last is not None and \
+                    due > self.replay_last + self.replay_idle:
+                self.replay_start = (self.replay_start[0], self.replay_start[1] - due + self.replay_last + self.replay_idle)
+                due = self.replay_last + self.replay_idle
+
+            # wait for the message in slices
+            while time.monotonic() < due:
+                gevent.sleep(min(due - time.monotonic(), ReplayEnum.SLICE.value))
+
+        # remember when the last message is asked for
+        self.replay_last = time_called
+
+        # consume the message
+        self.log_batch.popleft()
+
+        # stamp the message with its recorded time like other log readers
+        self._timestamp = timestamp
+        self.post_message(message)
+
+        # expose the message
+        return message
+
+    # drop messages sent to the replayed vehicle
+    def write(self, buf):
+        pass
+
+    # close the mapped file
+    def close(self):
+        self.log_batch.clear()
+        self.log_data.close()
+        self.log_file.close()
+
+
+# wait until there is incoming data on the vehicle connection or timeout occurs
+def wait_vehicle(connection, timeout):
+    # try to get file descriptor of the underlying port of the connection
+    try:
+
+        # get file descriptor of the port, this is updated on reconnection unlike the connection one
+        descriptor = connection.port.fileno()
+
+    # connection does not have a port with a file descriptor
+    except Exception as e:
+
+        # get file descriptor of the connection
+        descriptor = getattr(connection, "fd", None)
+
+    # connection does not expose a file descriptor so there is nothing to wait on
+    if descriptor is None or descriptor < 0:
+        # cool down the message receiving
+        gevent.sleep(0.01 if timeout is None else min(timeout, 0.01))
+
+        # do not proceed further
+        return
+
+    # try to wait on the file descriptor
+    try:
+
+        # yield to the hub until the file descriptor is readable or timeout occurs
+        gevent.select.select([descriptor], [], [], timeout)
+
+    # handle wait errors such as closed file descriptors
+    except Exception as e:
+
+        # cool down the message receiving
+        gevent.sleep(0.01)
+
+
+# get the number of bytes waiting to be read on the vehicle connection
+def pending_vehicle(connection):
+    # try to query the file descriptor of the connection
+    try:
+
+        # get file descriptor of the port
+        descriptor = connection.port.fileno()
+
+        # ask the kernel how many bytes are waiting on the file descriptor
+        return struct.unpack("i", fcntl.ioctl(descriptor, termios.FIONREAD, struct.pack("i", 0)))[0]
+
+    # connection does not support querying waiting bytes
+    except Exception as e:
+
+        # waiting bytes are unknown
+        return 0
+
+
+# yield to the hub from the receive loop when the time slice budget is exhausted
+def yield_telemetry(connection):
+    # get global variables
+    global statistics_data, section_version
+
+    # get scheduler statistics
+    scheduler = statistics_data["scheduler"]
+
+    # get bytes waiting on the connection before yielding
+    queue = pending_vehicle(connection=connection)
+
+    # yield to the hub until pending events such as server requests are processed
+    time_initial = time.monotonic()
+    gevent.idle()
+    time_final = time.monotonic()
+
+    # update scheduler statistics
+    scheduler["yield"] = scheduler.get("yield", 0) + 1
+    scheduler["queue"] = queue
+    scheduler["queue_max"] = max(scheduler.get("queue_max", 0), queue)
+    scheduler["yield_duration"] = time_final - time_initial
+    section_version["statistics"] += 1
+
+
+# measure how late the hub wakes up a sleeping greenlet
+def monitor_hub(period):
+    # get global variables
+    global statistics_data, section_version
+
+    # get scheduler statistics
+    scheduler = statistics_data["scheduler"]
+
+    # initiate hub lag statistics
+    scheduler["lag"] = 0
+    scheduler["lag_max"] = 0
+    scheduler["lag_average"] = 0
+    counter = 0
+
+    # infinite monitoring loop
+    while True:
+
+        # sleep for a period and measure the overshoot
+        time_initial = time.monotonic()
+        gevent.sleep(period)
+        lag = max(time.monotonic() - time_initial - period, 0)
+
+        # update hub lag statistics
+        counter += 1
+        scheduler["lag"] = lag
+        scheduler["lag_max"] = max(scheduler["lag_max"], lag)
+        scheduler["lag_average"] += (lag - scheduler["lag_average"]) / counter
+        section_version["statistics"] += 1
+
+
+# register a function to handle a message with given message id
+def message_handler(message_id):
+    # create the decorator
+    def decorator(function):
+        # register the function to message handlers
+        message_handlers[message_id] = function
+
+        # expose the function unchanged
+        return function
+
+    # expose the decorator
+    return decorator
+
+
+# create history of a message with a time column and a column for each numeric field of the message
+def create_history(message_raw):
+    # get global variables
+    global history_capacity
+
+    # get array lengths of fields which are listed in wire order
+    field_lengths = dict(zip(message_raw.ordered_fieldnames, message_raw.array_lengths))
+
+    # create history with a preallocated ring buffer of timestamps
+    history = {"count": 0, "time": numpy.zeros(shape=history_capacity, dtype=numpy.float64), "columns": {}}
+
+    # create a preallocated ring buffer for each numeric scalar field of the message
+    for field_name, field_type in zip(message_raw.fieldnames, message_raw.fieldtypes):
+        if field_type in HistoryEnum.__members__ and field_lengths[field_name] == 0:
+            history["columns"][field_name] = numpy.zeros(shape=history_capacity,
+                                                         dtype=HistoryEnum[field_type].value)
+
+    # expose the history
+    return history
+
+
+# record fields of a message to its history in place
+def record_history(message_name, message_raw, time_now):
+    # get global variables
+    global history_data, history_capacity
+
+    # get history of this message
+    history = history_data.get(message_name)
+
+    # create history of this message if this is the first sample
+    if history is None:
+        history = history_data[message_name] = create_history(message_raw=message_raw)
+
+    # get the position of this sample in the ring buffers
+    position = history["count"] % history_capacity
+
+    # write the sample to the ring buffers, overwrite the oldest sample when the buffers are full
+    history["time"][position] = time_now
+    for field_name, column in history["columns"].items():
+        column[position] = getattr(message_raw, field_name)
+
+    # count the sample
+    history["count"] += 1
+
+
+# get columns of the samples of a message history in a time range in chronological order
+def history_columns(message_name, fields, time_from, time_to):
+    # get global variables
+    global history_data, history_capacity
+
+    # get history of this message
+    history = history_data[message_name]
+
+    # get the number of stored samples and the position of the oldest sample
+    count = min(history["count"], history_capacity)
+    oldest = history["count"] % history_capacity if history["count"] > history_capacity else 0
+
+    # get timestamps in chronological order
+    times = numpy.concatenate((history["time"][oldest:count], history["time"][:oldest]))
+
+    # find the samples in the time range
+    start = 0 if time_from is None else int(numpy.searchsorted(times, time_from, side="left"))
+    stop = count if time_to is None else int(numpy.searchsorted(times, time_to, side="right"))
+
+    # get positions of the samples in the ring buffers
+    positions = (numpy.arange(start, max(start, stop)) + oldest) % history_capacity
+
+    # create columns with timestamps first
+    columns = {"time": times[start:max(start, stop)]}
+
+    # add requested fields of the history
+    for field_name in fields:
+        if field_name in history["columns"].keys():
+            columns[field_name] = history["columns"][field_name][positions]
+
+    # expose the columns
+    return columns
+
+
+# get time bucket statistics of a message history field, only the samples recorded since the last call are added
+def aggregate_history(message_name, field_name, width):
+    # get global variables
+    global history_data, history_capacity, aggregate_cache
+
+    # get history of this message
+    history = history_data[message_name]
+
+    # get the cached buckets of this message field and bucket width
+    key = (message_name, field_name, width)
+    count, buckets = aggregate_cache.get(key, (0, None))
+
+    # history does not have new samples
+    if count == history["count"] and buckets is not None:
+        return buckets
+
+    # get positions of the samples recorded since the last call that are still in the ring buffers
+    positions = numpy.arange(max(count, history["count"] - history_capacity), history["count"]) % history_capacity
+
+    # compute bucket statistics of the new samples
+    new_buckets = aggregate_samples(times=history["time"][positions],
+                                    values=history["columns"][field_name][positions].astype(numpy.float64),
+                                    width=width)
+
+    # new samples continue the last cached bucket
+    if buckets is not None and len(buckets["index"]) > 0 and len(new_buckets["index"]) > 0 and \
+            buckets["index"][-1] == new_buckets["index"][0]:
+
+        # merge the last cached bucket into the first new bucket
+        new_buckets["min"][0] = numpy.fmin(buckets["min"][-1], new_buckets["min"][0])
+        new_buckets["max"][0] = numpy.fmax(buckets["max"][-1], new_buckets["max"][0])
+        new_buckets["sum"][0] += buckets["sum"][-1]
+        new_buckets["count"][0] += buckets["count"][-1]
+
+        # remove the merged bucket from the cached buckets
+        buckets = {name: column[:-1] for name, column in buckets.items()}
+
+    # append the new buckets to the cached buckets
+    if buckets is not None:
+        new_buckets = {name: numpy.concatenate((buckets[name], column)) for name, column in new_buckets.items()}
+
+    # drop the buckets whose samples are all overwritten in the ring buffers
+    oldest = history["time"][history["count"] % history_capacity if history["count"] > history_capacity else 0]
+    new_buckets = {name: column[new_buckets["index"] >= numpy.floor(oldest / width)]
+                   for name, column in new_buckets.items()}
+
+    # limit the cache size
+    if len(aggregate_cache) >= AggregateEnum.CACHE.value:
+        aggregate_cache.clear()
+
+    # cache the buckets
+    aggregate_cache[key] = (history["count"], new_buckets)
+
+    # expose the buckets
+    return new_buckets
+
+
+# compute minimum, maximum, sum, last value and sample count of samples in time buckets
+def aggregate_samples(times, values, width):
+    # get the bucket index of each sample
+    index = numpy.floor(times / width).astype(numpy.int64)
+
+    # there is no sample
+    if len(index) == 0:
+        return {"index": index, "min": values, "max": values, "sum": values, "last": values, "count": index}
+
+    # get the start and the end of each bucket in the samples
+    starts = numpy.flatnonzero(numpy.concatenate(([True], index[1:] != index[:-1])))
+    ends = numpy.append(starts[1:], len(index))
+
+    # expose the statistics of each bucket
+    return {"index": index[starts],
+            "min": numpy.fmin.reduceat(values, starts),
+            "max": numpy.fmax.reduceat(values, starts),
+            "sum": numpy.add.reduceat(values, starts),
+            "last": values[ends - 1],
+            "count": ends - starts}
+
+
+# downsample samples to a number of points with largest triangle three buckets algorithm
+def downsample_history(times, values, points):
+    # get the number of samples
+    count = len(times)
+
+    # there are not more samples than requested points
+    if points >= count or points < 3:
+        return times, values
+
+    # split the samples between the first and the last sample to buckets
+    edges = numpy.linspace(start=1, stop=count - 1, num=points - 1).astype(numpy.int64)
+
+    # always keep the first and the last sample
+    selected = numpy.zeros(shape=points, dtype=numpy.int64)
+    selected[-1] = count - 1
+
+    # for each bucket
+    for bucket in range(points - 2):
+
+        # get the samples in this bucket and in the next bucket, the next bucket of the last bucket is the last sample
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_start, next_stop = (edges[bucket + 1], edges[bucket + 2]) if bucket + 2 < len(edges) else (count - 1, count)
+
+        # get the average point of the next bucket
+        next_time, next_value = times[next_start:next_stop].mean(), values[next_start:next_stop].mean()
+
+        # get the previously selected point
+        previous_time, previous_value = times[selected[bucket]], values[selected[bucket]]
+
+        # select the sample forming the largest triangle with the previous point and the next average point
+        areas = numpy.abs((previous_time - next_time) * (values[start:stop] - previous_value) -
+                          (previous_time - times[start:stop]) * (next_value - previous_value))
+        selected[bucket + 1] = start + numpy.argmax(areas)
+
+    # expose the selected samples
+    return times[selected], values[selected]
+
+
+# split a selector to its message, parameter or custom part and the rest, a dot or a slash separates them
+def split_selector(selector):
+    # remove spaces from the selector
+    selector = str(selector).replace(" ", "")
+
+    # get position of the first separator
+    position = min([index for index in (selector.find("."), selector.find("/")) if index >= 0], default=len(selector))
+
+    # expose the parts of the selector
+    return selector[:position], selector[position + 1:]
+
+
+# compile comma separated selectors to selected messages with fields, parameters and custom keys, none means all
+def compile_selectors(text):
+    # get global variables
+    global selector_cache
+
+    # selectors are compiled before
+    if text in selector_cache.keys():
+        return selector_cache[text]
+
+    # create empty selections
+    messages, parameters, customs = {}, set(), set()
+
+    # for each selector
+    for selector in text.split(","):
+
+        # split the selector to its message, parameter or custom part and the rest
+        head, rest = split_selector(selector=selector)
+
+        # parameter selector
+        if head == QueryEnum.PARAMETER.value:
+            parameters = None if rest in ("", QueryEnum.WILDCARD.value) or parameters is None else parameters | {rest}
+
+        # custom value selector
+        elif head == QueryEnum.CUSTOM.value:
+            customs = None if rest in ("", QueryEnum.WILDCARD.value) or customs is None else customs | {rest}
+
+        # message selector with message name or id
+        elif head != "":
+            message = int(head) if head.isdigit() else head
+            if rest in ("", QueryEnum.WILDCARD.value) or message in messages.keys() and messages[message] is None:
+                messages[message] = None
+            else:
+                messages[message] = messages.get(message, set()) | {rest}
+
+    # selections are empty sets instead of all when nothing is selected from them
+    compiled = (messages, parameters, customs)
+
+    # limit the cache size
+    if len(selector_cache) >= QueryEnum.CACHE.value:
+        selector_cache.clear()
+
+    # cache the compiled selectors
+    selector_cache[text] = compiled
+
+    # expose the compiled selectors
+    return compiled
+
+
+# get the version to wait for and the timeout of a wait request, wait for the next change by default
+def wait_arguments(version):
+    # get the version to wait for
+    since = flask.request.args.get("since", default=version, type=int)
+
+    # get the timeout in seconds
+    timeout = flask.request.args.get("timeout", default=StreamEnum.WAIT_TIMEOUT.value, type=float)
+
+    # expose the version and the timeout limited to a sane range
+    return since, min(max(timeout, 0.0), StreamEnum.WAIT_TIMEOUT_MAX.value)
+
+
+# block the greenlet until the condition is true or timeout, return true if the condition is true
+def wait_change(kind, name, timeout, condition):
+    # get global variables
+    global waiter_events, waiter_counts
+
+    # get the deadline
+    deadline = time.monotonic() + timeout
+
+    # get the key of the waited change
+    key = (kind, name)
+
+    # wait until the condition is true
+    while not condition():
+
+        # get remaining time
+        remaining = deadline - time.monotonic()
+
+        # timed out
+        if remaining <= 0:
+            return False
+
+        # count this waiter so the event of a change that never happens can be removed
+        event = waiter_events.setdefault(key, gevent.event.Event())
+        waiter_counts[key] = waiter_counts.get(key, 0) + 1
+
+        # wait for a change notification
+        try:
+            event.wait(timeout=remaining)
+
+        # remove the event when nobody waits for this change anymore
+        finally:
+            waiter_counts[key] -= 1
+            if waiter_counts[key] == 0:
+                del waiter_counts[key]
+                waiter_events.pop(key, None)
+
+    # condition is true
+    return True
+
+
+# wake up the greenlets waiting for a change, no name means all waiters of the kind
+def notify_waiters(kind, name=None):
+    # get global variables
+    global waiter_events
+
+    # get the waiters to wake up
+    keys = [key for key in waiter_events.keys() if key[0] == kind] if name is None else [(kind, name)]
+
+    # wake up the waiters, the next waiters will wait on a new event
+    for key in keys:
+        event = waiter_events.pop(key, None)
+        if event is not None:
+            event.set()
+
+
+# create a subscriber of message updates that is not subscribed to any message yet
+def add_subscriber(kind, limit):
+    # get global variables
+    global subscriber_data, subscriber_counter
+
+    # create subscriber id
+    subscriber_counter += 1
+
+    # create the subscriber
+    subscriber = {"id": subscriber_counter,
+                  "kind": kind,
+                  "all": False,
+                  "names": set(),
+                  "ids": set(),
+                  "fields": {},
+                  "rate": 0.0,
+                  "interval": 0.0,
+                  "limit": limit,
+                  "queue": collections.deque(),
+                  "queue_max": 0,
+                  "pending": {},
+                  "last": {},
+                  "event": gevent.event.Event(),
+                  "sent": 0,
+                  "coalesced": 0,
+                  "dropped": 0,
+                  "closed": False}
+
+    # register the subscriber
+    subscriber_data[subscriber["id"]] = subscriber
+
+    # expose the subscriber
+    return subscriber
+
+
+# remove a subscriber of message updates
+def remove_subscriber(subscriber):
+    # get global variables
+    global subscriber_data
+
+    # mark the subscriber as closed and unregister it
+    subscriber["closed"] = True
+    subscriber_data.pop(subscriber["id"], None)
+
+    # wake up the writer of the subscriber
+    subscriber["event"].set()
+
+
+# subscribe to messages with names, ids, name.field or id.field selectors, no selectors means all messages
+def subscribe_messages(subscriber, selectors, rate):
+    # get global variables
+    global message_data, message_enumeration, metadata_data, metadata_index
+
+    # parse the selectors
+    names, ids, fields = set(), set(), {}
+    for selector in selectors if selectors is not None else []:
+        message, field = split_selector(selector=selector)
+        message = int(message) if message.isdigit() else message
+
+        # reject selectors of messages or fields that are not in the dialect instead of never sending them
+        metadata = metadata_data.get(metadata_index.get(message) if isinstance(message, int) else message)
+        if message != "" and (metadata is None or field not in ("", QueryEnum.WILDCARD.value) and
+                              field not in {metadata_field["name"] for metadata_field in metadata["fields"]}):
+            raise ValueError(f"unknown selector {selector}")
+
+        # add the selector
+        if field not in ("", QueryEnum.WILDCARD.value):
+            fields.setdefault(message, set()).add(field)
+        elif isinstance(message, int):
+            ids.add(message)
+        elif message != "":
+            names.add(message)
+
+    # replace the subscription
+    subscriber["all"] = selectors is None
+    subscriber["names"] = names
+    subscriber["ids"] = ids
+    subscriber["fields"] = fields
+    subscriber["rate"] = max(rate, 0.0)
+    subscriber["interval"] = 1.0 / rate if rate > 0 else 0.0
+    subscriber["pending"].clear()
+    subscriber["queue"].clear()
+
+    # send current values of the subscribed messages first
+    for message_name in list(message_data.keys()):
+        if subscriber_wants(subscriber=subscriber, message_name=message_name,
+                            message_id=message_enumeration.get(message_name)):
+            subscriber["queue"].append(message_name)
+
+    # wake up the writer of the subscriber
+    subscriber["event"].set()
+
+
+# check a subscriber is interested in a message
+def subscriber_wants(subscriber, message_name, message_id):
+    # check subscriber wants all messages or message name or id is subscribed
+    return subscriber["all"] or message_name in subscriber["names"] or message_id in subscriber["ids"] or \
+        message_name in subscriber["fields"] or message_id in subscriber["fields"]
+
+
+# notify subscribers about a message update
+def publish_message(message_name, message_id, time_monotonic):
+    # get global variables
+    global subscriber_data
+
+    # for each subscriber
+    for subscriber in list(subscriber_data.values()):
+
+        # subscriber is not interested in this message
+        if not subscriber_wants(subscriber=subscriber, message_name=message_name, message_id=message_id):
+            continue
+
+        # message is already waiting to be sent with its latest value
+        if message_name in subscriber["pending"]:
+            subscriber["coalesced"] += 1
+            continue
+
+        # message was sent recently so send its latest value after the interval
+        if subscriber["interval"] > 0:
+            due = subscriber["last"].get(message_name, 0) + subscriber["interval"]
+            if due > time_monotonic:
+                subscriber["pending"][message_name] = due
+                subscriber["event"].set()
+                continue
+            subscriber["last"][message_name] = time_monotonic
+
+        # subscriber can not keep up so disconnect it
+        if len(subscriber["queue"]) >= subscriber["limit"]:
+            subscriber["dropped"] += len(subscriber["queue"]) + 1
+            subscriber["queue"].clear()
+            remove_subscriber(subscriber=subscriber)
+            continue
+
+        # queue the message update
+        subscriber["queue"].append(message_name)
+        subscriber["queue_max"] = max(subscriber["queue_max"], len(subscriber["queue"]))
+        subscriber["event"].set()
+
+
+# move pending message updates of a subscriber whose interval has passed to its queue
+def flush_subscriber(subscriber, time_monotonic):
+    # for each pending message update
+    for message_name, due in list(subscriber["pending"].items()):
+
+        # message update is due
+        if due <= time_monotonic:
+            del subscriber["pending"][message_name]
+            subscriber["last"][message_name] = time_monotonic
+            subscriber["queue"].append(message_name)
+
+    # expose the time until the next pending message update is due
+    return min(subscriber["pending"].values(), default=time_monotonic + StreamEnum.KEEPALIVE.value) - time_monotonic
+
+
+# wait for message updates of a subscriber and yield them in batches, an empty batch means nothing to send for a while
+def follow_subscriber(subscriber):
+    # follow until subscriber is closed
+    while not subscriber["closed"]:
+
+        # move latest values of pending message updates that are due to the queue
+        wait = flush_subscriber(subscriber=subscriber, time_monotonic=time.monotonic())
+
+        # nothing to send so wait for message updates
+        if not subscriber["queue"]:
+
+            # wait for a message update or the next pending update
+            subscriber["event"].clear()
+            if not subscriber["event"].wait(timeout=max(wait, 0)) and not subscriber["pending"]:
+
+                # tell the writer that there was nothing to send
+                yield []
+
+            # check queue again
+            continue
+
+        # yield queued message updates
+        message_names = list(subscriber["queue"])
+        subscriber["queue"].clear()
+        subscriber["sent"] += len(message_names)
+        yield message_names
+
+
+# encode the latest value of a message for a subscriber, whole messages are encoded once per message version
+def encode_message(subscriber, message_name):
+    # get global variables
+    global message_data, message_version, message_enumeration, event_cache
+
+    # get version and fields of the message
+    version = message_version.get(message_name, 0)
+    message = message_data.get(message_name, {})
+
+    # get the fields subscriber selected if it did not subscribe to the whole message
+    message_id = message_enumeration.get(message_name)
+    fields = None
+    if not subscriber["all"] and message_name not in subscriber["names"] and message_id not in subscriber["ids"]:
+        fields = subscriber["fields"].get(message_name, set()) | subscriber["fields"].get(message_id, set())
+
+    # encode selected fields of the message
+    if fields is not None:
+        content = application.json.dumps({message_name: {field: message[field] for field in fields if field in message}},
+                                         separators=(",", ":")).encode("utf-8")
+
+    # encode whole message unless it was encoded before
+    else:
+        cached_version, content = event_cache.get(message_name, (None, None))
+        if cached_version != version:
+            content = application.json.dumps({message_name: message}, separators=(",", ":")).encode("utf-8")
+            event_cache[message_name] = (version, content)
+
+    # expose the version and the encoded message
+    return version, content
+
+
+# write message updates of a subscriber as server-sent events until the subscriber is closed
+def stream_subscriber(subscriber):
+    # try to stream message updates
+    try:
+
+        # set reconnection time of the client
+        yield f"retry: {StreamEnum.RETRY.value}\n\n".encode("utf-8")
+
+        # for each batch of message updates
+        for message_names in follow_subscriber(subscriber=subscriber):
+
+            # keep the connection alive while there are no message updates
+            if not message_names:
+                yield b": keepalive\n\n"
+                continue
+
+            # send message updates as events
+            events = []
+            for message_name in message_names:
+                version, content = encode_message(subscriber=subscriber, message_name=message_name)
+                events.append(f"id: {version}\nevent: message\ndata: ".encode("utf-8") + content + b"\n\n")
+            yield b"".join(events)
+
+    # client is disconnected or subscriber is closed
+    finally:
+
+        # remove the subscriber
+        remove_subscriber(subscriber=subscriber)
+
+
+# send a frame to a websocket client, frames of different greenlets must not interleave
+def send_websocket(websocket, lock, frame):
+    # send the frame
+    with lock:
+        websocket.send(frame)
+
+
+# write message updates of a subscriber as websocket frames until the subscriber is closed
+def write_websocket(subscriber, websocket, lock):
+    # try to send message updates
+    try:
+
+        # for each batch of message updates
+        for message_names in follow_subscriber(subscriber=subscriber):
+
+            # check the client is still alive while there are no message updates
+            if not message_names:
+                with lock:
+                    websocket.send_frame(b"", websocket.OPCODE_PING)
+                continue
+
+            # send message updates as frames
+            for message_name in message_names:
+                version, content = encode_message(subscriber=subscriber, message_name=message_name)
+                send_websocket(websocket=websocket, lock=lock,
+                               frame=f'{{"type":"message","version":{version},"data":{content.decode("utf-8")}}}')
+
+    # client is disconnected
+    except Exception as e:
+        pass
+
+    # stop receiving from client
+    finally:
+
+        # remove the subscriber
+        remove_subscriber(subscriber=subscriber)
+
+        # close the connection so the reader stops too
+        try:
+            websocket.close()
+        except Exception as e:
+            pass
+
+
+# start downloading a list with given item count from vehicle, wait for quiet seconds if vehicle is streaming it
+def start_download(name, total, quiet=0, missing=None):
+    # get global variables
+    global download_data
+
+    # get timestamp
+    time_monotonic = time.monotonic()
+
+    # all items are missing by default
+    missing = range(total) if missing is None else missing
+
+    # create download state of the list
+    download_data[name] = {"total": total,
+                           "missing": set(missing),
+                           "queue": collections.deque(missing),
+                           "inflight": {},
+                           "quiet": time_monotonic + quiet,
+                           "requests": 0,
+                           "retries": 0,
+                           "names": set(),
+                           "first_monotonic": time_monotonic,
+                           "last_monotonic": time_monotonic}
+
+    # request items of the list
+    fill_download(name=name)
+
+
+# mark an item of a list as received from vehicle and return true if it was missing
+def complete_download(name, index):
+    # get global variables
+    global download_data, download_retry
+
+    # get download state of the list
+    download = download_data.get(name)
+
+    # list is not being downloaded or item was received before
+    if download is None or index not in download["missing"]:
+        return False
+
+    # get timestamp
+    time_monotonic = time.monotonic()
+
+    # item was sent by vehicle without a request so vehicle is still streaming the list
+    if download["inflight"].pop(index, None) is None:
+        download["quiet"] = time_monotonic + download_retry
+
+    # mark item as received
+    download["missing"].discard(index)
+    download["last_monotonic"] = time_monotonic
+
+    # request more items to keep the window full
+    fill_download(name=name)
+
+    # item was missing
+    return True
+
+
+# send a request for an item of a list to vehicle
+def request_download(name, index):
+    # get global variables
+    global vehicle
+
+    # request parameter value
+    if name == "parameter":
+        vehicle.mav.param_request_read_send(vehicle.target_system, vehicle.target_component, b"", index)
+
+    # request flight plan command
+    elif name == "plan":
+        vehicle.mav.mission_request_int_send(vehicle.target_system, vehicle.target_component, index)
+
+    # request fence item
+    elif name == "fence":
+        vehicle.mav.fence_fetch_point_send(vehicle.target_system, vehicle.target_component, index)
+
+    # request rally item
+    elif name == "rally":
+        vehicle.mav.rally_fetch_point_send(vehicle.target_system, vehicle.target_component, index)
+
+
+# request missing items of a list until the requests in flight fill the window
+def fill_download(name):
+    # get global variables
+    global download_data, download_window, download_retry, vehicle_connected
+
+    # get download state of the list
+    download = download_data.get(name)
+
+    # get timestamp
+    time_monotonic = time.monotonic()
+
+    # do not request while vehicle is not connected or still streaming the list on its own
+    if download is None or not vehicle_connected or time_monotonic < download["quiet"]:
+        return
+
+    # fill the window
+    while len(download["inflight"]) < download_window and download["queue"]:
+
+        # get the next item in the queue
+        index = download["queue"].popleft()
+
+        # item was received or requested after it was queued
+        if index not in download["missing"] or index in download["inflight"]:
+            continue
+
+        # request the item and set its retransmit deadline
+        request_download(name=name, index=index)
+        download["inflight"][index] = time_monotonic + download_retry
+        download["requests"] += 1
+
+
+# write a batch of packets to a telemetry log file and flush it, runs in a native thread
+def write_telemetry(file, data):
+    # write the batch to the file
+    file.write(data)
+
+    # flush the file
+    file.flush()
+
+
+# write queued raw messages to rotating telemetry log files periodically
+def record_telemetry(path, size, duration, period):
+    # get global variables
+    global recorder_queue, recorder_event, statistics_data, section_version
+
+    # get the native thread pool of the hub to keep disk writes off the event loop
+    threadpool = gevent.get_hub().threadpool
+
+    # get path and extension of the log files
+    root, extension = os.path.splitext(path)
+    extension = extension if extension != "" else RecorderEnum.EXTENSION.value
+
+    # create empty log file state
+    file, file_size, file_monotonic, file_stamp, file_index = None, 0, 0.0, "", 0
+
+    # run indefinitely
+    while True:
+
+        # wait for the next batch or until the queue is half full
+        recorder_event.wait(timeout=period)
+        recorder_event.clear()
+
+        # there is no queued message
+        if not recorder_queue:
+            continue
+
+        # take all queued messages
+        packets = [recorder_queue.popleft() for _ in range(len(recorder_queue))]
+
+        # prefix each message with its timestamp in microseconds since epoch like other telemetry logs
+        data = b"".join(struct.pack(">Q", int(time_now * 1e6)) + message_buffer for time_now, message_buffer in packets)
+
+        # try to write the batch
+        try:
+
+            # open a new log file if there is no open file or the file is too large or too old
+            if file is None or size and file_size >= size or duration and time.monotonic() - file_monotonic >= duration:
+
+                # close the current log file
+                if file is not None:
+                    threadpool.apply(file.close)
+
+                # number the files opened within the same second to not append to the previous file
+                stamp = time.strftime(RecorderEnum.TIME_FORMAT.value)
+                file_index = file_index + 1 if stamp == file_stamp else 0
+                file_stamp = stamp
+
+                # open a new log file with the time it was opened in its name
+                name = f"{root}_{stamp}{extension}" if file_index == 0 else f"{root}_{stamp}_{file_index}{extension}"
+                file = threadpool.apply(open, (name, "ab"))
+                file_size, file_monotonic = 0, time.monotonic()
+
+                # update recorder statistics
+                statistics_data["recorder"]["file"] = name
+                statistics_data["recorder"]["files"] += 1
+
+            # write the batch in a native thread
+            threadpool.apply(write_telemetry, (file, data))
+            file_size += len(data)
+
+            # update recorder statistics
+            statistics_data["recorder"]["packets"] += len(packets)
+            statistics_data["recorder"]["bytes"] += len(data)
+
+        # writing is failed
+        except Exception as e:
+
+            # count the lost messages
+            statistics_data["recorder"]["errors"] += len(packets)
+
+            # try to close the failed log file
+            try:
+
+                # close the failed log file
+                if file is not None:
+                    threadpool.apply(file.close)
+
+            # handle close errors
+            except Exception as e:
+
+                # do nothing
+                pass
+
+            # open a new file with the next batch
+            file = None
+
+        # update recorder statistics
+        statistics_data["recorder"]["queue"] = len(recorder_queue)
+        section_version["statistics"] += 1
+
+
+# retransmit timed out requests of all lists periodically
+def manage_downloads(period):
+    # get global variables
+    global download_data, ftp_data, cache_data
+
+    # infinite management loop
+    while True:
+
+        # wait for the next check
+        gevent.sleep(period)
+
+        # get timestamp
+        time_monotonic = time.monotonic()
+
+        # parameter file transfer is timed out
+        if ftp_data and ftp_data["deadline"] <= time_monotonic:
+            retry_ftp()
+
+        # vehicle did not respond to parameter hash check
+        if cache_data.get("check") is not None and cache_data["check"] <= time_monotonic:
+            cache_data["check"] = None
+            fetch_parameters()
+
+        # for each list being downloaded
+        for name, download in list(download_data.items()):
+
+            # queue timed out requests again if items are still missing
+            for index, deadline in list(download["inflight"].items()):
+                if deadline <= time_monotonic:
+                    del download["inflight"][index]
+                    if index in download["missing"]:
+                        download["queue"].append(index)
+                        download["retries"] += 1
+
+            # request items
+            fill_download(name=name)
+
+
+# request all parameters from vehicle
+def fetch_parameters():
+    # get global variables
+    global vehicle, vehicle_connected, fetch_ftp
+
+    # vehicle is not connected
+    if not vehicle_connected:
+        return
+
+    # request parameter file from vehicle
+    if fetch_ftp:
+        start_ftp()
+
+    # request parameter list from vehicle
+    else:
+        vehicle.mav.param_request_list_send(vehicle.target_system, vehicle.target_component)
+
+
+# request parameter hash from vehicle
+def request_parameter_hash():
+    # get global variables
+    global vehicle
+
+    # send parameter read request for the hash
+    vehicle.mav.param_request_read_send(target_system=vehicle.target_system,
+                                        target_component=vehicle.target_component,
+                                        param_id=CacheEnum.HASH_CHECK.value.encode("utf8"),
+                                        param_index=CacheEnum.HASH_INDEX.value)
+
+
+# load cached parameters, plan, fence and rally items of the connected vehicle
+def load_vehicle_cache():
+    # get global variables
+    global vehicle, vehicle_component, cache_data, section_version, parameter_version
+    global parameter_data, plan_data, fence_data, rally_data
+    global parameter_white_list, parameter_black_list
+    global fetch_param, fetch_plan, fetch_fence, fetch_rally
+
+    # create empty cache state
+    cache_data = {"hash": None, "check": None, "store": False, "opaque_id": 0}
+
+    # try to load vehicle cache from file
+    try:
+
+        # load vehicle cache from file
+        with open(CacheEnum.FILE_NAME.value.format(vehicle.target_system, vehicle_component), "r") as file:
+
+            # get vehicle cache
+            cache = json.load(fp=file)
+
+    # file does not exist
+    except Exception as e:
+
+        # do nothing
+        return
+
+    # serve cached parameters
+    if fetch_param and "parameter" in cache:
+        parameter_data = cache["parameter"]
+        section_version["parameter"] += 1
+        for parameter in parameter_data.keys():
+            parameter_version[parameter] = section_version["parameter"]
+        apply_parameter_filter()
+        notify_waiters(kind="parameter")
+
+        # parameter hash is only valid if cached parameters were filtered the same way
+        if cache.get("white_parameter") == sorted(parameter_white_list) and \
+                cache.get("black_parameter") == sorted(parameter_black_list):
+            cache_data["hash"] = cache.get("hash")
+
+    # serve cached flight plan
+    if fetch_plan and "plan" in cache:
+        plan_data = cache["plan"]
+        section_version["plan"] += 1
+        notify_waiters(kind="plan")
+        cache_data["opaque_id"] = cache.get("opaque_id", 0)
+
+    # serve cached fence items
+    if fetch_fence and "fence" in cache:
+        fence_data = cache["fence"]
+        section_version["fence"] += 1
+
+    # serve cached rally items
+    if fetch_rally and "rally" in cache:
+        rally_data = cache["rally"]
+        section_version["rally"] += 1
+
+
+# save parameters, plan, fence and rally items of the connected vehicle
+def save_vehicle_cache():
+    # get global variables
+    global vehicle, vehicle_component, cache_data
+    global parameter_data, plan_data, fence_data, rally_data
+    global parameter_white_list, parameter_black_list
+
+    # create vehicle cache
+    cache = {"hash": cache_data.get("hash"),
+             "opaque_id": cache_data.get("opaque_id", 0),
+             "white_parameter": sorted(parameter_white_list),
+             "black_parameter": sorted(parameter_black_list),
+             "parameter": parameter_data,
+             "plan": plan_data,
+             "fence": fence_data,
+             "rally": rally_data}
+
+    # try to save vehicle cache to file
+    try:
+
+        # save vehicle cache to file
+        with open(file=CacheEnum.FILE_NAME.value.format(vehicle.target_system, vehicle_component),
+                  mode="wb", buffering=0) as file:
+
+            # save vehicle cache to file
+            file.write(json.dumps(obj=cache).encode(encoding="utf-8"))
+
+            # flush file to disk
+            file.flush()
+
+            # synchronize file with disk
+            os.fsync(fd=file.fileno())
+
+    # file can not be written
+    except Exception as e:
+
+        # do nothing
+        pass
+
+
+# cache a list if it is completely downloaded from vehicle
+def finish_download(name):
+    # get global variables
+    global cache_vehicle, cache_data, download_data
+
+    # user did not request vehicle cache or list is not downloaded yet
+    if not cache_vehicle or download_data[name]["missing"]:
+        return
+
+    # parameters are changed so ask vehicle for the hash of the new parameters
+    if name == "parameter":
+        cache_data["hash"] = None
+        cache_data["store"] = True
+        request_parameter_hash()
+
+    # save the list
+    save_vehicle_cache()
+
+
+# remove parameters that are not in a full download from vehicle, they can be left from the vehicle cache
+def prune_parameters(names):
+    # get global variables
+    global parameter_data, parameter_version, section_version
+
+    # get the parameters vehicle does not have anymore
+    stale = [parameter for parameter in parameter_data.keys() if parameter not in names]
+
+    # remove the parameters
+    for parameter in stale:
+        del parameter_data[parameter]
+        parameter_version.pop(parameter, None)
+
+    # parameters are changed
+    if stale:
+        section_version["parameter"] += 1
+
+
+# verify cached parameters with parameter hash of the vehicle
+def check_parameter_hash(message_dict):
+    # get global variables
+    global cache_vehicle, cache_data, parameter_data
+
+    # user did not request vehicle cache
+    if not cache_vehicle:
+        return
+
+    # get parameter hash as an unsigned integer
+    parameter_hash = struct.unpack("<I", struct.pack("<f", message_dict["param_value"]))[0]
+
+    # hash is received after a full parameter download so cache it
+    if cache_data.get("check") is None:
+
+        # hash was not requested after a download, this is a late reply to an expired check
+        if not cache_data.get("store"):
+            return
+
+        # cache the hash
+        cache_data["store"] = False
+        cache_data["hash"] = parameter_hash
+        save_vehicle_cache()
+        return
+
+    # hash check is done
+    cache_data["check"] = None
+
+    # parameters on vehicle are changed since cached
+    if parameter_hash != cache_data["hash"]:
+        fetch_parameters()
+        return
+
+    # mark all parameters as received
+    start_download(name="parameter", total=message_dict["param_count"], missing=())
+
+    # refresh fence and rally items with cached item counts
+    for param_id in (ParameterName.FENCE_TOTAL.value, ParameterName.RALLY_TOTAL.value):
+        if param_id in parameter_data:
+            update_parameter(param_id=param_id, param_value=parameter_data[param_id])
+
+
+# store an item received from vehicle in a list ordered by index
+def store_item(items, item, key):
+    # get index of the item
+    index = item[key]
+
+    # item replaces its cached copy
+    if index < len(items) and items[index][key] == index:
+        items[index] = item
+        return
+
+    # add item to list
+    items.append(item)
+
+    # keep items in order since they can be received out of order
+    if len(items) > 1 and items[-2][key] > index:
+        items.sort(key=lambda element: element[key])
+
+
+# send a MAVLink FTP request to vehicle
+def send_ftp(opcode, session=0, offset=0, data=b""):
+    # get global variables
+    global vehicle, ftp_data, download_retry
+
+    # increase sequence number of the transfer
+    ftp_data["seq"] = (ftp_data["seq"] + 1) % 65536
+
+    # create the payload of the request
+    header = struct.pack(FtpEnum.HEADER_FORMAT.value, ftp_data["seq"], session, opcode, len(data), 0, 0, 0, offset)
+    payload = header + data + bytes(FtpEnum.DATA_LENGTH.value - len(data))
+
+    # send the request to vehicle
+    vehicle.mav.file_transfer_protocol_send(target_network=0,
+                                            target_system=vehicle.target_system,
+                                            target_component=vehicle.target_component,
+                                            payload=list(payload))
+
+    # remember the request to send it again on timeout
+    ftp_data["request"] = (opcode, session, offset, data)
+    ftp_data["deadline"] = time.monotonic() + download_retry
+
+
+# start downloading parameter file from vehicle using MAVLink FTP
+def start_ftp():
+    # get global variables
+    global ftp_data
+
+    # create file transfer state
+    ftp_data = {"stage": "open",
+                "seq": 0,
+                "session": 0,
+                "size": 0,
+                "offset": 0,
+                "chunks": {},
+                "retries": 0,
+                "bursts": 0,
+                "burst_offset": 0,
+                "request": None,
+                "deadline": 0,
+                "first_monotonic": time.monotonic()}
+
+    # open parameter file on vehicle
+    send_ftp(opcode=FtpEnum.OPEN_FILE_RO.value, data=FtpEnum.PARAMETER_FILE.value.encode("utf8"))
+
+
+# give up downloading parameter file and request parameter list instead
+def fallback_ftp():
+    # get global variables
+    global vehicle, ftp_data
+
+    # clear file transfer state
+    ftp_data = {}
+
+    # request parameter list from vehicle
+    vehicle.mav.param_request_list_send(vehicle.target_system, vehicle.target_component)
+
+
+# send the last MAVLink FTP request again or give up after retries
+def retry_ftp():
+    # get global variables
+    global ftp_data, vehicle_connected
+
+    # vehicle is not connected so there is nobody to send the request
+    if not vehicle_connected:
+        ftp_data = {}
+        return
+
+    # count the retry
+    ftp_data["retries"] += 1
+
+    # vehicle does not respond to file transfer requests
+    if ftp_data["retries"] > FtpEnum.RETRIES.value:
+        fallback_ftp()
+        return
+
+    # continue reading from the first missing offset
+    if ftp_data["stage"] == "read":
+        send_ftp(opcode=FtpEnum.BURST_READ_FILE.value, session=ftp_data["session"], offset=ftp_data["offset"])
+
+    # send the last request again
+    else:
+        opcode, session, offset, data = ftp_data["request"]
+        send_ftp(opcode=opcode, session=session, offset=offset, data=data)
+
+
+# decode packed parameter file and return list of parameter names and values
+def decode_parameters(data):
+    # parameter types and their lengths and formats
+    parameter_types = {1: (1, "<b"), 2: (2, "<h"), 3: (4, "<i"), 4: (4, "<f")}
+
+    # file is too short to have a header
+    if len(data) < 6:
+        return None
+
+    # parse the header
+    magic, _, total = struct.unpack("<HHH", data[0:6])
+    if magic not in (FtpEnum.PARAMETER_MAGIC.value, FtpEnum.PARAMETER_MAGIC_DEFAULTS.value):
+        return None
+    defaults = magic == FtpEnum.PARAMETER_MAGIC_DEFAULTS.value
+
+    # parse the parameters
+    parameters = []
+    position = 6
+    last_name = b""
+    while position < len(data):
+
+        # skip padding bytes that prevent parameters spanning packets
+        if data[position] == 0:
+            position += 1
+            continue
+
+        # parse type, flags and name lengths of the parameter
+        flags, lengths = data[position], data[position + 1]
+        parameter_type = flags & 0x0F
+        if parameter_type not in parameter_types:
+            return None
+        type_length, type_format = parameter_types[parameter_type]
+        default_length = type_length if defaults and (flags >> 4) & 0x01 else 0
+        name_length = ((lengths >> 4) & 0x0F) + 1
+        common_length = lengths & 0x0F
+
+        # parse name and value of the parameter
+        position += 2
+        name = last_name[0:common_length] + data[position:position + name_length]
+        position += name_length
+        value = struct.unpack(type_format, data[position:position + type_length])[0]
+        position += type_length + default_length
+        last_name = name
+        parameters.append((name.decode("utf8"), float(value)))
+
+    # file does not have all the parameters
+    if len(parameters) != total:
+        return None
+
+    # expose the parameters
+    return parameters
+
+
+# store a parameter value received from vehicle
+def update_parameter(param_id, param_value):
+    # get global variables
+    global vehicle
+    global parameter_white_list, parameter_black_list
+    global parameter_data, fence_data, rally_data
+    global default_parameter_list_length
+    global fetch_fence, fetch_rally, section_version, parameter_version, waiter_events
+
+    # do not proceed if parameter is in the black list
+    if param_id in parameter_black_list:
+        return
+
+    # do not proceed if parameter is not in the white list
+    if len(parameter_white_list) > default_parameter_list_length and param_id not in parameter_white_list:
+        return
+
+    # get the parameter value
+    parameter_data[param_id] = param_value
+    section_version["parameter"] += 1
+    parameter_version[param_id] = section_version["parameter"]
+
+    # wake up the clients waiting for this parameter update
+    if waiter_events:
+        notify_waiters(kind="parameter", name=param_id)
+
+    # update fence count
+    if param_id == ParameterName.FENCE_TOTAL.value:
+        # clear fence related variables unless cached items will be refreshed in place
+        if len(fence_data) != int(param_value):
+            fence_data = []
+            section_version["fence"] += 1
+
+        # download fence items from vehicle
+        if fetch_fence:
+            start_download(name="fence", total=int(param_value))
+
+    # update rally count
+    elif param_id == ParameterName.RALLY_TOTAL.value:
+        # clear rally related variables unless cached items will be refreshed in place
+        if len(rally_data) != int(param_value):
+            rally_data = []
+            section_version["rally"] += 1
+
+        # download rally items from vehicle
+        if fetch_rally:
+            start_download(name="rally", total=int(param_value))
+
+    # update system id
+    elif param_id == ParameterName.SYSID_THISMAV.value:
+        vehicle.source_system = int(param_value)
+
+
+# message contains a MAVLink FTP response
+@message_handler(message_id=MessageId.FILE_TRANSFER_PROTOCOL.value)
+def handle_file_transfer_protocol(message_raw, message_dict):
+    # get global variables
+    global ftp_data, download_data, download_retry
+
+    # parameter file is not being downloaded
+    if not ftp_data:
+        return
+
+    # parse the response
+    payload = bytes(message_dict["payload"])
+    _, session, opcode, size, request_opcode, burst_complete, _, offset = \
+        struct.unpack(FtpEnum.HEADER_FORMAT.value, payload[:FtpEnum.HEADER_LENGTH.value])
+    data = payload[FtpEnum.HEADER_LENGTH.value:FtpEnum.HEADER_LENGTH.value + size]
+
+    # vehicle could not open the parameter file
+    if ftp_data["stage"] == "open" and request_opcode == FtpEnum.OPEN_FILE_RO.value:
+
+        # vehicle does not support parameter file
+        if opcode != FtpEnum.ACK.value:
+            fallback_ftp()
+            return
+
+        # start reading the parameter file
+        ftp_data["stage"] = "read"
+        ftp_data["session"] = session
+        ftp_data["size"] = struct.unpack("<I", data[0:4])[0]
+        ftp_data["retries"] = 0
+        send_ftp(opcode=FtpEnum.BURST_READ_FILE.value, session=session, offset=0)
+
+    # response to a burst read request
+    elif ftp_data["stage"] == "read" and request_opcode == FtpEnum.BURST_READ_FILE.value:
+
+        # vehicle reached end of file or could not read the file
+        if opcode != FtpEnum.ACK.value:
+
+            # vehicle could not read the file
+            if data[0:1] != bytes([FtpEnum.ERROR_EOF.value]):
+                fallback_ftp()
+                return
+
+            # vehicle can report a placeholder size larger than the file so end of file sets the real size
+            ftp_data["size"] = max([offset, ftp_data["offset"]] + [chunk_offset + len(chunk)
+                                                                   for chunk_offset, chunk in ftp_data["chunks"].items()])
+
+        # store the chunk and advance through received chunks
+        else:
+            ftp_data["chunks"][offset] = data
+            ftp_data["retries"] = 0
+            ftp_data["deadline"] = time.monotonic() + download_retry
+            while ftp_data["offset"] in ftp_data["chunks"] and len(ftp_data["chunks"][ftp_data["offset"]]) > 0:
+                ftp_data["offset"] += len(ftp_data["chunks"][ftp_data["offset"]])
+
+        # all the file is received
+        if ftp_data["offset"] >= ftp_data["size"]:
+
+            # close the session
+            send_ftp(opcode=FtpEnum.TERMINATE_SESSION.value, session=ftp_data["session"])
+
+            # decode the parameter file
+            data = b"".join(chunk for _, chunk in sorted(ftp_data["chunks"].items()))
+            parameters = decode_parameters(data=data[0:ftp_data["size"]])
+
+            # parameter file is corrupted
+            if parameters is None:
+                fallback_ftp()
+                return
+
+            # mark all parameters as received
+            start_download(name="parameter", total=len(parameters), missing=())
+            download_data["parameter"]["first_monotonic"] = ftp_data["first_monotonic"]
+
+            # parameter file is downloaded
+            ftp_data = {}
+
+            # store the parameters
+            for param_id, param_value in parameters:
+                update_parameter(param_id=param_id, param_value=param_value)
+
+            # remove the parameters vehicle does not have anymore
+            prune_parameters(names={param_id for param_id, _ in parameters})
+
+            # cache the parameters
+            finish_download(name="parameter")
+
+        # burst ended before the end of file or chunks before the end of file are missing so continue from the first
+        # missing offset
+        elif burst_complete or opcode != FtpEnum.ACK.value:
+
+            # count the bursts that ended without advancing the first missing offset
+            ftp_data["bursts"] = ftp_data["bursts"] + 1 if ftp_data["burst_offset"] == ftp_data["offset"] else 0
+            ftp_data["burst_offset"] = ftp_data["offset"]
+
+            # vehicle keeps failing to send the missing chunk
+            if ftp_data["bursts"] > FtpEnum.RETRIES.value:
+                fallback_ftp()
+                return
+
+            # continue reading the file
+            send_ftp(opcode=FtpEnum.BURST_READ_FILE.value, session=ftp_data["session"], offset=ftp_data["offset"])
+
+
+# message that contains the heartbeat, we need to send a heartbeat back
+@message_handler(message_id=MessageId.HEARTBEAT.value)
+def handle_heartbeat(message_raw, message_dict):
+    # get global variables
+    global vehicle, heartbeat_message
+
+    # send heartbeat back
+    vehicle.mav.send(heartbeat_message)
+
+
+# message contains the home location
+@message_handler(message_id=MessageId.HOME_POSITION.value)
+def handle_home_position(message_raw, message_dict):
+    # get global variables
+    global vehicle
+
+    # stop requesting home position from vehicle
+    vehicle.mav.command_long_send(target_system=vehicle.target_system,
+                                  target_component=vehicle.target_component,
+                                  command=MessageEnum.MAV_CMD_SET_MESSAGE_INTERVAL.value,
+                                  confirmation=0,
+                                  param1=MessageEnum.HOME_POSITION.value,
+                                  param2=-1,
+                                  param3=0,
+                                  param4=0,
+                                  param5=0,
+                                  param6=0,
+                                  param7=0)
+
+
+# message that request a plan item
+@message_handler(message_id=MessageId.MISSION_REQUEST.value)
+def handle_mission_request(message_raw, message_dict):
+    # get global variables
+    global vehicle, send_plan_data
+
+    # check if this message requests a plan item
+    if message_dict["mission_type"] == MessageEnum.MAV_MISSION_TYPE_MISSION.value:
+
+        # find the plan item
+        for item in send_plan_data:
+
+            # found the plan item
+            if item["seq"] == message_dict["seq"]:
+                # do not go to next item because found it
+                break
+
+        # did not find the item
+        else:
+
+            # skip the message sent routine
+            return
+
+        # send MISSION_ITEM_INT message to the vehicle
+        vehicle.mav.mission_item_int_send(target_system=vehicle.target_system,
+                                          target_component=vehicle.target_component,
+                                          seq=item["seq"],
+                                          frame=item["frame"],
+                                          command=item["command"],
+                                          current=item["current"],
+                                          autocontinue=item["autocontinue"],
+                                          param1=item["param1"],
+                                          param2=item["param2"],
+                                          param3=item["param3"],
+                                          param4=item["param4"],
+                                          x=item["x"],
+                                          y=item["y"],
+                                          z=item["z"],
+                                          mission_type=MessageEnum.MAV_MISSION_TYPE_MISSION.value)
+
+
+# message contains a parameter value
+@message_handler(message_id=MessageId.PARAM_VALUE.value)
+def handle_param_value(message_raw, message_dict):
+    # get global variables
+    global fetch_param, download_data, download_retry, ftp_data
+
+    # parameter hash is not a parameter
+    if message_dict["param_id"] == CacheEnum.HASH_CHECK.value:
+        check_parameter_hash(message_dict=message_dict)
+        return
+
+    # start downloading parameters if this is the first value or total parameter count has changed
+    if fetch_param and not ftp_data and download_data.get("parameter", {}).get("total") != message_dict["param_count"]:
+        start_download(name="parameter", total=message_dict["param_count"], quiet=download_retry)
+
+    # mark parameter index as received to not request this parameter value again
+    received = complete_download(name="parameter", index=message_dict["param_index"])
+
+    # store the parameter value
+    update_parameter(param_id=message_dict["param_id"], param_value=message_dict["param_value"])
+
+    # remember the parameter is sent by vehicle in this download
+    download = download_data.get("parameter")
+    if download is not None:
+        download["names"].add(message_dict["param_id"])
+
+    # cache the parameters if this was the last missing one
+    if received:
+
+        # remove the parameters vehicle does not have anymore once all parameters are received
+        if not download["missing"]:
+            prune_parameters(names=download["names"])
+
+        # cache the parameters
+        finish_download(name="parameter")
+
+
+# message means flight plan on the vehicle has changed
+@message_handler(message_id=MessageId.MISSION_ACK.value)
+def handle_mission_ack(message_raw, message_dict):
+    # get global variables
+    global plan_data, section_version, download_data
+
+    # mission plan is accepted and this acknowledgement is for flight plan
+    if message_dict["mission_type"] == MessageEnum.MAV_MISSION_TYPE_MISSION.value and \
+            message_dict["type"] == MessageEnum.MAV_MISSION_ACCEPTED.value:
+        # clear flight plan related variables
+        plan_data = []
+        section_version["plan"] += 1
+
+        # flight plan will be downloaded again
+        download_data.pop("plan", None)
+        notify_waiters(kind="plan")
+
+        # request total flight plan command count
+        vehicle.mav.mission_request_list_send(vehicle.target_system, vehicle.target_component)
+
+
+# message contains total flight plan items on the vehicle
+@message_handler(message_id=MessageId.MISSION_COUNT.value)
+def handle_mission_count(message_raw, message_dict):
+    # get global variables
+    global vehicle
+    global plan_data, cache_data, section_version
+
+    # check this count is for flight plan
+    if message_dict["mission_type"] == 0:
+        # get flight plan identifier if vehicle supports it
+        opaque_id = message_dict.get("opaque_id", 0)
+
+        # cached flight plan is the same as the one on the vehicle
+        if opaque_id != 0 and opaque_id == cache_data.get("opaque_id") and len(plan_data) == message_dict["count"]:
+            # mark all flight plan commands as received
+            start_download(name="plan", total=message_dict["count"], missing=())
+            notify_waiters(kind="plan")
+
+            # do not proceed further
+            return
+
+        # remember flight plan identifier to cache it
+        cache_data["opaque_id"] = opaque_id
+
+        # clear flight plan related variables unless cached commands will be refreshed in place
+        if len(plan_data) != message_dict["count"]:
+            plan_data = []
+            section_version["plan"] += 1
+
+        # download flight plan commands from vehicle
+        start_download(name="plan", total=message_dict["count"])
+        notify_waiters(kind="plan")
+
+
+# message contains a flight plan item
+@message_handler(message_id=MessageId.MISSION_ITEM_INT.value)
+def handle_mission_item_int(message_raw, message_dict):
+    # get global variables
+    global vehicle
+    global plan_data, section_version
+
+    # check this flight plan command was not populated before
+    if complete_download(name="plan", index=message_dict["seq"]):
+
+        # add flight plan command to plan data
+        store_item(items=plan_data, item=message_dict, key="seq")
+        section_version["plan"] += 1
+        notify_waiters(kind="plan")
+
+        # cache flight plan commands if this was the last missing one
+        finish_download(name="plan")
+
+
+# message contains a fence item
+@message_handler(message_id=MessageId.FENCE_POINT.value)
+def handle_fence_point(message_raw, message_dict):
+    # get global variables
+    global fence_data, section_version
+
+    # check this fence item was not populated before
+    if complete_download(name="fence", index=message_dict["idx"]):
+
+        # add fence item to fence data
+        store_item(items=fence_data, item=message_dict, key="idx")
+        section_version["fence"] += 1
+
+        # cache fence items if this was the last missing one
+        finish_download(name="fence")
+
+
+# message contains a rally item
+@message_handler(message_id=MessageId.RALLY_POINT.value)
+def handle_rally_point(message_raw, message_dict):
+    # get global variables
+    global rally_data, section_version
+
+    # check this rally item was not populated before
+    if complete_download(name="rally", index=message_dict["idx"]):
+
+        # add rally item to rally data
+        store_item(items=rally_data, item=message_dict, key="idx")
+        section_version["rally"] += 1
+
+        # cache rally items if this was the last missing one
+        finish_download(name="rally")
+
+
+# set message and parameter filters, lists to be populated and message drop timeout of the receive loop
+def configure_telemetry(drop, white_message, black_message, white_parameter, black_parameter,
+                        param, plan, fence, rally):
+    # get global variables
+    global message_white_list, message_black_list
+    global parameter_white_list, parameter_black_list
+    global fetch_param, fetch_plan, fetch_fence, fetch_rally
+    global drop_timeout
+
+    # set which lists will be populated from vehicle
+    fetch_param = param
+    fetch_plan = plan
+    fetch_fence = fence
+    fetch_rally = rally
+
+    # zero drop means do not drop non-periodic messages
+    drop_timeout = None if drop == 0 else drop
+
+    # create message white list set used in non-periodic parameter and flight plan related messages
+    message_white_list = set([message.value for message in MessageName])
+
+    # parse message white list based on user requirements
+    if white_message != "":
+        message_white_list = message_white_list | {x for x in white_message.replace(" ", "").split(",")}
+
+    # parse message black list based on user requirements
+    message_black_list = set() if black_message == "" else {x for x in black_message.replace(" ", "").split(",")}
+
+    # create parameter white list
+    parameter_white_list = set([parameter.value for parameter in ParameterName])
+
+    # parse parameter white list based on user requirements
+    if white_parameter != "":
+        parameter_white_list = parameter_white_list | {x for x in white_parameter.replace(" ", "").split(",")}
+
+    # parse parameter black list based on user requirements
+    parameter_black_list = set() if black_parameter == "" else {x for x in black_parameter.replace(" ", "").split(",")}
+
+    # remove messages and parameters that are not allowed by the lists
+    apply_message_filter()
+    apply_parameter_filter()
+
+
+# layout of the latest values of a message type that comes from the dialect definition of the message
+class MessageLayout:
+    # keep layouts compact
+    __slots__ = ("names", "index", "read", "text")
+
+    # create the layout of a message type from a decoded message
+    def __init__(self, message_raw):
+        # get field names of the message in definition order
+        self.names = tuple(message_raw.fieldnames)
+
+        # get slot position of each field
+        self.index = {field_name: position for position, field_name in enumerate(self.names)}
+
+        # read all fields with a single call, a single field getter does not return a tuple
+        self.read = operator.attrgetter(*self.names) if len(self.names) > 1 else \
+            (lambda message, names=self.names: tuple(getattr(message, field_name) for field_name in names))
+
+        # get positions of character array fields which are converted to text like to_dict does
+        self.text = tuple(position for position, field_type in enumerate(message_raw.fieldtypes) if field_type == "char")
+
+
+# statistics of a message stored in slots, readers see it as a read only mapping
+class MessageStatistics(collections.abc.Mapping):
+    # keep statistics compact, slots are in the order of the serialized keys
+    __slots__ = ("counter", "latency", "first", "first_monotonic", "last", "last_monotonic",
+                 "duration", "instant_frequency", "average_frequency")
+
+    # initiate statistics with the first reception of the message
+    def __init__(self, time_now, time_monotonic):
+        self.counter = 1
+        self.latency = 0
+        self.first = time_now
+        self.first_monotonic = time_monotonic
+        self.last = time_now
+        self.last_monotonic = time_monotonic
+        self.duration = 0
+        self.instant_frequency = 0
+        self.average_frequency = 0
+
+    # get a statistic by name
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    # iterate statistic names
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    # get statistic count
+    def __len__(self):
+        return len(self.__slots__)
+
+    # convert statistics to a dictionary at serialization
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+# latest values of a message stored in a slot for each field of its layout, readers see it as a read only mapping
+class MessageRecord(collections.abc.Mapping):
+    # keep records compact
+    __slots__ = ("layout", "values", "statistics")
+
+    # create an empty record of a message type
+    def __init__(self, layout):
+        self.layout = layout
+        self.values = (None,) * len(layout.names)
+        self.statistics = None
+
+    # get a field value or statistics by name
+    def __getitem__(self, key):
+        position = self.layout.index.get(key)
+        if position is not None:
+            return self.values[position]
+        if key == "statistics" and self.statistics is not None:
+            return self.statistics
+        raise KeyError(key)
+
+    # check a field or statistics exists
+    def __contains__(self, key):
+        return key in self.layout.index or (key == "statistics" and self.statistics is not None)
+
+    # iterate field names and statistics
+    def __iter__(self):
+        yield from self.layout.names
+        if self.statistics is not None:
+            yield "statistics"
+
+    # get field count with statistics
+    def __len__(self):
+        return len(self.layout.names) + (self.statistics is not None)
+
+    # convert the record to a dictionary in the shape to_dict creates at serialization
+    def to_dict(self):
+        result = dict(zip(self.layout.names, self.values))
+        if self.statistics is not None:
+            result["statistics"] = self.statistics.to_dict()
+        return result
+
+
+# convert stored message records to dictionaries when they are serialized
+def serialize_record(value):
+    # convert message records and statistics
+    if isinstance(value, (MessageRecord, MessageStatistics)):
+        return value.to_dict()
+
+    # other types are not serializable
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+# process a message received from vehicle, this is all the per message work of the receive loop after receiving
+def process_telemetry(message_raw, time_now, time_monotonic):
+    # get global variables
+    global message_white_list, message_black_list, default_message_list_length
+    global message_data, message_enumeration, message_index, message_layouts, message_version, section_version
+    global statistics_data, hold_statistics, fetch_param, fetch_plan
+    global drop_heap, drop_scheduled, drop_timeout
+    global subscriber_data, waiter_events, history_messages, recorder_queue, recorder_limit, recorder_event
+
+    # user requested to hold statistics
+    if hold_statistics:
+
+        # vehicle statistics are changed
+        section_version["statistics"] += 1
+
+        # create vehicle statistics
+        if "statistics" not in statistics_data["vehicle"].keys():
+
+            # initiate statistics data
+            statistics_data["vehicle"]["statistics"] = {}
+            statistics_data["vehicle"]["statistics"]["counter"] = 2 if fetch_param or fetch_plan else 1
+            statistics_data["vehicle"]["statistics"]["latency"] = 0
+            statistics_data["vehicle"]["statistics"]["first"] = time_now
+            statistics_data["vehicle"]["statistics"]["first_monotonic"] = time_monotonic
+            statistics_data["vehicle"]["statistics"]["last"] = time_now
+            statistics_data["vehicle"]["statistics"]["last_monotonic"] = time_monotonic
+            statistics_data["vehicle"]["statistics"]["duration"] = 0
+            statistics_data["vehicle"]["statistics"]["instant_frequency"] = 0
+            statistics_data["vehicle"]["statistics"]["average_frequency"] = 0
+
+        # update vehicle statistics
+        else:
+
+            # update statistics data
+            statistics_data["vehicle"]["statistics"]["counter"] += 1
+            latency = time_monotonic - statistics_data["vehicle"]["statistics"]["last_monotonic"]
+            first_monotonic = statistics_data["vehicle"]["statistics"]["first_monotonic"]
+            duration = time_monotonic - first_monotonic
+            instant_frequency = 1.0 / latency if latency != 0.0 else 0.0
+            counter = statistics_data["vehicle"]["statistics"]["counter"]
+            average_frequency = counter / duration if duration != 0.0 else 0
+            statistics_data["vehicle"]["statistics"]["latency"] = latency
+            statistics_data["vehicle"]["statistics"]["last"] = time_now
+            statistics_data["vehicle"]["statistics"]["last_monotonic"] = time_monotonic
+            statistics_data["vehicle"]["statistics"]["duration"] = duration
+            statistics_data["vehicle"]["statistics"]["instant_frequency"] = instant_frequency
+            statistics_data["vehicle"]["statistics"]["average_frequency"] = average_frequency
+
+    # get message name
+    message_name = message_raw.get_type()
+
+    # hand the raw message to the telemetry log recorder without waiting for the disk
+    if recorder_queue is not None and message_name != MessageName.BAD_DATA.value:
+
+        # queue the raw message if the recorder keeps up with the messages
+        if len(recorder_queue) < recorder_limit:
+            recorder_queue.append((time_now, message_raw.get_msgbuf()))
+
+            # wake up the recorder early when the queue is half full
+            if len(recorder_queue) == recorder_limit // 2:
+                recorder_event.set()
 
-    # get the request
-    request = flask.request.json
+        # count the message the recorder could not keep up with
+        else:
+            statistics_data["recorder"]["dropped"] += 1
 
-    # create response
-    response = {"command": f"set_{argument}".upper(), "valid": False, "sent": False}
+    # do not proceed if message is in the black list
+    if message_name in message_black_list:
+        return
 
-    # check argument is white message list
-    if argument == "white_message":
+    # do not proceed if message is not in the white list
+    if len(message_white_list) > default_message_list_length and message_name not in message_white_list:
+        return
 
-        # try to validate the request
-        if isinstance(request, list):
-            request = set(request)
+    # discard bad data
+    if message_name == MessageName.BAD_DATA.value:
+        return
 
-            # validation is successful
-            response["valid"] = True
+    # discard unknown messages
+    if message_name.startswith(MessageName.UNKNOWN.value):
+        return
 
-        # message should not be in helper message class
-        if response["valid"]:
-            default_messages = [message.value for message in MessageName]
-            for message in request:
-                if message in default_messages:
-                    response["valid"] = False
-                    break
+    # get the layout of this message type, create it once from the dialect definition
+    layout = message_layouts.get(message_name)
+    if layout is None:
+        layout = message_layouts[message_name] = MessageLayout(message_raw=message_raw)
 
-        # check validity
-        if response["valid"]:
-            # set white and black message lists
-            message_white_list = set().union(set([message.value for message in MessageName]), request)
-            message_black_list = set()
+    # get the record of this message, create it if this ordinary message not populated before
+    record = message_data.get(message_name)
+    if record is None:
+        record = message_data[message_name] = MessageRecord(layout=layout)
 
-            # message sent to api
-            response["sent"] = True
+    # read all fields of the message at once
+    field_values = layout.read(message_raw)
 
-    # check argument is black message list
-    elif argument == "black_message":
+    # convert character array fields to text like to_dict does
+    if layout.text:
+        field_values = list(field_values)
+        for position in layout.text:
+            field_values[position] = message_raw.format_attr(layout.names[position])
 
-        # try to validate the request
-        if isinstance(request, list):
-            request = set(request)
+    # replace the field values at once, readers holding the previous values keep a consistent snapshot
+    record.values = field_values
+    section_version["message"] += 1
+    message_version[message_name] = section_version["message"]
 
-            # validation is successful
-            response["valid"] = True
+    # get message id of this message
+    message_id = message_raw.get_msgId()
 
-        # message should not be in helper message class
-        if response["valid"]:
-            default_messages = [message.value for message in MessageName]
-            for message in request:
-                if message in default_messages:
-                    response["valid"] = False
-                    break
+    # notify subscribers about the message update
+    if subscriber_data:
+        publish_message(message_name=message_name, message_id=message_id, time_monotonic=time_monotonic)
 
-        # check validity
-        if response["valid"]:
-            # set white and black message lists
-            message_white_list = set([message.value for message in MessageName])
-            message_black_list = request.difference(message_white_list)
+    # wake up the clients waiting for this message update
+    if waiter_events:
+        notify_waiters(kind="message", name=message_name)
 
-            # message sent to api
-            response["sent"] = True
+    # record the message to its history if user requested history of this message
+    if message_name in history_messages:
+        record_history(message_name=message_name, message_raw=message_raw, time_now=time_now)
 
-    # check argument is white parameter list
-    elif argument == "white_parameter":
+    # add message id of this message to message enumeration list and message id index once
+    if message_id not in message_index:
+        message_enumeration[message_name] = message_id
+        message_index[message_id] = message_name
 
-        # try to validate the request
-        if isinstance(request, list):
-            request = set(request)
+    # user requested to hold statistics
+    if hold_statistics:
 
-            # validation is successful
-            response["valid"] = True
+        # get statistics of this message
+        statistics = record.statistics
 
-        # parameter should not be in helper parameter class
-        if response["valid"]:
-            default_parameters = [parameter.value for parameter in ParameterName]
-            for parameter in request:
-                if parameter in default_parameters:
-                    response["valid"] = False
-                    break
+        # this message is populated for the first time
+        if statistics is None:
 
-        # check validity
-        if response["valid"]:
+            # initiate statistics data for this message
+            record.statistics = MessageStatistics(time_now=time_now, time_monotonic=time_monotonic)
 
-            # set white and black parameter lists
-            parameter_white_list = set().union(set([parameter.value for parameter in ParameterName]), request)
-            parameter_black_list = set()
+        # this message was populated before
+        else:
 
-            # check if vehicle is alive
-            if vehicle_connected:
-                # request parameter list from vehicle
-                vehicle.mav.param_request_list_send(vehicle.target_system, vehicle.target_component)
+            # update statistics data for this message
+            statistics.counter += 1
+            latency = time_monotonic - statistics.last_monotonic
+            duration = time_monotonic - statistics.first_monotonic
+            instant_frequency = 1.0 / latency if latency != 0.0 else 0.0
+            average_frequency = statistics.counter / duration if duration != 0.0 else 0
+            statistics.latency = latency
+            statistics.last = time_now
+            statistics.last_monotonic = time_monotonic
+            statistics.duration = duration
+            statistics.instant_frequency = instant_frequency
+            statistics.average_frequency = average_frequency
 
-            # message sent to api
-            response["sent"] = True
+    # user requested to drop non-periodic messages
+    if drop_timeout and hold_statistics:
 
-    # check argument is black parameter list
-    elif argument == "black_parameter":
+        # schedule a drop deadline for this message if it does not have one
+        if message_name not in drop_scheduled:
+            drop_scheduled.add(message_name)
+            heapq.heappush(drop_heap, (time_monotonic + drop_timeout, message_name))
 
-        # try to validate the request
-        if isinstance(request, list):
-            request = set(request)
+        # check messages whose drop deadline has passed
+        while drop_heap[0][0] < time_monotonic:
 
-            # validation is successful
-            response["valid"] = True
+            # get the message with the earliest drop deadline
+            _, expired_name = heapq.heappop(drop_heap)
 
-        # parameter should not be in helper parameter class
-        if response["valid"]:
-            default_parameters = [parameter.value for parameter in ParameterName]
-            for parameter in request:
-                if parameter in default_parameters:
-                    response["valid"] = False
-                    break
+            # get the last time this message was received
+            last_monotonic = message_data[expired_name].statistics.last_monotonic \
+                if expired_name in message_data.keys() else None
 
-        # check validity
-        if response["valid"]:
-            # set white and black parameter lists
-            parameter_white_list = set([parameter.value for parameter in ParameterName])
-            parameter_black_list = request.difference_update(parameter_white_list)
+            # message was received after its deadline was scheduled so postpone the deadline
+            if last_monotonic is not None and time_monotonic - last_monotonic <= drop_timeout:
+                heapq.heappush(drop_heap, (last_monotonic + drop_timeout, expired_name))
 
-            # message sent to api
-            response["sent"] = True
+            # message is not received within drop seconds so drop it
+            else:
+                message_data.pop(expired_name, None)
+                drop_scheduled.discard(expired_name)
+                message_version.pop(expired_name, None)
+                section_version["message"] += 1
 
-    # expose the response
-    return flask.jsonify(response)
+    # get handler of this message if there is any
+    handler = message_handlers.get(message_id)
 
+    # message needs special handling
+    if handler is not None:
+        # create message dictionary for the handler from the fields that are already read
+        message_dict = dict(zip(layout.names, field_values))
 
-# deal with the malicious requests
-@application.errorhandler(code_or_exception=404)
-def page_not_found(error):
-    # expose an empty response
-    return flask.jsonify({})
+        # handle the message
+        handler(message_raw, message_dict)
+
+        # do not proceed further
+        return
 
 
 # connect to vehicle and parse messages
 def receive_telemetry(master, timeout, drop, rate,
                       white_message, black_message, white_parameter, black_parameter,
-                      param, plan, fence, rally, reset, request, home):
+                      param, plan, fence, rally, reset, request, home, event, budget_count, budget_time):
     # get global variables
     global message_white_list, message_black_list
     global parameter_white_list, parameter_black_list
-    global vehicle, vehicle_connected
-    global message_data, message_enumeration
-    global parameter_data, parameter_count_total, parameter_count
-    global plan_data, plan_count_total, plan_count
-    global fence_data, fence_count_total, fence_count
-    global rally_data, rally_count_total, rally_count
+    global vehicle, vehicle_connected, vehicle_component
+    global message_data, message_enumeration, message_index
+    global parameter_data, plan_data, fence_data, rally_data
     global send_plan_data, send_fence_data, send_rally_data
     global statistics_data, hold_statistics
     global default_parameter_list_length, default_message_list_length
-    global heartbeat_message
+    global fetch_param, fetch_plan, fetch_fence, fetch_rally, fetch_ftp
+    global drop_heap, drop_scheduled
+    global cache_vehicle, cache_data, download_retry, section_version, message_version
+    global subscriber_data, waiter_events, history_messages, recorder_queue, recorder_limit, recorder_event
+    global replay_speed
+
+    # set message and parameter filters, lists to be populated and message drop timeout
+    configure_telemetry(drop=drop, white_message=white_message, black_message=black_message,
+                        white_parameter=white_parameter, black_parameter=black_parameter,
+                        param=param, plan=plan, fence=fence, rally=rally)
 
     # zero time out means do not time out
     if timeout == 0:
         timeout = None
 
-    # zero drop means do not drop non-periodic messages
-    if drop == 0:
-        drop = None
-
-    # create message white list set used in non-periodic parameter and flight plan related messages
-    message_white_list = set([message.value for message in MessageName])
-
-    # parse message white list based on user requirements
-    if white_message != "":
-        message_white_list = message_white_list | {x for x in white_message.replace(" ", "").split(",")}
-
-    # parse message black list based on user requirements
-    message_black_list = set() if black_message == "" else {x for x in black_message.replace(" ", "").split(",")}
-
-    # create parameter white list
-    parameter_white_list = set([parameter.value for parameter in ParameterName])
-
-    # parse parameter white list based on user requirements
-    if white_parameter != "":
-        parameter_white_list = parameter_white_list | {x for x in white_parameter.replace(" ", "").split(",")}
+    # expose time slice budget of the receive loop
+    statistics_data["scheduler"]["budget_count"] = budget_count
+    statistics_data["scheduler"]["budget_time"] = budget_time
 
-    # parse parameter black list based on user requirements
-    parameter_black_list = set() if black_parameter == "" else {x for x in black_parameter.replace(" ", "").split(",")}
+    # convert time slice budget from microseconds to seconds
+    budget_time = budget_time * 1e-6
 
     # infinite connection loop
     while True:
@@ -1468,12 +4736,17 @@ def receive_telemetry(master, timeout, drop, rate,
         # try to connect to vehicle
         try:
 
+            # replay a telemetry log file as vehicle
+            if os.path.isfile(master):
+                vehicle = ReplayConnection(path=master, speed=replay_speed, timeout=timeout)
+
             # connect to vehicle
-            vehicle = utility.mavlink_connection(device=master,
-                                                 autoreconnect=True,
-                                                 force_connected=True,
-                                                 udp_timeout=timeout,
-                                                 timeout=timeout)
+            else:
+                vehicle = utility.mavlink_connection(device=master,
+                                                     autoreconnect=True,
+                                                     force_connected=True,
+                                                     udp_timeout=timeout,
+                                                     timeout=timeout)
 
             # wait until vehicle connection is assured
             heartbeat = vehicle.wait_heartbeat(blocking=True, timeout=timeout)
@@ -1483,6 +4756,9 @@ def receive_telemetry(master, timeout, drop, rate,
                 # do not proceed further
                 continue
 
+            # get component id of the vehicle since connection does not set it from heartbeat
+            vehicle_component = heartbeat.get_srcComponent()
+
             # set connection flag
             vehicle_connected = True
 
@@ -1502,7 +4778,7 @@ def receive_telemetry(master, timeout, drop, rate,
                 pass
 
             # sleep for timeout seconds
-            gevent.sleep(timeout)
+            gevent.sleep(timeout if timeout is not None else 1)
 
             # do not proceed further
             continue
@@ -1559,10 +4835,20 @@ def receive_telemetry(master, timeout, drop, rate,
                                               param6=0,
                                               param7=0)
 
+        # user requested to serve cached lists of the vehicle until they are verified
+        if cache_vehicle:
+            load_vehicle_cache()
+
+        # user requested to populate parameter list and cached parameters can be verified by their hash
+        if param and cache_data.get("hash") is not None:
+            # request parameter hash from vehicle
+            cache_data["check"] = time.monotonic() + CacheEnum.HASH_TIMEOUT.value * download_retry
+            request_parameter_hash()
+
         # user requested to populate parameter list
-        if param:
-            # request parameter list from vehicle
-            vehicle.mav.param_request_list_send(vehicle.target_system, vehicle.target_component)
+        elif param:
+            # request parameter file or list from vehicle
+            fetch_parameters()
 
         # user requested to populate flight plan
         if plan:
@@ -1572,6 +4858,10 @@ def receive_telemetry(master, timeout, drop, rate,
         # get monotonic timestamp for timeout
         last_message_monotonic = time.monotonic()
 
+        # start a time slice for the receive loop
+        slice_counter = 0
+        slice_monotonic = last_message_monotonic
+
         # infinite message parsing loop
         while True:
 
@@ -1579,8 +4869,11 @@ def receive_telemetry(master, timeout, drop, rate,
             time_monotonic = time.monotonic()
             time_now = time.time()
 
+            # calculate the deadline of the connection, none means do not time out
+            deadline = None if timeout is None else last_message_monotonic + timeout
+
             # check timeout should occur or not
-            if time_monotonic - last_message_monotonic > timeout:
+            if deadline is not None and time_monotonic > deadline:
 
                 # reset connection flag
                 vehicle_connected = False
@@ -1600,6 +4893,20 @@ def receive_telemetry(master, timeout, drop, rate,
                 # break the inner loop
                 break
 
+            # time slice budget of the receive loop is exhausted
+            if (budget_count and slice_counter >= budget_count) or \
+                    (budget_time and time_monotonic - slice_monotonic >= budget_time):
+                # yield to the hub
+                yield_telemetry(connection=vehicle)
+
+                # get timestamps after yielding
+                time_monotonic = time.monotonic()
+                time_now = time.time()
+
+                # start a new time slice
+                slice_counter = 0
+                slice_monotonic = time_monotonic
+
             # try to receive message from vehicle
             try:
 
@@ -1614,377 +4921,38 @@ def receive_telemetry(master, timeout, drop, rate,
 
             # do not proceed to message parsing if no message received from vehicle within specified time
             if message_raw is None:
-                # cool down the message receiving
-                gevent.sleep(0.01)
-
-                # continue to next step of the loop
-                continue
-
-            # update monotonic timestamp for timeout
-            last_message_monotonic = time_monotonic
-
-            # set connection flag
-            vehicle_connected = True
-
-            # user requested to hold statistics
-            if hold_statistics:
-
-                # create vehicle statistics
-                if "statistics" not in statistics_data["vehicle"].keys():
-
-                    # initiate statistics data
-                    statistics_data["vehicle"]["statistics"] = {}
-                    statistics_data["vehicle"]["statistics"]["counter"] = 2 if param or plan else 1
-                    statistics_data["vehicle"]["statistics"]["latency"] = 0
-                    statistics_data["vehicle"]["statistics"]["first"] = time_now
-                    statistics_data["vehicle"]["statistics"]["first_monotonic"] = time_monotonic
-                    statistics_data["vehicle"]["statistics"]["last"] = time_now
-                    statistics_data["vehicle"]["statistics"]["last_monotonic"] = time_monotonic
-                    statistics_data["vehicle"]["statistics"]["duration"] = 0
-                    statistics_data["vehicle"]["statistics"]["instant_frequency"] = 0
-                    statistics_data["vehicle"]["statistics"]["average_frequency"] = 0
-
-                # update vehicle statistics
-                else:
-
-                    # update statistics data
-                    statistics_data["vehicle"]["statistics"]["counter"] += 1
-                    latency = time_monotonic - statistics_data["vehicle"]["statistics"]["last_monotonic"]
-                    first_monotonic = statistics_data["vehicle"]["statistics"]["first_monotonic"]
-                    duration = time_monotonic - first_monotonic
-                    instant_frequency = 1.0 / latency if latency != 0.0 else 0.0
-                    counter = statistics_data["vehicle"]["statistics"]["counter"]
-                    average_frequency = counter / duration if duration != 0.0 else 0
-                    statistics_data["vehicle"]["statistics"]["latency"] = latency
-                    statistics_data["vehicle"]["statistics"]["last"] = time_now
-                    statistics_data["vehicle"]["statistics"]["last_monotonic"] = time_monotonic
-                    statistics_data["vehicle"]["statistics"]["duration"] = duration
-                    statistics_data["vehicle"]["statistics"]["instant_frequency"] = instant_frequency
-                    statistics_data["vehicle"]["statistics"]["average_frequency"] = average_frequency
-
-            # convert raw message to dictionary
-            message_dict = message_raw.to_dict()
-
-            # get and pop message name from message dictionary
-            message_name = message_dict.pop("mavpackettype")
-
-            # do not proceed if message is in the black list
-            if message_name in message_black_list:
-                continue
-
-            # do not proceed if message is not in the white list
-            if len(message_white_list) > default_message_list_length and message_name not in message_white_list:
-                continue
-
-            # discard bad data
-            if message_name == MessageName.BAD_DATA.value:
-                continue
-
-            # discard unknown messages
-            if message_name.startswith(MessageName.UNKNOWN.value):
-                continue
-
-            # create a message field in message data if this ordinary message not populated before
-            if message_name not in message_data.keys():
-                message_data[message_name] = {}
-
-            # update message fields with new fetched data
-            message_data[message_name] = {**message_data[message_name], **message_dict}
-
-            # get message id of this message
-            message_id = message_raw.get_msgId()
-
-            # add message id of this message to message enumeration list
-            message_enumeration[message_name] = message_id
-
-            # user requested to hold statistics
-            if hold_statistics:
 
-                # this message is populated for the first time
-                if "statistics" not in message_data[message_name].keys():
+                # user requested to wait for incoming data
+                if event:
 
-                    # initiate statistics data for this message
-                    message_data[message_name]["statistics"] = {}
-                    message_data[message_name]["statistics"]["counter"] = 1
-                    message_data[message_name]["statistics"]["latency"] = 0
-                    message_data[message_name]["statistics"]["first"] = time_now
-                    message_data[message_name]["statistics"]["first_monotonic"] = time_monotonic
-                    message_data[message_name]["statistics"]["last"] = time_now
-                    message_data[message_name]["statistics"]["last_monotonic"] = time_monotonic
-                    message_data[message_name]["statistics"]["duration"] = 0
-                    message_data[message_name]["statistics"]["instant_frequency"] = 0
-                    message_data[message_name]["statistics"]["average_frequency"] = 0
+                    # wait for incoming data until the connection deadline
+                    wait_vehicle(connection=vehicle,
+                                 timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
 
-                # this message was populated before
+                # user requested to poll the connection
                 else:
 
-                    # update statistics data for this message
-                    message_data[message_name]["statistics"]["counter"] += 1
-                    latency = time_monotonic - message_data[message_name]["statistics"]["last_monotonic"]
-                    first_monotonic = message_data[message_name]["statistics"]["first_monotonic"]
-                    duration = time_monotonic - first_monotonic
-                    instant_frequency = 1.0 / latency if latency != 0.0 else 0.0
-                    counter = message_data[message_name]["statistics"]["counter"]
-                    average_frequency = counter / duration if duration != 0.0 else 0
-                    message_data[message_name]["statistics"]["latency"] = latency
-                    message_data[message_name]["statistics"]["last"] = time_now
-                    message_data[message_name]["statistics"]["last_monotonic"] = time_monotonic
-                    message_data[message_name]["statistics"]["duration"] = duration
-                    message_data[message_name]["statistics"]["instant_frequency"] = instant_frequency
-                    message_data[message_name]["statistics"]["average_frequency"] = average_frequency
-
-            # message that contains the heartbeat, we need to send a heartbeat back
-            if message_name == MessageName.HEARTBEAT.value:
-                # send heartbeat back
-                vehicle.mav.send(heartbeat_message)
-
-                # do not proceed further
-                continue
-
-            # message contains the home location
-            if message_name == MessageName.HOME_POSITION.value:
-                # stop requesting home position from vehicle
-                vehicle.mav.command_long_send(target_system=vehicle.target_system,
-                                              target_component=vehicle.target_component,
-                                              command=MessageEnum.MAV_CMD_SET_MESSAGE_INTERVAL.value,
-                                              confirmation=0,
-                                              param1=MessageEnum.HOME_POSITION.value,
-                                              param2=-1,
-                                              param3=0,
-                                              param4=0,
-                                              param5=0,
-                                              param6=0,
-                                              param7=0)
-
-                # do not proceed further
-                continue
-
-            # message that request a plan item
-            if message_name == MessageName.MISSION_REQUEST.value:
-
-                # check if this message requests a plan item
-                if message_dict["mission_type"] == MessageEnum.MAV_MISSION_TYPE_MISSION.value:
-
-                    # find the plan item
-                    for item in send_plan_data:
-
-                        # found the plan item
-                        if item["seq"] == message_dict["seq"]:
-                            # do not go to next item because found it
-                            break
-
-                    # did not find the item
-                    else:
-
-                        # skip the message sent routine
-                        continue
-
-                    # send MISSION_ITEM_INT message to the vehicle
-                    vehicle.mav.mission_item_int_send(target_system=vehicle.target_system,
-                                                      target_component=vehicle.target_component,
-                                                      seq=item["seq"],
-                                                      frame=item["frame"],
-                                                      command=item["command"],
-                                                      current=item["current"],
-                                                      autocontinue=item["autocontinue"],
-                                                      param1=item["param1"],
-                                                      param2=item["param2"],
-                                                      param3=item["param3"],
-                                                      param4=item["param4"],
-                                                      x=item["x"],
-                                                      y=item["y"],
-                                                      z=item["z"],
-                                                      mission_type=MessageEnum.MAV_MISSION_TYPE_MISSION.value)
-
-                # do not proceed further
-                continue
-
-            # message contains a parameter value
-            if message_name == MessageName.PARAM_VALUE.value:
-
-                # update total parameter count
-                parameter_count_total = message_dict["param_count"]
-
-                # add parameter index to parameter count list to not request this parameter value again
-                parameter_count.add(message_dict["param_index"])
-
-                # do not proceed if parameter is in the black list
-                if message_dict["param_id"] in parameter_black_list:
-                    continue
+                    # cool down the message receiving
+                    gevent.sleep(0.01)
 
-                # do not proceed if parameter is not in the white list
-                if len(parameter_white_list) > default_parameter_list_length and \
-                        message_dict["param_id"] not in parameter_white_list:
-                    continue
+                # waiting yielded to the hub so start a new time slice
+                slice_counter = 0
+                slice_monotonic = time.monotonic()
 
-                # get the parameter value
-                parameter_data[message_dict["param_id"]] = message_dict["param_value"]
-
-                # update fence count
-                if message_dict["param_id"] == ParameterName.FENCE_TOTAL.value:
-                    # clear fence related variables
-                    fence_data = []
-                    fence_count = set()
-                    fence_count_total = int(message_dict["param_value"])
-
-                    # request first fence item from vehicle
-                    vehicle.mav.fence_fetch_point_send(vehicle.target_system, vehicle.target_component, 0)
-
-                # update rally count
-                elif message_dict["param_id"] == ParameterName.RALLY_TOTAL.value:
-                    # clear rally related variables
-                    rally_data = []
-                    rally_count = set()
-                    rally_count_total = int(message_dict["param_value"])
-
-                    # request first rally item from vehicle
-                    vehicle.mav.rally_fetch_point_send(vehicle.target_system, vehicle.target_component, 0)
-
-                # update system id
-                elif message_dict["param_id"] == ParameterName.SYSID_THISMAV.value:
-                    vehicle.source_system = int(message_dict["param_value"])
-
-                # do not proceed further
-                continue
-
-            # there are still unpopulated parameter values so request them
-            if param and parameter_count_total != len(parameter_data):
-                for i in range(parameter_count_total):
-                    if i not in parameter_count:
-                        vehicle.mav.param_request_read_send(vehicle.target_system, vehicle.target_component, b"", i)
-                        break
-
-            # message means flight plan on the vehicle has changed
-            if message_name == MessageName.MISSION_ACK.value:
-
-                # mission plan is accepted and this acknowledgement is for flight plan
-                if message_dict["mission_type"] == MessageEnum.MAV_MISSION_TYPE_MISSION.value and \
-                        message_dict["type"] == MessageEnum.MAV_MISSION_ACCEPTED.value:
-                    # clear flight plan related variables
-                    plan_data = []
-                    plan_count = set()
-                    plan_count_total = 0
-
-                    # request total flight plan command count
-                    vehicle.mav.mission_request_list_send(vehicle.target_system, vehicle.target_component)
-
-                # do not proceed further
-                continue
-
-            # message contains total flight plan items on the vehicle
-            if message_name == MessageName.MISSION_COUNT.value:
-
-                # check this count is for flight plan
-                if message_dict["mission_type"] == 0:
-                    # clear flight plan related variables
-                    plan_data = []
-                    plan_count = set()
-                    plan_count_total = message_dict["count"]
-
-                    # request first flight plan command from vehicle
-                    vehicle.mav.mission_request_int_send(vehicle.target_system, vehicle.target_component, 0)
-
-                # do not proceed further
-                continue
-
-            # message contains a flight plan item
-            if message_name == MessageName.MISSION_ITEM_INT.value:
-
-                # check this flight plan command was not populated before
-                if message_dict["seq"] not in plan_count:
-
-                    # add flight plan command to plan data
-                    plan_data.append(message_dict)
-
-                    # add flight plan command to plan count list to no request this again
-                    plan_count.add(message_dict["seq"])
-
-                    # request the next flight plan commands if there are any
-                    if message_dict["seq"] < plan_count_total - 1:
-                        seq = message_dict["seq"] + 1
-                        vehicle.mav.mission_request_int_send(vehicle.target_system, vehicle.target_component, seq)
-
-                # do not proceed further
-                continue
-
-            # there are still unpopulated flight plan commands so request them
-            if plan and plan_count_total != len(plan_count):
-                for i in range(plan_count_total):
-                    if i not in plan_count:
-                        vehicle.mav.mission_request_int_send(vehicle.target_system, vehicle.target_component, i)
-                        break
-
-            # message contains a fence item
-            if message_name == MessageName.FENCE_POINT.value:
-
-                # check this fence item was not populated before
-                if message_dict["idx"] not in fence_count:
-
-                    # add fence item to fence data
-                    fence_data.append(message_dict)
-
-                    # add fence item to fence count list to no request this again
-                    fence_count.add(message_dict["idx"])
-
-                    # request the next fence item if there are any
-                    if message_dict["idx"] < fence_count_total - 1:
-                        idx = message_dict["idx"] + 1
-                        vehicle.mav.fence_fetch_point_send(vehicle.target_system, vehicle.target_component, idx)
-
-                # do not proceed further
-                continue
-
-            # there are still unpopulated fence items so request them
-            if fence and fence_count_total != len(fence_count):
-                for i in range(fence_count_total):
-                    if i not in fence_count:
-                        vehicle.mav.fence_fetch_point_send(vehicle.target_system, vehicle.target_component, i)
-                        break
-
-            # message contains a rally item
-            if message_name == MessageName.RALLY_POINT.value:
-
-                # check this rally item was not populated before
-                if message_dict["idx"] not in rally_count:
-
-                    # add rally item to rally data
-                    rally_data.append(message_dict)
-
-                    # add rally item to rally count list to no request this again
-                    rally_count.add(message_dict["idx"])
-
-                    # request the next rally item if there are any
-                    if message_dict["idx"] < rally_count_total - 1:
-                        idx = message_dict["idx"] + 1
-                        vehicle.mav.rally_fetch_point_send(vehicle.target_system, vehicle.target_component, idx)
-
-                # do not proceed further
+                # continue to next step of the loop
                 continue
 
-            # there are still unpopulated rally items so request them
-            if rally and rally_count_total != len(rally_count):
-                for i in range(rally_count_total):
-                    if i not in rally_count:
-                        vehicle.mav.rally_fetch_point_send(vehicle.target_system, vehicle.target_component, i)
-                        break
+            # count this message against the time slice budget
+            slice_counter += 1
 
-            # drop non-periodic messages if user requested
-            if drop and hold_statistics:
-                for message_name in list(message_data.keys()):
-                    if time_monotonic - message_data[message_name]["statistics"]["last_monotonic"] > drop:
-                        message_data.pop(message_name)
+            # update monotonic timestamp for timeout
+            last_message_monotonic = time_monotonic
 
-            # update message data
-            for message in list(message_data.keys()):
-                if len(message_white_list) > default_message_list_length:
-                    if message not in message_white_list or message in message_black_list:
-                        del message_data[message]
+            # set connection flag
+            vehicle_connected = True
 
-            # update parameter data
-            for parameter in list(parameter_data.keys()):
-                if len(parameter_white_list) > default_parameter_list_length:
-                    if parameter not in parameter_white_list or parameter in parameter_black_list:
-                        del parameter_data[parameter]
+            # process the received message
+            process_telemetry(message_raw=message_raw, time_now=time_now, time_monotonic=time_monotonic)
 
 
 @click.command()
@@ -1993,7 +4961,7 @@ def receive_telemetry(master, timeout, drop, rate,
 @click.option("--port", default=2609, type=click.IntRange(min=0, max=65535), required=False,
               help="Pymavrest server port number.")
 @click.option("--master", default="tcp:127.0.0.1:5760", type=click.STRING, required=False,
-              help="Standard MAVLink connection string.")
+              help="Standard MAVLink connection string or telemetry log file to replay.")
 @click.option("--timeout", default=5, type=click.FloatRange(min=0, clamp=True), required=False,
               help="Try to reconnect after this seconds when no message is received, zero means do not reconnect")
 @click.option("--drop", default=0, type=click.FloatRange(min=0, clamp=True), required=False,
@@ -2028,11 +4996,88 @@ def receive_telemetry(master, timeout, drop, rate,
               help="Hold statistics.")
 @click.option("--home", default=True, type=click.BOOL, required=False,
               help="Request home.")
+@click.option("--event", default=True, type=click.BOOL, required=False,
+              help="Wait for incoming data on the connection instead of polling it.")
+@click.option("--vehicle_cache", default=True, type=click.BOOL, required=False,
+              help="Cache parameters, plan, fence and rally items per vehicle to serve them at once on connect.")
+@click.option("--ftp", default=False, type=click.BOOL, required=False,
+              help="Fetch parameters as a single file using MAVLink FTP, fall back to parameter list if unavailable.")
+@click.option("--window", default=10, type=click.IntRange(min=1, clamp=True), required=False,
+              help="Number of parameter, plan, fence and rally item requests in flight at once.")
+@click.option("--retry", default=1.0, type=click.FloatRange(min=0.01, clamp=True), required=False,
+              help="Request a parameter, plan, fence or rally item again after this seconds without a response.")
+@click.option("--stream_queue", default=256, type=click.IntRange(min=1, clamp=True), required=False,
+              help="Disconnect a streaming client when this many message updates are waiting to be sent to it.")
+@click.option("--history", default="", type=click.STRING, required=False,
+              help="Comma separated messages to keep a history of their numeric fields.")
+@click.option("--history_size", default=10000, type=click.IntRange(min=1, clamp=True), required=False,
+              help="Number of samples kept in the history of each message.")
+@click.option("--replay", default=1.0, type=click.FloatRange(min=0, clamp=True), required=False,
+              help="Replay speed factor when master is a telemetry log file, zero means as fast as possible.")
+@click.option("--tlog", default="", type=click.STRING, required=False,
+              help="Record received messages to telemetry log files with this path, empty means do not record.")
+@click.option("--tlog_size", default=100, type=click.IntRange(min=0, clamp=True), required=False,
+              help="Start a new telemetry log file after this megabytes, zero means no limit.")
+@click.option("--tlog_time", default=3600, type=click.IntRange(min=0, clamp=True), required=False,
+              help="Start a new telemetry log file after this seconds, zero means no limit.")
+@click.option("--tlog_queue", default=10000, type=click.IntRange(min=1, clamp=True), required=False,
+              help="Drop and count received messages when this many messages are waiting to be recorded.")
+@click.option("--compress_level", default=6, type=click.IntRange(min=0, max=9, clamp=True), required=False,
+              help="Compression level of responses for clients that accept compression, zero means no compression.")
+@click.option("--compress_size", default=1024, type=click.IntRange(min=0, clamp=True), required=False,
+              help="Do not compress responses smaller than this bytes.")
+@click.option("--budget_count", default=100, type=click.IntRange(min=0, clamp=True), required=False,
+              help="Yield to the server after receiving this many messages in a row, zero means no limit.")
+@click.option("--budget_time", default=10000, type=click.IntRange(min=0, clamp=True), required=False,
+              help="Yield to the server after receiving messages for this microseconds in a row, zero means no limit.")
 def main(host, port, master, timeout, drop, rate,
          white_message, black_message, white_parameter, black_parameter,
-         param, plan, fence, rally, reset, custom, cache, request, statistics, home):
+         param, plan, fence, rally, reset, custom, cache, request, statistics, home, event,
+         budget_count, budget_time, vehicle_cache, ftp, window, retry, stream_queue, compress_level, compress_size,
+         history, history_size, tlog, tlog_size, tlog_time, tlog_queue, replay):
     # get global variables
     global custom_data, hold_statistics, custom_cache
+    global download_window, download_retry, fetch_ftp, cache_vehicle, subscriber_queue
+    global compression_level, compression_size, history_messages, history_capacity
+    global recorder_queue, recorder_limit, statistics_data, replay_speed
+
+    # set queue limit of streaming clients
+    subscriber_queue = stream_queue
+
+    # set response compression level and minimum response size to compress
+    compression_level = compress_level
+    compression_size = compress_size
+
+    # set messages to keep history of and history size
+    history_messages = set() if history == "" else {x for x in history.replace(" ", "").split(",")}
+    history_capacity = history_size
+
+    # set replay speed of telemetry log masters
+    replay_speed = replay
+
+    # user requested to record telemetry logs
+    if tlog != "":
+
+        # create the queue of messages waiting to be recorded
+        recorder_queue = collections.deque()
+        recorder_limit = tlog_queue
+
+        # create recorder statistics
+        statistics_data["recorder"] = {"file": "", "files": 0, "packets": 0, "bytes": 0, "dropped": 0, "errors": 0,
+                                       "queue": 0, "queue_max": tlog_queue}
+
+    # create message metadata table
+    create_metadata()
+
+    # set vehicle cache flag
+    cache_vehicle = vehicle_cache
+
+    # set parameter fetch method
+    fetch_ftp = ftp
+
+    # set download window and retransmit timeout
+    download_window = window
+    download_retry = retry
 
     # set hold statistics flag
     hold_statistics = statistics
@@ -2095,18 +5140,29 @@ def main(host, port, master, timeout, drop, rate,
         request = {}
 
     # create server
-    server = gevent.pywsgi.WSGIServer(listener=(host, port), application=application, log=application.logger)
+    server = gevent.pywsgi.WSGIServer(listener=(host, port), application=application, log=application.logger,
+                                      handler_class=geventwebsocket.handler.WebSocketHandler)
+
+    # send small responses and streamed events at once instead of waiting to coalesce them
+    server.init_socket()
+    server.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
     # set statistics data
     if hold_statistics:
         with application.app_context():
             get_statistics()
 
-    # spawn server and telemetry receiver
+    # spawn server, telemetry receiver, hub monitor and download manager
     gevent.spawn(server.start)
     gevent.spawn(receive_telemetry, master, timeout, drop, rate,
                  white_message, black_message, white_parameter, black_parameter,
-                 param, plan, fence, rally, reset, request, home)
+                 param, plan, fence, rally, reset, request, home, event, budget_count, budget_time)
+    gevent.spawn(monitor_hub, 0.1)
+    gevent.spawn(manage_downloads, 0.05)
+
+    # spawn telemetry log recorder
+    if tlog != "":
+        gevent.spawn(record_telemetry, tlog, tlog_size * 1000000, tlog_time, RecorderEnum.PERIOD.value)
 
     # wait for keyboard interrupt
     try:
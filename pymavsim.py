@@ -0,0 +1,682 @@
+#!/usr/bin/python
+
+import gevent
+import gevent.monkey
+
+# patch the modules for asynchronous work
+gevent.monkey.patch_all()
+
+import math
+import time
+import json
+import random
+import socket
+import struct
+import collections
+import click
+import gevent.event
+import pymavlink.dialects.v20.all as dialect
+
+# typical autopilot message mix in messages per second
+STREAMS = {"ATTITUDE": 10,
+           "GLOBAL_POSITION_INT": 5,
+           "LOCAL_POSITION_NED": 5,
+           "VFR_HUD": 5,
+           "RAW_IMU": 5,
+           "SYS_STATUS": 2,
+           "GPS_RAW_INT": 2,
+           "SCALED_PRESSURE": 2,
+           "SERVO_OUTPUT_RAW": 2,
+           "RC_CHANNELS": 2,
+           "NAV_CONTROLLER_OUTPUT": 2,
+           "VIBRATION": 2,
+           "BATTERY_STATUS": 1,
+           "SYSTEM_TIME": 1}
+
+# parameters every vehicle has, the rest are synthetic
+PARAMETERS = {"SYSID_THISMAV": 1,
+              "SYSID_MYGCS": 255,
+              "FENCE_ACTION": 1,
+              "FENCE_TOTAL": 0,
+              "RALLY_TOTAL": 0,
+              "STAT_RESET": 0,
+              "STAT_BOOTCNT": 1,
+              "STAT_FLTTIME": 0,
+              "STAT_RUNTIME": 0}
+PARAMETER_GROUPS = ("ATC_RAT_PIT", "ATC_RAT_RLL", "ATC_RAT_YAW", "BATT_MONITOR", "COMPASS_OFS", "INS_ACCOFFS",
+                    "RC_OPTION", "SERVO_FUNC")
+
+# home location and the circle flown around it
+HOME = (-35.3632622, 149.1652375, 584.07)
+RADIUS = 100.0
+SPEED = 10.0
+ALTITUDE = 50.0
+
+# link and protocol constants
+CHUNK = 1400
+TICK = 0.1
+UPLOAD_RETRY = 1.0
+UPLOAD_TRIES = 5
+FTP_HEADER = "<HBBBBBBI"
+FTP_DATA = 239
+
+# message classes of the dialect by name
+message_classes = {message_class.msgname: message_class for message_class in dialect.mavlink_map.values()}
+
+# global variables to store simulator state
+link_kind = ""
+link_address = None
+link_socket = None
+link_connection = None
+link_loss = 0.0
+link_latency = 0.0
+outgoing_queue = collections.deque()
+incoming_queue = collections.deque()
+outgoing_event = gevent.event.Event()
+incoming_event = gevent.event.Event()
+mav = None
+boot_monotonic = time.monotonic()
+stream_rates = {}
+stream_defaults = {}
+stream_templates = {}
+parameter_data = {}
+parameter_names = []
+plan_items = {dialect.MAV_MISSION_TYPE_MISSION: [], dialect.MAV_MISSION_TYPE_FENCE: [],
+              dialect.MAV_MISSION_TYPE_RALLY: []}
+plan_upload = {}
+fence_points = []
+rally_points = []
+ftp_file = b""
+ftp_padding = 0
+statistics = {"sent": 0, "received": 0, "dropped": 0}
+
+
+# create a message with zero fields
+def create_message(message_name):
+    message_class = message_classes[message_name]
+    lengths = dict(zip(message_class.ordered_fieldnames, message_class.array_lengths))
+    arguments = []
+    for field_name, field_type in zip(message_class.fieldnames, message_class.fieldtypes):
+        if field_type == "char":
+            arguments.append(b"")
+        elif lengths.get(field_name, 0):
+            arguments.append([0] * lengths[field_name])
+        else:
+            arguments.append(0)
+    message = message_class(*arguments)
+
+    # fill the fields that do not change while flying
+    if message_name == "HEARTBEAT":
+        message.type = dialect.MAV_TYPE_QUADROTOR
+        message.autopilot = dialect.MAV_AUTOPILOT_ARDUPILOTMEGA
+        message.base_mode = dialect.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED | dialect.MAV_MODE_FLAG_SAFETY_ARMED
+        message.system_status = dialect.MAV_STATE_ACTIVE
+        message.mavlink_version = 3
+    elif message_name == "GPS_RAW_INT":
+        message.fix_type = dialect.GPS_FIX_TYPE_3D_FIX
+        message.eph = 121
+        message.epv = 65535
+        message.satellites_visible = 10
+    elif message_name == "HOME_POSITION":
+        message.latitude = int(HOME[0] * 1e7)
+        message.longitude = int(HOME[1] * 1e7)
+        message.altitude = int(HOME[2] * 1000)
+        message.q = [1, 0, 0, 0]
+    elif message_name == "SCALED_PRESSURE":
+        message.press_abs = 1013.25
+        message.temperature = 2500
+    elif message_name in ("SERVO_OUTPUT_RAW", "RC_CHANNELS"):
+        for field_name in message.fieldnames:
+            if field_name.endswith("_raw") and field_name[:-4].rstrip("0123456789") in ("servo", "chan"):
+                setattr(message, field_name, 1500)
+        if message_name == "RC_CHANNELS":
+            message.chancount = 16
+            message.rssi = 255
+    elif message_name == "BATTERY_STATUS":
+        message.voltages = [4200, 4200, 4200] + [65535] * 7
+        message.battery_remaining = 100
+    return message
+
+
+# update a message with the state of the vehicle flying a circle around home
+def simulate(message, seconds):
+    # update timestamps of the message
+    if hasattr(message, "time_boot_ms"):
+        message.time_boot_ms = int(seconds * 1000) & 0xffffffff
+    if hasattr(message, "time_usec"):
+        message.time_usec = int(seconds * 1e6)
+    if hasattr(message, "time_unix_usec"):
+        message.time_unix_usec = int(time.time() * 1e6)
+
+    # calculate position and velocity on the circle
+    angle = seconds * SPEED / RADIUS
+    north = RADIUS * math.sin(angle)
+    east = RADIUS * (1 - math.cos(angle))
+    velocity_north = SPEED * math.cos(angle)
+    velocity_east = SPEED * math.sin(angle)
+    heading = math.atan2(velocity_east, velocity_north)
+    latitude = HOME[0] + math.degrees(north / 6378137.0)
+    longitude = HOME[1] + math.degrees(east / (6378137.0 * math.cos(math.radians(HOME[0]))))
+
+    # fill the fields of the messages that describe the state
+    message_name = message.get_type()
+    if message_name == "ATTITUDE":
+        message.roll = math.atan2(SPEED * SPEED / RADIUS, 9.80665)
+        message.pitch = -0.05
+        message.yaw = heading
+        message.yawspeed = SPEED / RADIUS
+    elif message_name in ("GLOBAL_POSITION_INT", "GPS_RAW_INT"):
+        message.lat = int(latitude * 1e7)
+        message.lon = int(longitude * 1e7)
+        message.alt = int((HOME[2] + ALTITUDE) * 1000)
+        if message_name == "GLOBAL_POSITION_INT":
+            message.relative_alt = int(ALTITUDE * 1000)
+            message.vx = int(velocity_north * 100)
+            message.vy = int(velocity_east * 100)
+            message.hdg = int(math.degrees(heading) * 100) % 36000
+        else:
+            message.vel = int(SPEED * 100)
+            message.cog = int(math.degrees(heading) * 100) % 36000
+    elif message_name == "LOCAL_POSITION_NED":
+        message.x = north
+        message.y = east
+        message.z = -ALTITUDE
+        message.vx = velocity_north
+        message.vy = velocity_east
+    elif message_name == "VFR_HUD":
+        message.airspeed = SPEED
+        message.groundspeed = SPEED
+        message.heading = int(math.degrees(heading)) % 360
+        message.throttle = 50
+        message.alt = HOME[2] + ALTITUDE
+    elif message_name == "SYS_STATUS":
+        message.voltage_battery = 12600 - int(seconds) % 1000
+        message.current_battery = 1500
+        message.battery_remaining = 100 - int(seconds / 36) % 100
+        message.load = 250
+    elif message_name == "NAV_CONTROLLER_OUTPUT":
+        message.nav_bearing = int(math.degrees(heading))
+        message.target_bearing = int(math.degrees(heading))
+        message.wp_dist = int(RADIUS)
+
+
+# pack a message and queue it on the link, the link drops some of them
+def send_message(message):
+    global mav, link_loss, link_latency, outgoing_queue, outgoing_event, statistics
+    buffer = message.pack(mav)
+    mav.seq = (mav.seq + 1) % 256
+    if random.random() < link_loss:
+        statistics["dropped"] += 1
+        return
+    outgoing_queue.append((time.monotonic() + link_latency, buffer))
+    outgoing_event.set()
+
+
+# write bytes to the connected ground station
+def write_link(data):
+    global link_kind, link_socket, link_connection, link_address, statistics
+    try:
+        if link_kind in ("tcpin", "tcp"):
+            if link_connection is not None:
+                link_connection.sendall(data)
+        elif link_address is not None:
+            link_socket.sendto(data, link_address)
+    except OSError:
+        pass
+
+
+# write queued messages to the link after the link latency
+def transmit():
+    global outgoing_queue, outgoing_event
+    while True:
+        outgoing_event.wait()
+        outgoing_event.clear()
+        while outgoing_queue:
+            delay = outgoing_queue[0][0] - time.monotonic()
+            if delay > 0:
+                gevent.sleep(delay)
+                continue
+            time_now = time.monotonic()
+            chunk = bytearray()
+            while outgoing_queue and outgoing_queue[0][0] <= time_now and len(chunk) < CHUNK:
+                chunk += outgoing_queue.popleft()[1]
+            write_link(bytes(chunk))
+
+
+# accept or connect the ground station and queue the received messages, the link drops some of them
+def receive():
+    global link_kind, link_socket, link_connection, link_address, link_loss, link_latency
+    global incoming_queue, incoming_event, statistics
+    while True:
+        parser = dialect.MAVLink(file=None)
+        parser.robust_parsing = True
+        try:
+            if link_kind == "tcpin":
+                link_connection, _ = link_socket.accept()
+                link_connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            elif link_kind == "tcp":
+                link_connection = socket.create_connection(link_socket)
+                link_connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            while True:
+                if link_kind in ("tcpin", "tcp"):
+                    data = link_connection.recv(65536)
+                    if not data:
+                        break
+                else:
+                    data, address = link_socket.recvfrom(65536)
+                    if link_kind == "udpin":
+                        link_address = address
+                for message in parser.parse_buffer(data) or []:
+                    if message.get_type() == "BAD_DATA":
+                        continue
+                    if random.random() < link_loss:
+                        statistics["dropped"] += 1
+                        continue
+                    incoming_queue.append((time.monotonic() + link_latency, message))
+                    incoming_event.set()
+        except OSError:
+            gevent.sleep(1)
+        if link_connection is not None:
+            link_connection.close()
+            link_connection = None
+
+
+# answer the received messages after the link latency
+def process():
+    global incoming_queue, incoming_event, statistics
+    while True:
+        incoming_event.wait()
+        incoming_event.clear()
+        while incoming_queue:
+            delay = incoming_queue[0][0] - time.monotonic()
+            if delay > 0:
+                gevent.sleep(delay)
+                continue
+            message = incoming_queue.popleft()[1]
+            statistics["received"] += 1
+            try:
+                answer(message)
+            except Exception as e:
+                print(f"Could not answer {message.get_type()}: {e}")
+
+
+# send the streams at their rates
+def broadcast():
+    global boot_monotonic, stream_rates, stream_templates, statistics
+    stream_due = {}
+    while True:
+        time_now = time.monotonic()
+        seconds = time_now - boot_monotonic
+        next_due = time_now + TICK
+        for message_name, rate in list(stream_rates.items()):
+            due = stream_due.get(message_name, time_now)
+
+            # do not burst to catch up after a stall
+            if due < time_now - 1:
+                due = time_now
+
+            # send the messages that are due
+            while due <= time_now:
+                message = stream_templates[message_name]
+                simulate(message=message, seconds=seconds)
+                send_message(message=message)
+                statistics["sent"] += 1
+                due += 1.0 / rate
+            stream_due[message_name] = due
+            next_due = min(next_due, due)
+        gevent.sleep(max(next_due - time.monotonic(), 0))
+
+
+# send heartbeat and re-request the plan items that are lost during uploads
+def heartbeat():
+    global plan_upload
+    message = create_message(message_name="HEARTBEAT")
+    while True:
+        send_message(message=message)
+        time_now = time.monotonic()
+        for mission_type, upload in list(plan_upload.items()):
+            if time_now - upload["monotonic"] < UPLOAD_RETRY:
+                continue
+            upload["tries"] += 1
+            if upload["tries"] > UPLOAD_TRIES:
+                send_message(dialect.MAVLink_mission_ack_message(upload["system"], upload["component"],
+                                                                 dialect.MAV_MISSION_OPERATION_CANCELLED,
+                                                                 mission_type))
+                del plan_upload[mission_type]
+                continue
+            request_item(mission_type=mission_type)
+        gevent.sleep(1)
+
+
+# set the rate of a stream, negative rate stops and zero rate restores the default rate
+def set_stream(message_name, rate):
+    global stream_rates, stream_defaults, stream_templates
+    if rate == 0:
+        rate = stream_defaults.get(message_name, -1)
+    if rate < 0:
+        stream_rates.pop(message_name, None)
+        return
+    if message_name not in stream_templates:
+        stream_templates[message_name] = create_message(message_name=message_name)
+    stream_rates[message_name] = rate
+
+
+# create the parameter value message of a parameter
+def parameter_value(index):
+    global parameter_data, parameter_names
+    parameter_name = parameter_names[index]
+    return dialect.MAVLink_param_value_message(parameter_name.encode(), parameter_data[parameter_name],
+                                               dialect.MAV_PARAM_TYPE_REAL32, len(parameter_data), index)
+
+
+# set the value of a parameter, item totals resize the item lists
+def set_parameter(parameter_name, parameter_value):
+    global parameter_data, fence_points, rally_points
+    parameter_data[parameter_name] = float(parameter_value)
+    if parameter_name == "FENCE_TOTAL":
+        fence_points[:] = fence_points[:int(parameter_value)]
+        fence_points.extend([(0.0, 0.0)] * (int(parameter_value) - len(fence_points)))
+    elif parameter_name == "RALLY_TOTAL":
+        rally_points[:] = rally_points[:int(parameter_value)]
+        rally_points.extend([(0, 0, 0)] * (int(parameter_value) - len(rally_points)))
+
+
+# request the first missing item of an upload
+def request_item(mission_type):
+    global plan_upload
+    upload = plan_upload[mission_type]
+    upload["monotonic"] = time.monotonic()
+    send_message(dialect.MAVLink_mission_request_message(upload["system"], upload["component"],
+                                                         upload["items"].index(None), mission_type))
+
+
+# pack parameters into an ArduPilot @PARAM/param.pck file
+def pack_parameters():
+    global parameter_data
+    data = bytearray(struct.pack("<HHH", 0x671b, len(parameter_data), len(parameter_data)))
+    last_name = b""
+    for parameter_name, parameter_value in parameter_data.items():
+        parameter_name = parameter_name.encode()
+        common = 0
+        while common < min(len(parameter_name) - 1, len(last_name), 15) and \
+                parameter_name[common] == last_name[common]:
+            common += 1
+        entry = bytes([4, ((len(parameter_name) - common - 1) << 4) | common]) + parameter_name[common:] + \
+            struct.pack("<f", parameter_value)
+
+        # parameters are not allowed to span packets, pad to the next packet instead
+        if len(data) // FTP_DATA != (len(data) + len(entry) - 1) // FTP_DATA:
+            data += bytes(FTP_DATA - len(data) % FTP_DATA)
+        data += entry
+        last_name = parameter_name
+    return bytes(data)
+
+
+# create a MAVLink FTP reply
+def ftp_reply(system, seq, session, opcode, request_opcode, offset=0, data=b"", burst_complete=0):
+    payload = struct.pack(FTP_HEADER, seq, session, opcode, len(data), request_opcode, burst_complete, 0, offset)
+    payload += data + bytes(FTP_DATA - len(data))
+    return dialect.MAVLink_file_transfer_protocol_message(0, system, 0, list(payload))
+
+
+# answer the parameter, plan, fence, rally, command and file transfer protocols
+def answer(message):
+    global parameter_data, parameter_names, plan_items, plan_upload, fence_points, rally_points, ftp_file, ftp_padding
+    message_name = message.get_type()
+    system = message.get_srcSystem()
+    component = message.get_srcComponent()
+
+    # parameter protocol
+    if message_name == "PARAM_REQUEST_LIST":
+        for index in range(len(parameter_data)):
+            send_message(parameter_value(index=index))
+    elif message_name == "PARAM_REQUEST_READ":
+        if message.param_index < 0:
+            if message.param_id not in parameter_data:
+                return
+            index = parameter_names.index(message.param_id)
+        else:
+            index = message.param_index
+        if index < len(parameter_data):
+            send_message(parameter_value(index=index))
+    elif message_name == "PARAM_SET":
+        if message.param_id in parameter_data:
+            set_parameter(parameter_name=message.param_id, parameter_value=message.param_value)
+            send_message(parameter_value(index=parameter_names.index(message.param_id)))
+
+    # mission protocol download
+    elif message_name == "MISSION_REQUEST_LIST":
+        send_message(dialect.MAVLink_mission_count_message(system, component,
+                                                           len(plan_items.get(message.mission_type, [])),
+                                                           message.mission_type))
+    elif message_name in ("MISSION_REQUEST_INT", "MISSION_REQUEST"):
+        items = plan_items.get(message.mission_type, [])
+        if message.seq >= len(items):
+            return
+        item = dict(items[message.seq], target_system=system, target_component=component)
+        if message_name == "MISSION_REQUEST_INT":
+            send_message(dialect.MAVLink_mission_item_int_message(**item))
+        else:
+            item["x"] = item["x"] * 1e-7
+            item["y"] = item["y"] * 1e-7
+            send_message(dialect.MAVLink_mission_item_message(**item))
+
+    # mission protocol upload
+    elif message_name == "MISSION_COUNT":
+        if message.mission_type not in plan_items:
+            return
+        if message.count == 0:
+            plan_items[message.mission_type] = []
+            send_message(dialect.MAVLink_mission_ack_message(system, component, dialect.MAV_MISSION_ACCEPTED,
+                                                             message.mission_type))
+            return
+        plan_upload[message.mission_type] = {"items": [None] * message.count, "system": system,
+                                             "component": component, "tries": 0, "monotonic": 0}
+        request_item(mission_type=message.mission_type)
+    elif message_name in ("MISSION_ITEM_INT", "MISSION_ITEM"):
+        upload = plan_upload.get(message.mission_type)
+        if upload is None or message.seq >= len(upload["items"]):
+            return
+        item = {field_name: getattr(message, field_name) for field_name in message.fieldnames
+                if field_name not in ("target_system", "target_component")}
+        if message_name == "MISSION_ITEM":
+            item["x"] = int(item["x"] * 1e7)
+            item["y"] = int(item["y"] * 1e7)
+        upload["items"][message.seq] = item
+        upload["tries"] = 0
+        if None in upload["items"]:
+            request_item(mission_type=message.mission_type)
+            return
+        plan_items[message.mission_type] = upload["items"]
+        del plan_upload[message.mission_type]
+        send_message(dialect.MAVLink_mission_ack_message(system, component, dialect.MAV_MISSION_ACCEPTED,
+                                                         message.mission_type))
+    elif message_name == "MISSION_CLEAR_ALL":
+        if message.mission_type in plan_items:
+            plan_items[message.mission_type] = []
+        send_message(dialect.MAVLink_mission_ack_message(system, component, dialect.MAV_MISSION_ACCEPTED,
+                                                         message.mission_type))
+
+    # fence and rally point protocols
+    elif message_name == "FENCE_FETCH_POINT":
+        if message.idx < len(fence_points):
+            send_message(dialect.MAVLink_fence_point_message(system, component, message.idx, len(fence_points),
+                                                             *fence_points[message.idx]))
+    elif message_name == "FENCE_POINT":
+        if message.idx < len(fence_points):
+            fence_points[message.idx] = (message.lat, message.lng)
+    elif message_name == "RALLY_FETCH_POINT":
+        if message.idx < len(rally_points):
+            send_message(dialect.MAVLink_rally_point_message(system, component, message.idx, len(rally_points),
+                                                             *rally_points[message.idx], 0, 0, 0))
+    elif message_name == "RALLY_POINT":
+        if message.idx < len(rally_points):
+            rally_points[message.idx] = (message.lat, message.lng, message.alt)
+
+    # command protocol
+    elif message_name in ("COMMAND_LONG", "COMMAND_INT"):
+        if message.command == dialect.MAV_CMD_SET_MESSAGE_INTERVAL and int(message.param1) in dialect.mavlink_map:
+            interval = message.param2
+            set_stream(message_name=dialect.mavlink_map[int(message.param1)].msgname,
+                       rate=-1 if interval < 0 else 0 if interval == 0 else 1e6 / interval)
+        elif message.command == dialect.MAV_CMD_REQUEST_MESSAGE and int(message.param1) in dialect.mavlink_map:
+            requested = create_message(message_name=dialect.mavlink_map[int(message.param1)].msgname)
+            simulate(message=requested, seconds=time.monotonic() - boot_monotonic)
+            send_message(requested)
+        elif message.command == dialect.MAV_CMD_GET_HOME_POSITION:
+            send_message(create_message(message_name="HOME_POSITION"))
+        send_message(dialect.MAVLink_command_ack_message(message.command, dialect.MAV_RESULT_ACCEPTED,
+                                                         255, 0, system, component))
+
+    # file transfer protocol serving the parameter file
+    elif message_name == "FILE_TRANSFER_PROTOCOL":
+        seq, session, opcode, size, _, _, _, offset = struct.unpack(FTP_HEADER, bytes(message.payload[:12]))
+        data = bytes(message.payload[12:12 + size])
+        if opcode == 4 and data.rstrip(b"\x00") == b"@PARAM/param.pck":
+            ftp_file = pack_parameters()
+            send_message(ftp_reply(system, seq + 1, 1, 128, opcode,
+                                   data=struct.pack("<I", len(ftp_file) + ftp_padding)))
+        elif opcode == 4:
+            send_message(ftp_reply(system, seq + 1, 0, 129, opcode, data=bytes([10])))
+        elif opcode == 15 and offset >= len(ftp_file):
+            send_message(ftp_reply(system, seq + 1, session, 129, opcode, offset, bytes([6])))
+        elif opcode == 15:
+            for position in range(offset, len(ftp_file), FTP_DATA):
+                seq += 1
+                send_message(ftp_reply(system, seq, session, 128, opcode, position,
+                                       ftp_file[position:position + FTP_DATA],
+                                       burst_complete=int(not ftp_padding and position + FTP_DATA >= len(ftp_file))))
+            if ftp_padding:
+                send_message(ftp_reply(system, seq + 1, session, 129, opcode, len(ftp_file), bytes([6])))
+        elif opcode == 1:
+            send_message(ftp_reply(system, seq + 1, session, 128, opcode))
+        else:
+            send_message(ftp_reply(system, seq + 1, session, 129, opcode, data=bytes([4])))
+
+
+# create the flight plan, fence and rally items of the vehicle flying a circle around home
+def create_items(plan, fence, rally):
+    global plan_items, fence_points, rally_points
+    plan_items[dialect.MAV_MISSION_TYPE_MISSION] = []
+    for seq in range(plan):
+        angle = 2 * math.pi * (seq - 2) / max(plan - 2, 1)
+        command = dialect.MAV_CMD_NAV_TAKEOFF if seq == 1 else dialect.MAV_CMD_NAV_WAYPOINT
+        if seq == 0:
+            latitude, longitude, altitude, frame = HOME[0], HOME[1], HOME[2], dialect.MAV_FRAME_GLOBAL
+        else:
+            north = RADIUS * math.sin(angle) if seq > 1 else 0
+            east = RADIUS * (1 - math.cos(angle)) if seq > 1 else 0
+            latitude = HOME[0] + math.degrees(north / 6378137.0)
+            longitude = HOME[1] + math.degrees(east / (6378137.0 * math.cos(math.radians(HOME[0]))))
+            altitude, frame = ALTITUDE, dialect.MAV_FRAME_GLOBAL_RELATIVE_ALT
+        plan_items[dialect.MAV_MISSION_TYPE_MISSION].append(
+            {"seq": seq, "frame": frame, "command": command, "current": int(seq == 0), "autocontinue": 1,
+             "param1": 0.0, "param2": 0.0, "param3": 0.0, "param4": 0.0,
+             "x": int(latitude * 1e7), "y": int(longitude * 1e7), "z": altitude,
+             "mission_type": dialect.MAV_MISSION_TYPE_MISSION})
+
+    # fence starts with the return point and closes the polygon with its first vertex
+    fence_points[:] = [(HOME[0], HOME[1])] if fence else []
+    for index in range(max(fence - 2, 0)):
+        angle = 2 * math.pi * index / max(fence - 2, 1)
+        fence_points.append((HOME[0] + math.degrees(2 * RADIUS * math.cos(angle) / 6378137.0),
+                             HOME[1] + math.degrees(2 * RADIUS * math.sin(angle) /
+                                                    (6378137.0 * math.cos(math.radians(HOME[0]))))))
+    if fence > 1:
+        fence_points.append(fence_points[1] if fence > 2 else fence_points[0])
+
+    rally_points[:] = []
+    for index in range(rally):
+        angle = 2 * math.pi * index / rally
+        rally_points.append((int((HOME[0] + math.degrees(RADIUS * math.cos(angle) / 6378137.0)) * 1e7),
+                             int(HOME[1] * 1e7), int(ALTITUDE)))
+    parameter_data["FENCE_TOTAL"] = float(len(fence_points))
+    parameter_data["RALLY_TOTAL"] = float(len(rally_points))
+
+
+@click.command()
+@click.option("--master", default="tcpin:127.0.0.1:5760", type=click.STRING, required=False,
+              help="Connection to serve the vehicle on, one of tcpin, tcp, udpin or udpout followed by host:port.")
+@click.option("--system", default=1, type=click.IntRange(min=1, max=255), required=False, help="System id.")
+@click.option("--component", default=1, type=click.IntRange(min=1, max=255), required=False, help="Component id.")
+@click.option("--stream", default="", type=click.STRING, required=False,
+              help="Message rates as a JSON object of message names and messages per second instead of the default.")
+@click.option("--scale", default=1.0, type=click.FloatRange(min=0, clamp=True), required=False,
+              help="Multiply all message rates with this factor.")
+@click.option("--param", default=500, type=click.IntRange(min=0, clamp=True), required=False,
+              help="Synthetic parameter count in addition to the common parameters.")
+@click.option("--plan", default=10, type=click.IntRange(min=0, clamp=True), required=False,
+              help="Flight plan item count.")
+@click.option("--fence", default=6, type=click.IntRange(min=0, clamp=True), required=False,
+              help="Fence point count.")
+@click.option("--rally", default=2, type=click.IntRange(min=0, clamp=True), required=False,
+              help="Rally point count.")
+@click.option("--loss", default=0.0, type=click.FloatRange(min=0, max=1, clamp=True), required=False,
+              help="Ratio of messages dropped in each direction.")
+@click.option("--latency", default=0.0, type=click.FloatRange(min=0, clamp=True), required=False,
+              help="One way latency of the link in seconds.")
+@click.option("--oversize", default=0, type=click.IntRange(min=0, clamp=True), required=False,
+              help="Bytes added to the reported parameter file size like autopilots reporting a placeholder size.")
+def main(master, system, component, stream, scale, param, plan, fence, rally, loss, latency, oversize):
+    # configure the simulator
+    global link_kind, link_address, link_socket, link_loss, link_latency, mav, ftp_padding
+    global stream_defaults, parameter_data, parameter_names
+    link_kind, host, port = master.split(":")
+    link_loss = loss
+    link_latency = latency
+    ftp_padding = oversize
+    mav = dialect.MAVLink(file=None, srcSystem=system, srcComponent=component)
+
+    # open the link
+    if link_kind == "tcpin":
+        link_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        link_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        link_socket.bind((host, int(port)))
+        link_socket.listen(1)
+    elif link_kind == "tcp":
+        link_socket = (host, int(port))
+    elif link_kind in ("udpin", "udpout"):
+        link_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if link_kind == "udpin":
+            link_socket.bind((host, int(port)))
+        else:
+            link_address = (host, int(port))
+    else:
+        raise click.BadParameter(f"unsupported connection {link_kind}", param_hint="--master")
+
+    # create the streams
+    stream_defaults = {message_name: rate * scale
+                       for message_name, rate in (json.loads(stream) if stream else STREAMS).items()}
+    for message_name, rate in stream_defaults.items():
+        if message_name not in message_classes:
+            raise click.BadParameter(f"unknown message {message_name}", param_hint="--stream")
+        set_stream(message_name=message_name, rate=rate if rate > 0 else -1)
+
+    # create the parameters, plan, fence and rally items
+    parameter_data = {parameter_name: float(parameter_value) for parameter_name, parameter_value in PARAMETERS.items()}
+    parameter_data["SYSID_THISMAV"] = float(system)
+    for index in range(param):
+        parameter_data[f"{PARAMETER_GROUPS[index % len(PARAMETER_GROUPS)]}_{index // len(PARAMETER_GROUPS):03d}"] = \
+            float(index)
+    create_items(plan=plan, fence=fence, rally=rally)
+    parameter_names = list(parameter_data)
+    print(f"Simulating vehicle {system}:{component} on {master} sending "
+          f"{sum(stream_rates.values()):.0f} messages per second")
+
+    # create spawns
+    spawns = [gevent.spawn(function) for function in (receive, process, transmit, heartbeat, broadcast)]
+
+    # wait for keyboard interrupt
+    try:
+        gevent.joinall(spawns)
+    except KeyboardInterrupt:
+        print(f"Keyboard interrupt received, exiting after sending {statistics['sent']} stream messages, "
+              f"receiving {statistics['received']} messages and dropping {statistics['dropped']} messages...")
+    except Exception as e:
+        print(e)
+
+
+# main entry point
+if __name__ == "__main__":
+    # run main function
+    main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+import threading
+import requests
+import pymavlink.mavutil as utility
+import pymavlink.dialects.v20.all as dialect
+
+HTTP_PORT = 2629
+VEHICLE_PORT = 5789
+
+
+# record a stream of a typical autopilot message mix
+def record(count):
+    mav = dialect.MAVLink(file=None, srcSystem=1, srcComponent=1)
+    mix = [dialect.MAVLink_attitude_message(1000, 0.01, -0.02, 1.57, 0.001, 0.002, 0.003),
+           dialect.MAVLink_global_position_int_message(1000, -353632622, 1491652375, 584070, 10, 1, -1, 0, 35319),
+           dialect.MAVLink_vfr_hud_message(0.1, 0.2, 90, 0, 584.07, 0.0),
+           dialect.MAVLink_sys_status_message(0, 0, 0, 500, 12600, -1, -1, 0, 0, 0, 0, 0, 0),
+           dialect.MAVLink_raw_imu_message(1000000, 1, 2, -1000, 3, 4, 5, 200, 300, 400, 0, 25),
+           dialect.MAVLink_scaled_pressure_message(1000, 1013.25, 0.01, 2500, 0),
+           dialect.MAVLink_gps_raw_int_message(1000000, 3, -353632622, 1491652375, 584070, 121, 65535, 0, 0, 10),
+           dialect.MAVLink_servo_output_raw_message(1000000, 0, *[1500] * 8),
+           dialect.MAVLink_rc_channels_message(1000, 16, *[1500] * 18, 255),
+           dialect.MAVLink_local_position_ned_message(1000, 1.0, 2.0, -3.0, 0.1, 0.2, 0.3),
+           dialect.MAVLink_nav_controller_output_message(0.1, 0.2, 90, 90, 10, 0.5, 0.1, 0.2),
+           dialect.MAVLink_vibration_message(1000000, 0.01, 0.02, 0.03, 0, 0, 0)]
+    stream = bytearray()
+    for i in range(count):
+        stream += mix[i % len(mix)].pack(mav)
+    return bytes(stream)
+
+
+# read a recorded stream from a telemetry log
+def load(path):
+    log = utility.mavlink_connection(path)
+    stream = bytearray()
+    count = 0
+    while True:
+        message = log.recv_msg()
+        if message is None:
+            break
+        if message.get_type() in ("BAD_DATA", "HEARTBEAT", "SYSTEM_TIME", "TIMESYNC"):
+            continue
+        stream += message.get_msgbuf()
+        count += 1
+    return bytes(stream), count
+
+
+# replay the stream to pymavrest and measure the processing cost per message
+def benchmark(script, stream, count, arguments=()):
+    mav = dialect.MAVLink(file=None, srcSystem=1, srcComponent=1)
+    heartbeat = dialect.MAVLink_heartbeat_message(2, 3, 0, 0, 3, 3).pack(mav)
+    first = dialect.MAVLink_system_time_message(0, 0).pack(mav)
+    last = dialect.MAVLink_timesync_message(0, 0).pack(mav)
+    listen = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listen.bind(("127.0.0.1", VEHICLE_PORT))
+    listen.listen(1)
+
+    def replay():
+        connection, _ = listen.accept()
+        connection.sendall(heartbeat)
+        time.sleep(2)
+        connection.sendall(first + stream + last)
+        time.sleep(60)
+
+    threading.Thread(target=replay, daemon=True).start()
+    server = subprocess.Popen([sys.executable, os.path.abspath(script),
+                               "--port", str(HTTP_PORT), "--master", f"tcp:127.0.0.1:{VEHICLE_PORT}",
+                               "--rate", "0", "--param", "False", "--plan", "False", "--fence", "False",
+                               "--rally", "False", "--reset", "False", "--home", "False", "--cache", "False",
+                               "--vehicle_cache", "False", *arguments],
+                              cwd=os.path.dirname(os.path.abspath(script)),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            time.sleep(0.5)
+            try:
+                data = requests.get(f"http://127.0.0.1:{HTTP_PORT}/get/message/all", timeout=60).json()
+            except requests.exceptions.ConnectionError:
+                continue
+            if "TIMESYNC" in data:
+                break
+    finally:
+        server.terminate()
+        server.wait()
+        listen.close()
+
+    duration = data["TIMESYNC"]["statistics"]["last_monotonic"] - data["SYSTEM_TIME"]["statistics"]["last_monotonic"]
+    print(f"{script}: {count} messages in {duration:.3f} s, {duration / count * 1e9:.0f} ns/message")
+    return duration, data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded stream through receive_telemetry.")
+    parser.add_argument("--script", default=os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                          "..", "pymavrest.py")))
+    parser.add_argument("--tlog", default="", help="Telemetry log to replay instead of a synthetic stream.")
+    parser.add_argument("--count", default=200000, type=int, help="Synthetic stream length.")
+    arguments = parser.parse_args()
+    if arguments.tlog:
+        benchmark(arguments.script, *load(arguments.tlog))
+    else:
+        benchmark(arguments.script, record(arguments.count), arguments.count)
@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import socket
+import subprocess
+import threading
+import requests
+import pymavlink.dialects.v20.all as dialect
+
+HTTP_PORT = 2619
+VEHICLE_PORT = 5779
+SAMPLES = 50
+IDLE = 10
+
+
+# serve a fake vehicle that sends a heartbeat every second and a marker message on demand
+class Vehicle(threading.Thread):
+    def __init__(self, port):
+        super().__init__(daemon=True)
+        self.mav = dialect.MAVLink(file=None, srcSystem=1, srcComponent=1)
+        self.listen = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listen.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listen.bind(("127.0.0.1", port))
+        self.listen.listen(1)
+        self.connection = None
+        self.lock = threading.Lock()
+
+    def send(self, message):
+        with self.lock:
+            if self.connection is not None:
+                try:
+                    self.connection.sendall(message.pack(self.mav))
+                except OSError:
+                    self.connection = None
+
+    def run(self):
+        self.connection, _ = self.listen.accept()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while self.connection is not None:
+            self.send(dialect.MAVLink_heartbeat_message(type=2, autopilot=3, base_mode=0, custom_mode=0,
+                                                        system_status=3, mavlink_version=3))
+            time.sleep(1)
+
+
+# read consumed cpu time of a process in seconds
+def cpu_time(pid):
+    with open(f"/proc/{pid}/stat") as file:
+        fields = file.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+# measure message to http latency and idle cpu usage of pymavrest in a receive mode
+def benchmark(event, port):
+    vehicle = Vehicle(port=port)
+    vehicle.start()
+    server = subprocess.Popen([sys.executable, "pymavrest.py",
+                               "--port", str(HTTP_PORT), "--master", f"tcp:127.0.0.1:{port}",
+                               "--rate", "0", "--param", "False", "--plan", "False", "--fence", "False",
+                               "--rally", "False", "--reset", "False", "--home", "False", "--cache", "False",
+                               "--vehicle_cache", "False", "--event", str(event)],
+                              cwd=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    link = f"http://127.0.0.1:{HTTP_PORT}/get/message/SYSTEM_TIME/time_boot_ms"
+    try:
+        while True:
+            try:
+                requests.get(link, timeout=1)
+                break
+            except requests.exceptions.ConnectionError:
+                time.sleep(0.1)
+        time.sleep(2)
+
+        # measure idle cpu usage while only heartbeats are flowing
+        cpu_initial = cpu_time(server.pid)
+        time.sleep(IDLE)
+        cpu_idle = (cpu_time(server.pid) - cpu_initial) / IDLE
+
+        # measure the time from sending a message to seeing it on the http side
+        latencies = []
+        for marker in range(1, SAMPLES + 1):
+            time.sleep(0.05)
+            time_initial = time.monotonic()
+            vehicle.send(dialect.MAVLink_system_time_message(time_unix_usec=0, time_boot_ms=marker))
+            while requests.get(link).json().get("time_boot_ms") != marker:
+                pass
+            latencies.append(time.monotonic() - time_initial)
+        latencies.sort()
+    finally:
+        server.terminate()
+        server.wait()
+        vehicle.listen.close()
+
+    print(f"event={event} idle_cpu={cpu_idle * 100:.2f}% "
+          f"latency_p50={latencies[len(latencies) // 2] * 1000:.2f}ms "
+          f"latency_max={latencies[-1] * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    benchmark(event=False, port=VEHICLE_PORT)
+    benchmark(event=True, port=VEHICLE_PORT + 1)
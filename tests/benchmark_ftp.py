@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import queue
+import socket
+import random
+import struct
+import argparse
+import subprocess
+import threading
+import requests
+import pymavlink.dialects.v20.all as dialect
+
+HTTP_PORT = 2639
+VEHICLE_PORT = 5799
+
+
+# pack parameters into an ArduPilot @PARAM/param.pck file
+def pack_parameters(parameters):
+    data = bytearray(struct.pack("<HHH", 0x671b, len(parameters), len(parameters)))
+    last_name = b""
+    for name, value in parameters:
+        name = name.encode()
+        common = 0
+        while common < min(len(name) - 1, len(last_name), 15) and name[common] == last_name[common]:
+            common += 1
+        entry = bytes([4, ((len(name) - common - 1) << 4) | common]) + name[common:] + struct.pack("<f", value)
+        # parameters are not allowed to span packets, pad to the next packet instead
+        if len(data) // 239 != (len(data) + len(entry) - 1) // 239:
+            data += bytes(239 - len(data) % 239)
+        data += entry
+        last_name = name
+    return bytes(data)
+
+
+# serve a fake vehicle on a lossy, slow link that answers parameter list and MAVLink FTP requests
+class Vehicle(threading.Thread):
+    def __init__(self, port, count, loss, latency, bandwidth):
+        super().__init__(daemon=True)
+        self.mav = dialect.MAVLink(file=None, srcSystem=1, srcComponent=1)
+        self.listen = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listen.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listen.bind(("127.0.0.1", port))
+        self.listen.listen(1)
+        self.connection = None
+        self.outgoing = queue.Queue()
+        self.parameters = [(f"{group}_{index:03d}", float(index))
+                           for group in ("ATC_RAT_RLL", "BATT_MONITOR", "COMPASS_OFS", "INS_ACCOFFS", "SERVO_FUNC")
+                           for index in range(count // 5)]
+        self.file = pack_parameters(self.parameters)
+        self.loss = loss
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    # queue a message, the link drops some of them
+    def send(self, message, lossy=True):
+        if lossy and random.random() < self.loss:
+            return
+        self.outgoing.put(message.pack(self.mav))
+
+    # write queued messages to the link at the link bandwidth after the link latency
+    def transmit(self):
+        while True:
+            data = self.outgoing.get()
+            time.sleep(len(data) / self.bandwidth)
+            threading.Timer(self.latency, self.deliver, args=(data,)).start()
+
+    def deliver(self, data):
+        try:
+            self.connection.sendall(data)
+        except OSError:
+            pass
+
+    def heartbeat(self):
+        while True:
+            self.send(dialect.MAVLink_heartbeat_message(2, 3, 0, 0, 3, 3), lossy=False)
+            time.sleep(1)
+
+    def parameter(self, index):
+        name, value = self.parameters[index]
+        return dialect.MAVLink_param_value_message(name.encode(), value, 9, len(self.parameters), index)
+
+    def ftp(self, seq, session, opcode, request_opcode, offset=0, data=b"", burst_complete=0):
+        payload = struct.pack("<HBBBBBBI", seq, session, opcode, len(data), request_opcode, burst_complete, 0, offset)
+        payload += data + bytes(239 - len(data))
+        return dialect.MAVLink_file_transfer_protocol_message(0, 255, 0, list(payload))
+
+    def answer(self, message):
+        message_type = message.get_type()
+        if message_type == "PARAM_REQUEST_LIST":
+            for index in range(len(self.parameters)):
+                self.send(self.parameter(index))
+        elif message_type == "PARAM_REQUEST_READ":
+            self.send(self.parameter(message.param_index))
+        elif message_type == "FILE_TRANSFER_PROTOCOL":
+            seq, session, opcode, size, _, _, _, offset = struct.unpack("<HBBBBBBI", bytes(message.payload[:12]))
+            data = bytes(message.payload[12:12 + size])
+            if opcode == 4 and data == b"@PARAM/param.pck":
+                self.send(self.ftp(seq + 1, 1, 128, opcode, data=struct.pack("<I", len(self.file))))
+            elif opcode == 4:
+                self.send(self.ftp(seq + 1, 0, 129, opcode, data=bytes([10])))
+            elif opcode == 15 and offset >= len(self.file):
+                self.send(self.ftp(seq + 1, session, 129, opcode, offset, bytes([6])))
+            elif opcode == 15:
+                for position in range(offset, len(self.file), 239):
+                    seq += 1
+                    self.send(self.ftp(seq, session, 128, opcode, position, self.file[position:position + 239],
+                                       burst_complete=int(position + 239 >= len(self.file))))
+            elif opcode == 1:
+                self.send(self.ftp(seq + 1, session, 128, opcode))
+
+    def run(self):
+        self.connection, _ = self.listen.accept()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        threading.Thread(target=self.transmit, daemon=True).start()
+        threading.Thread(target=self.heartbeat, daemon=True).start()
+        parser = dialect.MAVLink(file=None)
+        while True:
+            try:
+                data = self.connection.recv(4096)
+            except OSError:
+                return
+            if not data:
+                return
+            for message in parser.parse_buffer(data) or []:
+                self.answer(message)
+
+
+# measure the time pymavrest needs to populate the parameter list
+def benchmark(ftp, port, arguments):
+    vehicle = Vehicle(port=port, count=arguments.count, loss=arguments.loss,
+                      latency=arguments.latency, bandwidth=arguments.bandwidth)
+    vehicle.start()
+    time_initial = time.monotonic()
+    server = subprocess.Popen([sys.executable, "pymavrest.py",
+                               "--port", str(HTTP_PORT), "--master", f"tcp:127.0.0.1:{port}",
+                               "--rate", "0", "--param", "True", "--plan", "False", "--fence", "False",
+                               "--rally", "False", "--reset", "False", "--home", "False", "--cache", "False",
+                               "--vehicle_cache", "False", "--ftp", str(ftp)],
+                              cwd=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    download = {}
+    try:
+        while time.monotonic() - time_initial < 300:
+            time.sleep(0.1)
+            try:
+                download = requests.get(f"http://127.0.0.1:{HTTP_PORT}/get/download", timeout=1).json()
+            except requests.exceptions.RequestException:
+                continue
+            if download.get("parameter", {}).get("complete"):
+                break
+        duration = time.monotonic() - time_initial
+        parameters = requests.get(f"http://127.0.0.1:{HTTP_PORT}/get/parameter/all", timeout=1).json()
+    finally:
+        server.terminate()
+        server.wait()
+        vehicle.listen.close()
+
+    correct = all(parameters.get(name) == value for name, value in vehicle.parameters)
+    print(f"ftp={ftp} parameters={len(parameters)} correct={correct} bootstrap={duration:.2f}s "
+          f"requests={download.get('parameter', {}).get('requests')}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare parameter bootstrap over parameter list and MAVLink FTP.")
+    parser.add_argument("--count", default=1000, type=int, help="Parameter count of the fake vehicle.")
+    parser.add_argument("--loss", default=0.02, type=float, help="Message loss ratio of the link.")
+    parser.add_argument("--latency", default=0.05, type=float, help="One way latency of the link in seconds.")
+    parser.add_argument("--bandwidth", default=5760, type=float, help="Link bandwidth in bytes per second.")
+    arguments = parser.parse_args()
+    benchmark(ftp=False, port=VEHICLE_PORT, arguments=arguments)
+    benchmark(ftp=True, port=VEHICLE_PORT + 1, arguments=arguments)
@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import threading
+import http.client
+import multiprocessing
+import numpy
+
+HTTP_PORT = 2659
+RELAY_PORT = 2669
+VEHICLE_PORT = 5809
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# endpoint mixes as weighted lists of requests
+MIXES = {"all": [(1, "GET", "/get/all", None)],
+         "message": [(1, "GET", "/get/message/all", None),
+                     (2, "GET", "/get/message/ATTITUDE", None),
+                     (2, "GET", "/get/message/GLOBAL_POSITION_INT", None)],
+         "field": [(1, "GET", "/get/message/ATTITUDE/roll", None),
+                   (1, "GET", "/get/message/VFR_HUD/groundspeed", None),
+                   (1, "GET", "/get/parameter/SYSID_THISMAV", None)],
+         "post": [(1, "POST", "/post/custom", {"key": "pi", "value": 3.14}),
+                  (1, "POST", "/post/command_long", {"target_system": 0, "target_component": 0, "command": 400,
+                                                      "confirmation": 0, "param1": 1, "param2": 0, "param3": 0,
+                                                      "param4": 0, "param5": 0, "param6": 0, "param7": 0})]}
+MIXES["mixed"] = MIXES["all"] + MIXES["message"] + [(3, *request[1:]) for request in MIXES["field"]] + MIXES["post"]
+
+
+# send requests of a mix over a keep-alive connection until the deadline and return the latencies
+def client(port, mix, deadline, seed):
+    random.seed(seed)
+    weights = [request[0] for request in MIXES[mix]]
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies = []
+    errors = 0
+    while time.monotonic() < deadline:
+        _, method, path, payload = random.choices(MIXES[mix], weights=weights)[0]
+        body = None if payload is None else json.dumps(payload)
+        headers = {} if payload is None else {"Content-Type": "application/json"}
+        time_initial = time.monotonic()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.monotonic() - time_initial)
+    connection.close()
+    return latencies, errors
+
+
+# read consumed cpu time in seconds and resident memory in bytes of a process
+def usage(pid):
+    with open(f"/proc/{pid}/stat") as file:
+        fields = file.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK"), int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+
+
+# sample cpu and peak memory of the server processes while a run is going on
+class Monitor(threading.Thread):
+    def __init__(self, servers):
+        super().__init__(daemon=True)
+        self.servers = servers
+        self.initial = {name: usage(server.pid)[0] for name, server in servers.items()}
+        self.rss = {name: 0 for name in servers}
+        self.running = True
+        self.monotonic = time.monotonic()
+
+    def run(self):
+        while self.running:
+            for name, server in self.servers.items():
+                self.rss[name] = max(self.rss[name], usage(server.pid)[1])
+            time.sleep(0.2)
+
+    def stop(self):
+        self.running = False
+        self.join()
+        duration = time.monotonic() - self.monotonic
+        return {name: {"cpu": (usage(server.pid)[0] - self.initial[name]) / duration, "rss": self.rss[name]}
+                for name, server in self.servers.items()}
+
+
+# wait until an endpoint answers with a non-empty document
+def wait(port, path, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", path)
+            data = json.loads(connection.getresponse().read() or b"{}")
+            connection.close()
+            if data and (path != "/get/download" or all(item.get("complete") for item in data.values())):
+                return
+        except (OSError, ValueError, http.client.HTTPException):
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"{path} did not become ready")
+
+
+# start the simulated vehicle, pymavrest and optionally pymavrelay on top of it
+def start(scale, relay, arguments):
+    servers = {"pymavsim": subprocess.Popen([sys.executable, os.path.join(ROOT, "pymavsim.py"),
+                                             "--master", f"tcpin:127.0.0.1:{VEHICLE_PORT}", "--scale", str(scale)],
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL),
+               "pymavrest": subprocess.Popen([sys.executable, os.path.join(ROOT, "pymavrest.py"),
+                                              "--port", str(HTTP_PORT), "--master", f"tcp:127.0.0.1:{VEHICLE_PORT}",
+                                              "--vehicle_cache", "False", *arguments],
+                                             cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)}
+    wait(HTTP_PORT, "/get/download")
+    wait(HTTP_PORT, "/get/message/ATTITUDE/roll")
+    if relay:
+        servers["pymavrelay"] = subprocess.Popen([sys.executable, os.path.join(ROOT, "pymavrelay.py"),
+                                                  "--host_in", "127.0.0.1", "--port_in", str(HTTP_PORT),
+                                                  "--host_out", "127.0.0.1", "--port_out", str(RELAY_PORT),
+                                                  "--freq", "4"],
+                                                 cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wait(RELAY_PORT, "/get/message/ATTITUDE")
+    return servers
+
+
+# stop the started processes
+def stop(servers):
+    for server in servers.values():
+        server.terminate()
+    for server in servers.values():
+        server.wait()
+
+
+# run clients of a mix at a concurrency against the target and summarize the latencies
+def run(pool, port, servers, mix, concurrency, duration, warmup):
+    deadline = time.monotonic() + warmup
+    pool.starmap(client, [(port, mix, deadline, seed) for seed in range(concurrency)])
+    monitor = Monitor(servers)
+    monitor.start()
+    time_initial = time.monotonic()
+    deadline = time_initial + duration
+    outcomes = pool.starmap(client, [(port, mix, deadline, seed) for seed in range(concurrency)])
+    elapsed = time.monotonic() - time_initial
+    resources = monitor.stop()
+    latencies = numpy.concatenate([numpy.asarray(outcome[0]) for outcome in outcomes]) * 1000
+    percentiles = numpy.percentile(latencies, [50, 95, 99, 99.9]) if len(latencies) else [float("nan")] * 4
+    return {"mix": mix,
+            "concurrency": concurrency,
+            "requests": int(len(latencies)),
+            "errors": int(sum(outcome[1] for outcome in outcomes)),
+            "throughput": len(latencies) / elapsed,
+            "latency_ms": dict(zip(("p50", "p95", "p99", "p999"), (float(value) for value in percentiles))),
+            "resources": resources}
+
+
+# describe the build and machine so results of releases can be diffed
+def describe(arguments):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"commit": commit,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "cpus": os.cpu_count(),
+            "arguments": vars(arguments)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep HTTP load against pymavrest driven by a simulated vehicle.")
+    parser.add_argument("--target", default="pymavrest", choices=("pymavrest", "pymavrelay"),
+                        help="Server to send the requests to, pymavrelay runs on top of pymavrest.")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma separated client counts.")
+    parser.add_argument("--mix", default="all,message,field,post,mixed", help=f"Comma separated of {', '.join(MIXES)}.")
+    parser.add_argument("--scale", default="1,20", help="Comma separated vehicle message rate factors.")
+    parser.add_argument("--duration", default=10.0, type=float, help="Seconds of each run.")
+    parser.add_argument("--warmup", default=1.0, type=float, help="Seconds of warmup before each run.")
+    parser.add_argument("--output", default="", help="JSON file to write the results to.")
+    parser.add_argument("arguments", nargs="*", help="Extra pymavrest arguments after --.")
+    arguments = parser.parse_args()
+    concurrencies = [int(value) for value in arguments.concurrency.split(",")]
+    mixes = arguments.mix.split(",")
+    port = RELAY_PORT if arguments.target == "pymavrelay" else HTTP_PORT
+    results = {"meta": describe(arguments), "results": []}
+    with multiprocessing.Pool(max(concurrencies)) as pool:
+        for scale in [float(value) for value in arguments.scale.split(",")]:
+            servers = start(scale=scale, relay=arguments.target == "pymavrelay", arguments=arguments.arguments)
+            try:
+                for mix in mixes:
+                    for concurrency in concurrencies:
+                        result = run(pool, port, servers, mix, concurrency, arguments.duration, arguments.warmup)
+                        result["scale"] = scale
+                        results["results"].append(result)
+                        print(f"target={arguments.target} scale={scale:g} mix={mix} concurrency={concurrency} "
+                              f"throughput={result['throughput']:.0f}/s "
+                              + " ".join(f"{name}={value:.2f}ms" for name, value in result["latency_ms"].items())
+                              + f" errors={result['errors']} "
+                              + " ".join(f"{name}_cpu={usage['cpu'] * 100:.0f}% {name}_rss={usage['rss'] >> 20}MB"
+                                         for name, usage in result["resources"].items()))
+            finally:
+                stop(servers)
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(results, file, indent=2)
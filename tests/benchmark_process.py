@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import time
+import types
+import argparse
+import platform
+import tracemalloc
+
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+import pymavrest
+import pymavlink.dialects.v20.all as dialect
+from benchmark_dispatch import record
+
+
+# record a stream of messages that need special handling
+def record_special(count):
+    mav = dialect.MAVLink(file=None, srcSystem=1, srcComponent=1)
+    mix = [dialect.MAVLink_heartbeat_message(2, 3, 0, 0, 3, 3)] + \
+          [dialect.MAVLink_param_value_message(f"BENCH_{index:03d}".encode(), float(index), 9, 100, index)
+           for index in range(100)]
+    stream = bytearray()
+    for i in range(count):
+        stream += mix[i % len(mix)].pack(mav)
+    return bytes(stream)
+
+
+# split a stream to frames and decoded messages
+def decode(stream):
+    parser = dialect.MAVLink(file=None)
+    parser.robust_parsing = True
+    messages = parser.parse_buffer(stream)
+    frames = [bytes(message.get_msgbuf()) for message in messages]
+    return frames, messages
+
+
+# reset the state of the receive loop and configure it like the command line options do
+def configure(statistics, drop=0, black_message=""):
+    pymavrest.vehicle = types.SimpleNamespace(mav=dialect.MAVLink(file=open(os.devnull, "wb"), srcSystem=255),
+                                              target_system=1, target_component=1)
+    pymavrest.message_data.clear()
+    pymavrest.message_version.clear()
+    pymavrest.parameter_data.clear()
+    pymavrest.drop_heap.clear()
+    pymavrest.drop_scheduled.clear()
+    pymavrest.statistics_data["vehicle"] = {}
+    pymavrest.hold_statistics = statistics
+    pymavrest.configure_telemetry(drop=drop, white_message="", black_message=black_message, white_parameter="",
+                                  black_parameter="", param=False, plan=False, fence=False, rally=False)
+
+
+# stamp messages with increasing receive times
+def stamp(messages):
+    time_now = time.time()
+    time_monotonic = time.monotonic()
+    return [(message, time_now + index * 1e-4, time_monotonic + index * 1e-4) for index, message in enumerate(messages)]
+
+
+# process stamped messages like the receive loop does
+def process(items):
+    process_telemetry = pymavrest.process_telemetry
+    for message, time_now, time_monotonic in items:
+        process_telemetry(message, time_now, time_monotonic)
+
+
+# decode frames and process the messages like the receive loop does
+def receive(items):
+    parser, frames = items
+    process_telemetry = pymavrest.process_telemetry
+    for frame in frames:
+        for message in parser.parse_buffer(frame) or []:
+            process_telemetry(message, time.time(), time.monotonic())
+
+
+# create the stages as a preparation that resets the state and returns the items, and a run over the items
+def create_stages(stream, special):
+    frames, messages = decode(stream)
+    special_messages = decode(special)[1]
+    names = ",".join({message.get_type() for message in messages})
+    parser = dialect.MAVLink(file=None)
+    parser.robust_parsing = True
+    return {"decode": (lambda: frames, lambda items: [parser.parse_buffer(frame) for frame in items]),
+            "to_dict": (lambda: messages, lambda items: [message.to_dict() for message in items]),
+            "filter": (lambda: configure(statistics=True, black_message=names) or stamp(messages), process),
+            "merge": (lambda: configure(statistics=False) or stamp(messages), process),
+            "statistics": (lambda: configure(statistics=True) or stamp(messages), process),
+            "drop": (lambda: configure(statistics=True, drop=5) or stamp(messages), process),
+            "special": (lambda: configure(statistics=True) or stamp(special_messages), process),
+            "receive": (lambda: configure(statistics=True) or (parser, frames), receive)}
+
+
+# measure the fastest run of a stage in nanoseconds per message
+def measure(prepare, run, repeat):
+    best = None
+    for _ in range(repeat):
+        items = prepare()
+        count = len(items[1]) if isinstance(items, tuple) else len(items)
+        time_initial = time.perf_counter_ns()
+        run(items)
+        duration = (time.perf_counter_ns() - time_initial) / count
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+# measure bytes allocated per message as the peak traced memory of handling each message on its own
+def allocate(prepare, run, limit):
+    items = prepare()
+    if isinstance(items, tuple):
+        batches = [(items[0], [item]) for item in items[1][:limit]]
+    else:
+        batches = [[item] for item in items[:limit]]
+    total = 0
+    tracemalloc.start()
+    for batch in batches:
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        run(batch)
+        total += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return total / len(batches)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cost per message of the receive loop stages.")
+    parser.add_argument("--count", default=100000, type=int, help="Message count of the streams.")
+    parser.add_argument("--repeat", default=5, type=int, help="Runs of each stage, the fastest one is reported.")
+    parser.add_argument("--allocate", default=10000, type=int, help="Messages traced to measure allocations.")
+    parser.add_argument("--output", default="", help="JSON file to write the results to.")
+    parser.add_argument("--baseline", default="", help="JSON file of earlier results to compare with.")
+    parser.add_argument("--threshold", default=0.15, type=float,
+                        help="Fail when a stage is slower than the baseline by more than this ratio.")
+    arguments = parser.parse_args()
+    stages = create_stages(stream=record(arguments.count), special=record_special(arguments.count))
+    results = {"meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                        "python": platform.python_version(),
+                        "machine": platform.platform(),
+                        "arguments": vars(arguments)},
+               "stages": {}}
+    for name, (prepare, run) in stages.items():
+        results["stages"][name] = {"ns": measure(prepare, run, arguments.repeat),
+                                   "alloc_bytes": allocate(prepare, run, arguments.allocate)}
+        print(f"{name:<10} {results['stages'][name]['ns']:8.0f} ns/message "
+              f"{results['stages'][name]['alloc_bytes']:8.0f} allocated bytes/message")
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            baseline = json.load(file)["stages"]
+        regressions = [name for name, result in results["stages"].items()
+                       if name in baseline and result["ns"] > baseline[name]["ns"] * (1 + arguments.threshold)]
+        for name in regressions:
+            print(f"regression: {name} {baseline[name]['ns']:.0f} -> {results['stages'][name]['ns']:.0f} ns/message")
+        sys.exit(1 if regressions else 0)
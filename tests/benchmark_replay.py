@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import struct
+import argparse
+import tempfile
+import subprocess
+import requests
+import pymavlink.dialects.v20.all as dialect
+from benchmark_dispatch import record
+
+HTTP_PORT = 2649
+
+
+# write a synthetic telemetry log of a typical autopilot message mix between two marker messages
+def write(path, count):
+    mav = dialect.MAVLink(file=None, srcSystem=1, srcComponent=1)
+    stream = record(count)
+    frames = [dialect.MAVLink_heartbeat_message(2, 3, 0, 0, 3, 3).pack(mav),
+              dialect.MAVLink_system_time_message(0, 0).pack(mav)]
+    position = 0
+    while position < len(stream):
+        length = stream[position + 1] + 12 + (13 if stream[position + 2] & 1 else 0)
+        frames.append(stream[position:position + length])
+        position += length
+    frames.append(dialect.MAVLink_timesync_message(0, 0).pack(mav))
+    with open(path, "wb") as file:
+        for i, frame in enumerate(frames):
+            file.write(struct.pack(">Q", 1700000000000000 + i * 1000) + frame)
+
+
+# replay the telemetry log as master as fast as possible and measure the processing cost per message
+def benchmark(script, path, count):
+    server = subprocess.Popen([sys.executable, os.path.abspath(script),
+                               "--port", str(HTTP_PORT), "--master", path, "--replay", "0", "--timeout", "0",
+                               "--rate", "0", "--param", "False", "--plan", "False", "--fence", "False",
+                               "--rally", "False", "--reset", "False", "--home", "False", "--cache", "False",
+                               "--vehicle_cache", "False"],
+                              cwd=os.path.dirname(os.path.abspath(script)),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            time.sleep(0.5)
+            try:
+                data = requests.get(f"http://127.0.0.1:{HTTP_PORT}/get/message/all", timeout=60).json()
+            except requests.exceptions.ConnectionError:
+                continue
+            if "TIMESYNC" in data:
+                break
+    finally:
+        server.terminate()
+        server.wait()
+
+    duration = data["TIMESYNC"]["statistics"]["last_monotonic"] - data["SYSTEM_TIME"]["statistics"]["last_monotonic"]
+    print(f"{script}: {count} messages replayed in {duration:.3f} s, {duration / count * 1e9:.0f} ns/message")
+    return duration
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a synthetic telemetry log through receive_telemetry.")
+    parser.add_argument("--script", default=os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                          "..", "pymavrest.py")))
+    parser.add_argument("--count", default=200000, type=int, help="Synthetic telemetry log length.")
+    arguments = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "replay.tlog")
+        write(log_path, arguments.count)
+        benchmark(arguments.script, log_path, arguments.count)
@@ -0,0 +1,47 @@
+import os
+import glob
+import argparse
+import statistics
+import tempfile
+import benchmark_dispatch
+
+
+# count the messages in a telemetry log file
+def count_packets(path):
+    with open(path, "rb") as file:
+        data = file.read()
+    position, packets = 0, 0
+    while position + 10 <= len(data):
+        length, flags = data[position + 9], data[position + 10] if data[position + 8] == 0xfd else 0
+        size = length + 12 + (13 if flags & 1 else 0) if data[position + 8] == 0xfd else length + 8
+        position += 8 + size
+        packets += 1
+    return packets
+
+
+# replay the same stream with and without the telemetry log recorder in alternating order and compare the medians
+def benchmark(script, count, repeat):
+    stream = benchmark_dispatch.record(count)
+    durations = {False: [], True: []}
+    for index in range(repeat):
+        for recording in ((False, True) if index % 2 == 0 else (True, False)):
+            with tempfile.TemporaryDirectory() as directory:
+                arguments = ("--tlog", os.path.join(directory, "flight.tlog")) if recording else ()
+                duration, _ = benchmark_dispatch.benchmark(script, stream, count, arguments)
+                packets = sum(count_packets(file) for file in glob.glob(os.path.join(directory, "flight_*.tlog")))
+            durations[recording].append(duration)
+            if recording:
+                print(f"recorded packets={packets}")
+    plain, recorded = statistics.median(durations[False]), statistics.median(durations[True])
+    print(f"median plain={plain / count * 1e9:.0f} ns/message recorded={recorded / count * 1e9:.0f} ns/message "
+          f"overhead={(recorded - plain) / count * 1e9:+.0f} ns/message ({(recorded / plain - 1) * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the parse path overhead of recording telemetry logs.")
+    parser.add_argument("--script", default=os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                          "..", "pymavrest.py")))
+    parser.add_argument("--count", default=200000, type=int, help="Synthetic stream length.")
+    parser.add_argument("--repeat", default=4, type=int, help="Number of paired runs.")
+    arguments = parser.parse_args()
+    benchmark(arguments.script, arguments.count, arguments.repeat)